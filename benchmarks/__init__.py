@@ -0,0 +1,9 @@
+'''
+covid-stats: benchmarks module.
+
+Each benchmark is a module with a main() function, run with python -m benchmarks.<name>.
+Synthetic datasets shared by the benchmarks live in benchmarks/fixtures.py.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
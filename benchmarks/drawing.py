@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from benchmarks import fixtures
+from covidstats import plot
+
+VALUE_VARS = ['infected', 'cured', 'fatal']
+PALETTE = ['orange', 'green', 'red']
+SCALES = [1, 10]
+
+
+def make_cases_df(periods, freq, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({value_var: rng.gamma(4, 100, periods) for value_var in VALUE_VARS})
+    df.insert(0, 'date', pd.date_range(end=fixtures.END_DATE, periods=periods, freq=freq))
+
+    return df
+
+
+def draw_with_seaborn(ax, df):
+    # The way the generators drew before the drawing layer: melted to long format and aggregated per date again.
+    plot_df = pd.melt(df, id_vars=['date'], value_vars=VALUE_VARS).dropna()
+    sns.lineplot(x='date', y='value', hue='variable', hue_order=VALUE_VARS, palette=PALETTE, data=plot_df, ax=ax)
+
+
+def draw_with_drawing_layer(ax, df):
+    plot.draw_lines(ax, df['date'], df, VALUE_VARS, PALETTE, VALUE_VARS)
+
+
+def measure_drawing(draw, df, repeat=5):
+    # Only the drawing is timed, every repetition gets fresh axes from the figure pool.
+    timings = []
+    for _ in range(repeat):
+        ax = plot.get_axes()
+        start = time.perf_counter()
+        draw(ax, df)
+        timings.append(time.perf_counter() - start)
+        plot.release_figure(ax.figure)
+
+    return min(timings)
+
+
+def main():
+    plot.setup_sns()
+
+    for scale in SCALES:
+        datasets = {
+            'week_cases_df': make_cases_df(fixtures.REAL_DAYS * scale // 7, 'W'),
+            'date_cases_df': make_cases_df(fixtures.REAL_DAYS * scale, 'D')
+        }
+
+        print('Drawing %d days of history' % (fixtures.REAL_DAYS * scale))
+
+        for name, df in datasets.items():
+            seaborn_seconds = measure_drawing(draw_with_seaborn, df)
+            drawing_layer_seconds = measure_drawing(draw_with_drawing_layer, df)
+            print('  %-14s seaborn %8.2f ms  drawing layer %8.2f ms  %6.1fx' % (
+                name + ':', seaborn_seconds * 1000, drawing_layer_seconds * 1000,
+                seaborn_seconds / drawing_layer_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import os
+import pathlib
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from matplotlib.layout_engine import TightLayoutEngine
+
+from benchmarks import fixtures
+from covidstats import locales, plot
+
+EXPORT_MODES = {
+    'vector, tight bbox': {},
+    'rasterized, tight bbox': {'rasterize': True},
+    'rasterized, fixed layout': {'rasterize': True, 'fixed_layout': True}
+}
+
+HISTORY_YEARS = [3, 10, 30]
+
+# Regions and municipalities.
+FACET_PLACES = [28, 265]
+
+SITE_FORMATS = [plot.ExportFormat('svg'), plot.ExportFormat('pdf'), plot.ExportFormat('png', 1200),
+                plot.ExportFormat('webp', 600)]
+
+
+def make_rolling_biweekly_places_cases_df(days=fixtures.REAL_DAYS, places=fixtures.REAL_PLACES, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=fixtures.END_DATE, periods=days)
+
+    return pd.DataFrame({
+        'date': np.tile(dates, places),
+        'place': np.repeat(['Place %d' % place for place in range(places)], days),
+        'infected_avg_100k': rng.gamma(4, 100, days * places)
+    })
+
+
+def export_facet_plot(df, file_name, **kwargs):
+    # Only the export is timed, the figure is drawn beforehand.
+    figure = plot.generate_rolling_biweekly_places_cases_facet_plot(df)
+
+    start = time.perf_counter()
+    plot.export_plot(figure, file_name, False, **kwargs)
+
+    return time.perf_counter() - start, os.path.getsize(file_name + '.svg')
+
+
+def render_and_export_facet_plot(df, file_name):
+    start = time.perf_counter()
+    figure = plot.generate_rolling_biweekly_places_cases_facet_plot(df)
+    rendered = time.perf_counter()
+    plot.export_plot(figure, file_name, False, fixed_layout=True)
+
+    return rendered - start, time.perf_counter() - rendered, os.path.getsize(file_name + '.svg')
+
+
+def make_active_cases_df(days=fixtures.REAL_DAYS, seed=0):
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({'active': rng.gamma(4, 100, days)}, index=pd.date_range(end=fixtures.END_DATE, periods=days))
+
+
+def export_formats(df, file_name, formats):
+    ax = plot.generate_active_cases_plot(df)
+
+    start = time.perf_counter()
+    plot.export_plot(ax, file_name, formats=formats)
+
+    return time.perf_counter() - start
+
+
+def export_formats_separately(df, file_name, formats):
+    # Every format saved with its own savefig call, as export_plot did before it took a list of formats.
+    ax = plot.generate_active_cases_plot(df)
+
+    start = time.perf_counter()
+    TightLayoutEngine().execute(ax.figure)
+    ax.figure.set_size_inches(12, 8)
+
+    for export_format in formats:
+        dpi = 300 if export_format.width is None else export_format.width / 12
+        ax.figure.savefig(plot.get_export_file_name(file_name, export_format), dpi=dpi, transparent=True,
+                          bbox_inches='tight', pad_inches=0)
+
+    plot.release_figure(ax.figure)
+
+    return time.perf_counter() - start
+
+
+def render_and_export_history(df, file_name):
+    start = time.perf_counter()
+    ax = plot.generate_active_cases_plot(df)
+    rendered = time.perf_counter()
+    plot.export_plot(ax, file_name)
+
+    return rendered - start, time.perf_counter() - rendered, os.path.getsize(file_name + '.svg')
+
+
+def main():
+    locales.setup_i18n()
+    locales.set_locale('en')
+    plot.setup_sns()
+
+    df = make_rolling_biweekly_places_cases_df()
+
+    print('Exporting the %d-facet plot' % fixtures.REAL_PLACES)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, kwargs in EXPORT_MODES.items():
+            seconds, size = export_facet_plot(df, str(pathlib.Path(directory, 'RollingBiWeeklyPlacesCases')), **kwargs)
+            print('  %-26s %8.2f s %10.1f KB' % (mode + ':', seconds, size / 1024))
+
+    print('Rendering and exporting the facet plot over a growing number of places')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for places in FACET_PLACES:
+            render_seconds, export_seconds, size = render_and_export_facet_plot(
+                make_rolling_biweekly_places_cases_df(places=places),
+                str(pathlib.Path(directory, 'RollingBiWeeklyPlacesCases')))
+            print('  %-26s %8.2f s %8.2f s %10.1f KB' % ('%d places:' % places, render_seconds, export_seconds,
+                                                         size / 1024))
+
+    df = make_active_cases_df()
+    names = ', '.join(plot.get_export_file_name('ActiveCases', export_format) for export_format in SITE_FORMATS)
+
+    print('Exporting %s' % names)
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = str(pathlib.Path(directory, 'ActiveCases'))
+
+        print('  %-26s %8.2f s' % ('svg only:', export_formats(df, file_name, plot.DEFAULT_FORMATS)))
+        print('  %-26s %8.2f s' % ('all formats:', export_formats(df, file_name, SITE_FORMATS)))
+        print('  %-26s %8.2f s' % ('savefig per format:', export_formats_separately(df, file_name, SITE_FORMATS)))
+
+    print('Rendering and exporting ActiveCases over a growing history')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for years in HISTORY_YEARS:
+            render_seconds, export_seconds, size = render_and_export_history(
+                make_active_cases_df(days=365 * years), str(pathlib.Path(directory, 'ActiveCases')))
+            print('  %-26s %8.2f s %8.2f s %10.1f KB' % ('%d years:' % years, render_seconds, export_seconds,
+                                                         size / 1024))
+
+
+if __name__ == '__main__':
+    main()
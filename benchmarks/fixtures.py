@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Size of the real datasets, which the pipeline benchmark multiplies by its scale.
+REAL_DAYS = 1000
+REAL_PLACES = 28
+
+# Synthetic histories end on a fixed day, so the fixtures are the same on every run and long ones start earlier.
+END_DATE = '2022-12-31'
+
+
+def make_week_places_cases_df(years=10, places=300, seed=0):
+    rng = np.random.default_rng(seed)
+    weeks = pd.date_range('2020-03-08', periods=years * 52, freq='W').isocalendar()
+
+    df = pd.DataFrame({
+        'year': np.repeat(weeks['year'].to_numpy(dtype='int64'), places),
+        'week': np.repeat(weeks['week'].to_numpy(dtype='int64'), places),
+        'place': np.tile(['Place %d' % place for place in range(places)], len(weeks)),
+    })
+    df['infected'] = rng.poisson(100, len(df))
+    df['infected_avg'] = df['infected'] / 7
+
+    return df
+
+
+def make_source_payloads(days=REAL_DAYS, places=REAL_PLACES, seed=0):
+    # Raw payloads in the formats of the dataset sources, keyed by dataset name. Daily cases follow waves, so that
+    # Rt estimation and the forecast see a realistic series.
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=END_DATE, periods=days)
+    waves = 1000 * (1.2 + np.sin(np.arange(days) / 60))
+    date_columns = ['infected', 'cured', 'fatal', 'hospitalized', 'intensive_care', 'medical_staff', 'pcr_tests',
+                    'positive_pcr_tests', 'antigen_tests', 'positive_antigen_tests', 'vaccinated']
+    iso_dates = dates.strftime('%Y-%m-%d')
+    payloads = {}
+
+    date_diff_cases = {column: rng.poisson(waves / (offset + 1)) for offset, column in enumerate(date_columns)}
+    payloads['date_diff_cases'] = json.dumps({column: dict(zip(iso_dates, values.tolist()))
+                                              for column, values in date_diff_cases.items()}).encode('utf-8')
+    payloads['date_cases'] = json.dumps({column: dict(zip(iso_dates, np.cumsum(values).tolist()))
+                                         for column, values in date_diff_cases.items()}).encode('utf-8')
+    payloads['active_cases'] = json.dumps({'active': dict(zip(iso_dates, rng.poisson(5000, days).tolist()))})\
+        .encode('utf-8')
+
+    weeks = pd.date_range(dates[0], dates[-1], freq='W').isocalendar()
+    payloads['week_cases'] = pd.DataFrame({
+        'year': weeks['year'].to_numpy(), 'week': weeks['week'].to_numpy(),
+        **{column: rng.poisson(7000, len(weeks)) for column in date_columns}
+    }).to_csv(index=False).encode('utf-8')
+    week_places_cases_df = pd.DataFrame({
+        'year': np.repeat(weeks['year'].to_numpy(), places), 'week': np.repeat(weeks['week'].to_numpy(), places),
+        'place': np.tile(['Place %d' % place for place in range(places)], len(weeks)),
+        'infected': rng.poisson(np.repeat(waves[::7][:len(weeks)] * 7 / places, places))
+    })
+    week_places_cases_df['infected_avg'] = week_places_cases_df['infected'] / 7
+    payloads['week_places_cases'] = week_places_cases_df.to_csv(index=False).encode('utf-8')
+
+    places_list = ['Place %d' % place for place in range(places)]
+    payloads['rolling_biweekly_places_cases'] = pd.DataFrame({
+        'date': np.repeat(iso_dates, places), 'place': np.tile(places_list, days),
+        'infected_avg_100k': rng.gamma(2, 150, days * places)
+    }).to_csv(index=False).encode('utf-8')
+
+    age_groups = ['0 - 19', '20 - 29', '30 - 39', '40 - 49', '50 - 59', '60 - 69', '70 - 79', '80 - 89', '90+']
+    payloads['date_cases_age'] = pd.DataFrame({
+        'date': iso_dates,
+        **{'group_' + group.replace(' - ', '_').rstrip('+'): np.cumsum(rng.poisson(50, days)) for group in age_groups}
+    }).to_csv(index=False).encode('utf-8')
+    payloads['date_positive_tests'] = pd.DataFrame({
+        'date': iso_dates, 'pcr_tests': rng.poisson(10000, days), 'positive_pcr_tests': rng.poisson(1000, days),
+        'antigen_tests': rng.poisson(5000, days), 'positive_antigen_tests': rng.poisson(300, days),
+        'positive_percentage': rng.uniform(0, 30, days), 'pcr_positive_percentage': rng.uniform(0, 30, days),
+        'antigen_positive_percentage': rng.uniform(0, 30, days)
+    }).to_csv(index=False).encode('utf-8')
+
+    payloads['infected_by_age_group'] = pd.DataFrame({
+        'Дата': iso_dates, **{group: np.cumsum(rng.poisson(50, days)) for group in age_groups}
+    }).to_csv(index=False).encode('utf-8')
+
+    rows = pd.MultiIndex.from_product([iso_dates, ['Comirnaty', 'Janssen'], ['male', 'female'], age_groups],
+                                      names=['Дата', 'Ваксина', 'Пол', 'Възрастова група']).to_frame(index=False)
+    payloads['fatal_by_age_group'] = rows.drop(columns='Ваксина').drop_duplicates().assign(
+        **{'Брой починали': lambda df: rng.poisson(3, len(df))}).to_csv(index=False).encode('utf-8')
+    for name, column in [('infected_vaccinated', 'Брой заразени'), ('hospitalized_vaccinated', 'Брой хоспитализирани'),
+                         ('intensive_care_vaccinated', 'Брой в интензивно отделение'),
+                         ('fatal_vaccinated', 'Брой починали')]:
+        payloads[name] = rows.assign(**{column: rng.poisson(10, len(rows))}).to_csv(index=False).encode('utf-8')
+
+    return payloads
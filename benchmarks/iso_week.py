@@ -0,0 +1,34 @@
+import datetime as dt
+
+import pandas as pd
+
+from benchmarks import fixtures
+from benchmarks.timing import measure
+from covidstats import data
+
+
+def apply_iso_week_end_dates(df):
+    return df.apply(lambda row: dt.date.fromisocalendar(row.year, row.week, 7), axis=1)
+
+
+def vectorized_iso_week_end_dates(df):
+    return data.build_iso_week_end_dates(df['year'], df['week']).dt.date
+
+
+def main():
+    df = fixtures.make_week_places_cases_df(years=10, places=300)
+
+    pd.testing.assert_series_equal(apply_iso_week_end_dates(df), vectorized_iso_week_end_dates(df),
+                                   check_names=False)
+
+    apply_time = measure(apply_iso_week_end_dates, df, repeat=1)
+    vectorized_time = measure(vectorized_iso_week_end_dates, df)
+
+    print('ISO week end dates for %d rows' % len(df))
+    print('  DataFrame.apply: %8.3f s' % apply_time)
+    print('  vectorized:      %8.3f s' % vectorized_time)
+    print('  speedup:         %8.1fx' % (apply_time / vectorized_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import json
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import fixtures
+from covidstats import cache, data, locales, manifest, plot, snapshot
+
+DERIVED_DATASETS = ['date_diff_cases_age', 'weekly_positive_tests', 'weekly_antigen_positive_tests', 'forecast',
+                    'places_rt']
+
+# A stage counts as a regression when it is this much slower or larger than in the baseline.
+REGRESSION_RATIO = 1.25
+
+
+def measure_time(results, stage, name, function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    results[stage, name] = {'seconds': time.perf_counter() - start}
+
+    return value
+
+
+def measure_memory(results, stage, name, function, *args):
+    # Peak memory allocated by the stage on top of what was already allocated when it started.
+    tracemalloc.reset_peak()
+    current_bytes = tracemalloc.get_traced_memory()[0]
+    value = function(*args)
+    results[stage, name] = {'peak_bytes': tracemalloc.get_traced_memory()[1] - current_bytes}
+
+    return value
+
+
+def run_pipeline(measure, specs, skip, output_directory):
+    # Parsing reads the source again, which the fetch stage shows the cost of.
+    sources = [name for name in data.DATASET_SOURCES if name not in skip]
+    datasets = {}
+
+    data.clear_datasets()
+
+    for name in sources:
+        measure('fetch', name, data.fetch_dataset_source, name)
+        datasets[name] = measure('parse', name, data.get_dataset, name)
+
+    if 'forecast' not in skip:
+        measure('transform', 'estimate_rt', data.helpers.estimate_rt, datasets['date_diff_cases']['infected'])
+    for name in DERIVED_DATASETS:
+        if name not in skip:
+            datasets[name] = measure('transform', name, data.get_dataset, name)
+
+    for spec in specs:
+        if any(dataset not in datasets for dataset in spec.inputs.values()):
+            continue
+
+        kwargs = {argument: datasets[dataset] for argument, dataset in spec.inputs.items()}
+        kwargs.update(manifest.translate(spec.kwargs))
+
+        ax = measure('render', spec.name, lambda: spec.generator(**kwargs))
+        measure('export', spec.name, plot.export_plot, ax, str(output_directory.joinpath(spec.name)),
+                spec.override_figure_size, spec.rasterize, spec.fixed_layout)
+
+    data.clear_datasets()
+
+
+def run_scale(scale, specs, skip, memory):
+    payloads = fixtures.make_source_payloads(days=fixtures.REAL_DAYS * scale)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = pathlib.Path(directory)
+        snapshot.write(directory.joinpath('snapshot'),
+                       {data.get_source_file_name(name): (url, payloads[name])
+                        for name, url in data.DATASET_SOURCES.items()})
+        directory.joinpath('plots').mkdir()
+
+        snapshot.setup_snapshot(str(directory.joinpath('snapshot')))
+        cache.setup_cache()
+
+        run_pipeline(lambda *args: measure_time(results, *args), specs, skip, directory.joinpath('plots'))
+
+        if memory:
+            memory_results = {}
+            tracemalloc.start()
+            run_pipeline(lambda *args: measure_memory(memory_results, *args), specs, skip,
+                         directory.joinpath('plots'))
+            tracemalloc.stop()
+
+            for key, result in memory_results.items():
+                results[key].update(result)
+
+        snapshot.setup_snapshot()
+
+    return [{'scale': scale, 'stage': stage, 'name': name, **result} for (stage, name), result in results.items()]
+
+
+def compare(results, baseline):
+    baseline_results = {(result['scale'], result['stage'], result['name']): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        baseline_result = baseline_results.get((result['scale'], result['stage'], result['name']))
+        if baseline_result is None:
+            continue
+
+        for metric in ['seconds', 'peak_bytes']:
+            if baseline_result.get(metric) and result.get(metric, 0) > baseline_result[metric] * REGRESSION_RATIO:
+                regressions.append((result, metric, result[metric] / baseline_result[metric]))
+
+    return regressions
+
+
+def print_results(results):
+    print('%6s %-10s %-45s %10s %12s' % ('scale', 'stage', 'name', 'seconds', 'peak MB'))
+
+    for result in results:
+        peak_bytes = result.get('peak_bytes')
+        print('%5dx %-10s %-45s %10.3f %12s' % (result['scale'], result['stage'], result['name'], result['seconds'],
+                                                '-' if peak_bytes is None else '%.1f' % (peak_bytes / 1024 / 1024)))
+
+    for scale in sorted({result['scale'] for result in results}):
+        for stage in ['fetch', 'parse', 'transform', 'render', 'export']:
+            seconds = sum(result['seconds'] for result in results
+                          if result['scale'] == scale and result['stage'] == stage)
+            print('%5dx %-10s %-45s %10.3f' % (scale, stage, 'total', seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times every stage of the pipeline on synthetic datasets.')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1],
+                        help='Dataset sizes as multiples of the real datasets, e.g. 1 10 100.')
+    parser.add_argument('--plots', nargs='+', metavar='NAME', help='Render only the plots with the given names.')
+    parser.add_argument('--skip', nargs='+', default=[], metavar='NAME', help='Datasets to leave out.')
+    parser.add_argument('--no-memory', action='store_false', dest='memory',
+                        help='Skip the second run that measures peak memory with tracemalloc.')
+    parser.add_argument('--baseline', help='Compare with the results stored in this JSON file.')
+    parser.add_argument('--save', help='Store the results in this JSON file, e.g. as a new baseline.')
+    arguments = parser.parse_args()
+
+    locales.setup_i18n()
+    locales.set_locale('en')
+    plot.setup_sns()
+
+    specs = manifest.select(manifest.PLOTS + manifest.OPTIONAL_PLOTS, arguments.plots)
+    results = [result for scale in arguments.scale
+               for result in run_scale(scale, specs, set(arguments.skip), arguments.memory)]
+
+    print_results(results)
+
+    if arguments.save:
+        pathlib.Path(arguments.save).write_text(json.dumps(results, indent=2))
+
+    if arguments.baseline:
+        regressions = compare(results, json.loads(pathlib.Path(arguments.baseline).read_text()))
+
+        for result, metric, ratio in regressions:
+            print('regression: %dx %s %s %s %.2fx' % (result['scale'], result['stage'], result['name'], metric, ratio))
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
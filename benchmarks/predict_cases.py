@@ -0,0 +1,49 @@
+import numpy as np
+
+from benchmarks.timing import measure
+from covidstats import helpers
+
+
+def legacy_predict_cases(reported_cases, predicted_rts):
+    # The implementation before the preallocated buffer, kept as the baseline.
+    predicted_cases = np.array([])
+    rng = np.random.default_rng()
+
+    for i in range(len(predicted_rts)):
+        previous_cases = np.append(reported_cases, predicted_cases)[::-1]
+        distribution = helpers.draw_from_si([*range(len(previous_cases))])
+
+        predicted_cases = np.append(predicted_cases,
+                                    rng.poisson(predicted_rts[i] * np.sum(np.multiply(previous_cases, distribution)),
+                                                1)[0])
+
+    return predicted_cases
+
+
+def main():
+    predicted_rts = np.full(14, 1.0)
+
+    print('14-day forecast simulation')
+    print('%10s %12s %12s %10s' % ('history', 'legacy', 'buffer', 'speedup'))
+
+    for history_length in [1000, 5000, 50000]:
+        reported_cases = np.random.default_rng(0).poisson(1000, history_length).astype(float)
+
+        legacy_time = measure(legacy_predict_cases, reported_cases, predicted_rts)
+        buffer_time = measure(helpers.predict_cases, reported_cases, predicted_rts)
+
+        print('%10d %10.2fms %10.2fms %9.1fx' % (history_length, legacy_time * 1000, buffer_time * 1000,
+                                                  legacy_time / buffer_time))
+
+    reported_cases = np.random.default_rng(0).poisson(1000, 1000).astype(float)
+
+    print()
+    print('14-day forecast ensemble')
+    print('%10s %12s' % ('paths', 'time'))
+
+    for paths in [100, 1000, 10000]:
+        print('%10d %10.2fms' % (paths, measure(helpers.simulate_cases, reported_cases, predicted_rts, paths) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import pathlib
+import tempfile
+import time
+
+from benchmarks import fixtures
+from benchmarks.timing import measure
+from covidstats import cache, data, store
+
+
+def seed_cache(directory, payloads):
+    # Writes the payloads as fresh cache entries, so the loaders read them without any request.
+    for name, payload in payloads.items():
+        url = data.DATASET_SOURCES[name]
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+        pathlib.Path(directory, key + '.data').write_bytes(payload)
+        pathlib.Path(directory, key + '.json').write_text(json.dumps({
+            'url': url, 'etag': None, 'last_modified': None, 'checked_at': time.time(), 'used_at': time.time(),
+            'size': len(payload)
+        }))
+
+
+def parse_datasets():
+    return [data.DATASETS[name]() for name in data.DATASET_SOURCES]
+
+
+def load_stored_datasets():
+    return [data.load_dataset(name) for name in data.DATASET_SOURCES]
+
+
+def main():
+    if not store.feather:
+        print('pyarrow is not installed')
+        return
+
+    payloads = fixtures.make_source_payloads(days=900, places=28)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache.setup_cache(directory, ttl=3600)
+        seed_cache(directory, payloads)
+
+        parse_time = measure(parse_datasets)
+        load_stored_datasets()
+        store_time = measure(load_stored_datasets)
+
+        cache.setup_cache()
+
+    print('Loading %d source datasets (%.1f MB)' % (len(payloads), sum(map(len, payloads.values())) / 1024 / 1024))
+    print('  parse CSV/JSON: %8.1f ms' % (parse_time * 1000))
+    print('  feather store:  %8.1f ms' % (store_time * 1000))
+    print('  speedup:        %8.1fx' % (parse_time / store_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+import time
+
+
+def measure(function, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
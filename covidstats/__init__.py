@@ -5,41 +5,73 @@ Copyright 2021, Veselin Stoyanov
 Licensed under Attribution-NonCommercial-ShareAlike 4.0 International.
 '''
 
-from covidstats import data, plot, locales
-import datetime as dt
+from covidstats import cache, locales, profiler, snapshot
 import argparse
+import functools
+import os
 
-from covidstats.locales import t
+LOCALES = ['bg', 'en']
 
 
 def main():
     startup_arguments = get_startup_arguments()
 
+    cache.setup_cache(startup_arguments.cache_dir, startup_arguments.cache_ttl,
+                      startup_arguments.cache_max_size * 1024 * 1024, startup_arguments.fetch_timeout,
+                      startup_arguments.fetch_retries)
+    snapshot.setup_snapshot(startup_arguments.data_dir)
+    profiler.setup_profiler(startup_arguments.profile_report is not None, startup_arguments.profile_dir)
+
+    # The datasets and plotting modules, with pandas, matplotlib and seaborn behind them, are imported only on the
+    # paths that use them, so that e.g. --help starts at once.
+    from covidstats import data
+
+    data.setup_data(startup_arguments.processes)
+
+    if startup_arguments.capture_snapshot:
+        data.capture_snapshot(startup_arguments.capture_snapshot, startup_arguments.fetch_workers)
+        return
+
+    from covidstats import manifest, plot, render, server
+
     locales.setup_i18n()
     plot.setup_sns()
+    formats = startup_arguments.formats or plot.DEFAULT_FORMATS
+
+    if startup_arguments.serve is not None:
+        specs = manifest.select(manifest.PLOTS, startup_arguments.plots, manifest.OPTIONAL_PLOTS)
+        server.setup_server(LOCALES, specs, functools.partial(server.load_datasets,
+                                                              manifest.get_required_datasets(specs),
+                                                              startup_arguments.fetch_workers),
+                            startup_arguments.serve_cache_size)
+        server.serve(startup_arguments.host, startup_arguments.serve)
+        return
 
     if startup_arguments.external:
-        build_external()
-        return
+        timings = build_external(startup_arguments.fetch_workers, startup_arguments.processes,
+                                 startup_arguments.plots, not startup_arguments.force, formats)
+    else:
+        specs = manifest.select(manifest.PLOTS, startup_arguments.plots, manifest.OPTIONAL_PLOTS)
+        dataset_names = manifest.get_required_datasets(specs)
+        load_datasets = functools.partial(data.load_datasets, max_workers=startup_arguments.fetch_workers)
+
+        if startup_arguments.force:
+            datasets = load_datasets(dataset_names)
+            dataset_hashes = None
+        else:
+            # Derived datasets are hashed by the datasets they are built from, and built only for plots to render.
+            datasets = load_datasets(data.get_source_datasets(dataset_names))
+            dataset_hashes = {name: data.get_dataset_hash(name) for name in dataset_names
+                              if name in data.DERIVED_DATASETS}
 
-    date_cases_df = data.get_date_cases_df()
-    week_cases_df = data.get_week_cases_df()
-    date_diff_cases_df = data.get_date_diff_cases_df()
-    active_cases_df = data.get_active_cases_df()
-    week_places_cases_df = data.get_week_places_cases_df()
-    date_positive_tests_df = data.get_date_positive_tests_df()
-    weekly_positive_tests_df = data.build_weekly_positive_tests_df(date_positive_tests_df)
-    rolling_biweekly_places_cases_df = data.get_rolling_biweekly_places_cases_df()
-    date_cases_age_df = data.get_date_cases_age_df()
-    date_diff_cases_age_df = data.build_date_diff_cases_age_df(date_cases_age_df)
+        timings = render.render_plots(LOCALES, specs, datasets, startup_arguments.processes,
+                                      not startup_arguments.force, formats, dataset_hashes, load_datasets)
 
-    generate_plots('bg', date_cases_df, week_cases_df, date_diff_cases_df, active_cases_df, week_places_cases_df,
-                   date_positive_tests_df, weekly_positive_tests_df, rolling_biweekly_places_cases_df,
-                   date_cases_age_df, date_diff_cases_age_df)
+    if startup_arguments.timings:
+        render.print_timings(timings)
 
-    generate_plots('en', date_cases_df, week_cases_df, date_diff_cases_df, active_cases_df, week_places_cases_df,
-                   date_positive_tests_df, weekly_positive_tests_df, rolling_biweekly_places_cases_df,
-                   date_cases_age_df, date_diff_cases_age_df)
+    if startup_arguments.profile_report:
+        profiler.write_report(startup_arguments.profile_report)
 
 
 def get_startup_arguments():
@@ -47,156 +79,75 @@ def get_startup_arguments():
 
     parser.add_argument('--external', action='store_true', default=False, dest='external',
                         help='Generate plots with external data.')
+    parser.add_argument('--cache-dir', default=cache.settings['directory'], dest='cache_dir',
+                        help='Directory for caching downloaded datasets between runs.')
+    parser.add_argument('--cache-ttl', type=int, default=0, dest='cache_ttl',
+                        help='Seconds to reuse a cached dataset without revalidating it.')
+    parser.add_argument('--cache-max-size', type=int, default=256, dest='cache_max_size',
+                        help='Maximum size of the cache directory in megabytes, including the Rt estimates and '
+                             'the dataset store.')
+    parser.add_argument('--data-dir', dest='data_dir',
+                        help='Read all datasets from a snapshot directory or .zip bundle instead of downloading them.')
+    parser.add_argument('--capture-snapshot', metavar='PATH', dest='capture_snapshot',
+                        help='Save the current datasets to a snapshot directory or .zip bundle and exit.')
+    parser.add_argument('--fetch-workers', type=int, default=8, dest='fetch_workers',
+                        help='Number of datasets downloaded concurrently.')
+    parser.add_argument('--fetch-timeout', type=float, default=30, dest='fetch_timeout',
+                        help='Timeout in seconds for downloading a single dataset.')
+    parser.add_argument('--fetch-retries', type=int, default=2, dest='fetch_retries',
+                        help='Number of retries for a failed dataset download.')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, dest='processes',
+                        help='Number of processes rendering plots, and estimating Rt for all places, in parallel.')
+    parser.add_argument('--plots', nargs='+', metavar='NAME', dest='plots',
+                        help='Generate only the plots with the given output names, which can include the ones left '
+                             'out by default, e.g. PlacesRt.')
+    parser.add_argument('--formats', nargs='+', type=parse_export_format, metavar='FORMAT', dest='formats',
+                        help='Export formats of the plots with an optional width of raster images in pixels, '
+                             'e.g. svg pdf png:1200 webp:400. Defaults to svg.')
+    parser.add_argument('--timings', action='store_true', default=False, dest='timings',
+                        help='Print the time spent on each plot.')
+    parser.add_argument('--profile-report', metavar='PATH', dest='profile_report',
+                        help='Write the time, rows and bytes of every stage to a .json or .csv report.')
+    parser.add_argument('--profile-dir', dest='profile_dir',
+                        help='Dump a cProfile file for every top-level stage into this directory.')
+    parser.add_argument('--force', action='store_true', default=False, dest='force',
+                        help='Render all plots, including those whose input data has not changed.')
+    parser.add_argument('--serve', type=int, metavar='PORT', dest='serve',
+                        help='Keep the datasets in memory and render plots on request at '
+                             'http://HOST:PORT/plot/{locale}/{name}.svg instead of rendering all of them once.')
+    parser.add_argument('--host', default='127.0.0.1', dest='host',
+                        help='Address the plot server listens on.')
+    parser.add_argument('--serve-cache-size', type=int, default=64, dest='serve_cache_size',
+                        help='Number of rendered plots the plot server keeps in memory.')
 
     return parser.parse_args()
 
 
-def generate_plots(locale, date_cases_df, week_cases_df, date_diff_cases_df, active_cases_df, week_places_cases_df,
-                   date_positive_cases_percentage_df, weekly_positive_tests_df, rolling_biweekly_places_cases_df,
-                   date_cases_age_df, date_diff_cases_age_df):
-    locales.set_locale(locale)
+def parse_export_format(value):
+    from covidstats import plot
 
-    # Weekly infected and cured cases plot
-    infected_cured_week_cases_plot = plot.generate_week_cases_plot(
-        df=week_cases_df,
-        value_vars=['infected', 'cured'],
-        hue_order=['infected', 'cured'],
-        palette=['orange', 'green'],
-        legend=[t('plots.week_cases_plot.legend.infected'), t('plots.week_cases_plot.legend.cured')]
-    )
-    plot.export_plot(infected_cured_week_cases_plot, '%s/WeeklyInfectedCured' % locale)
-
-    # Weekly hospitalized, intensive care and fatal cases plot
-    hospitalized_intensive_fatal_week_cases_plot = plot.generate_week_cases_plot(
-        df=week_cases_df,
-        value_vars=['hospitalized', 'intensive_care', 'fatal'],
-        hue_order=['hospitalized', 'intensive_care', 'fatal'],
-        palette=['pink', 'purple', 'red'],
-        legend=[
-            t('plots.week_cases_plot.legend.hospitalized'),
-            t('plots.week_cases_plot.legend.intensive_care'),
-            t('plots.week_cases_plot.legend.fatal')
-        ]
-    )
-    plot.export_plot(hospitalized_intensive_fatal_week_cases_plot, '%s/WeeklyHospitalizedIntensiveCareFatal' % locale)
-
-    # Weekly places cases plot
-    places_cases_week_plot = plot.generate_week_places_cases_plot(week_places_cases_df)
-    plot.export_plot(places_cases_week_plot, '%s/WeeklyPlacesCases' % locale)
-
-    # 14 days forecast
-    start_date = dt.date.today() + dt.timedelta(days=1)
-    weekly_14_days_forecast_plot = plot.generate_weekly_14_days_prediction_plot_for_date(start_date, week_cases_df,
-                                                                                         date_diff_cases_df)
-    plot.export_plot(weekly_14_days_forecast_plot, '%s/Weekly14DaysForecast' % locale)
-
-    # Active cases plot
-    active_cases_plot = plot.generate_active_cases_plot(active_cases_df)
-    plot.export_plot(active_cases_plot, '%s/ActiveCases' % locale)
-
-    # Historical cases plot
-    historical_cases_plot = plot.generate_combined_date_cases_plot(date_cases_df)
-    plot.export_plot(historical_cases_plot, '%s/HistoricalCases' % locale)
-
-    # Historical hospitalized and intensive care
-    historical_hospitalized_intensive_care_cases_plot = plot.generate_date_cases_plot(
-        df=date_cases_df, value_vars=['hospitalized', 'intensive_care'], hue_order=['hospitalized', 'intensive_care'],
-        palette=['pink', 'purple'],
-        legend=[
-            t('plots.date_cases_plot.legend.hospitalized'),
-            t('plots.date_cases_plot.legend.intensive_care'),
-        ]
-    )
-    plot.export_plot(historical_hospitalized_intensive_care_cases_plot,
-                     '%s/HistoricalHospitalizedIntensiveCareCases' % locale)
-
-    # Daily positivity plot
-    date_tests_positivity_plot = plot.generate_date_positive_cases_percentage_plot(
-        date_positive_cases_percentage_df)
-    plot.export_plot(date_tests_positivity_plot, '%s/DateTestsPositivity' % locale)
-
-    # Weekly positivity plot
-    weekly_tests_positivity_plot = plot.generate_tests_positivity_plot(
-        df=weekly_positive_tests_df,
-        value_vars=['total_tests', 'total_positive_tests'],
-        hue_order=['total_tests', 'total_positive_tests'],
-        main_palette=['orange', 'red'],
-        main_legend=[
-            t('plots.tests_positivity_plot.legend.tests'),
-            t('plots.tests_positivity_plot.legend.positive_tests')
-        ],
-        secondary_var='positive_percentage',
-        secondary_legend=t('plots.tests_positivity_plot.legend.positive_tests_percentage'),
-        title=t('plots.tests_positivity_plot.title.pcr_antigen')
-    )
-    plot.export_plot(weekly_tests_positivity_plot, '%s/WeeklyTestsPositivity' % locale)
-
-    # Weekly PCR positivity plot
-    weekly_pcr_tests_positivity_plot = plot.generate_tests_positivity_plot(
-        df=weekly_positive_tests_df,
-        value_vars=['pcr_tests', 'positive_pcr_tests'],
-        hue_order=['pcr_tests', 'positive_pcr_tests'],
-        main_palette=['orange', 'red'],
-        main_legend=[
-            t('plots.tests_positivity_plot.legend.pcr_tests'),
-            t('plots.tests_positivity_plot.legend.positive_pcr_tests')
-        ],
-        secondary_var='pcr_positive_percentage',
-        secondary_legend=t('plots.tests_positivity_plot.legend.positive_tests_percentage'),
-        title=t('plots.tests_positivity_plot.title.pcr')
-    )
-    plot.export_plot(weekly_pcr_tests_positivity_plot, '%s/WeeklyPCRTestsPositivity' % locale)
-
-    # Weekly antigen positivity plot
-    weekly_antigen_tests_positivity_plot = plot.generate_tests_positivity_plot(
-        df=weekly_positive_tests_df[weekly_positive_tests_df.antigen_positive_percentage.notnull()],
-        value_vars=['antigen_tests', 'positive_antigen_tests'],
-        hue_order=['antigen_tests', 'positive_antigen_tests'],
-        main_palette=['orange', 'red'],
-        main_legend=[
-            t('plots.tests_positivity_plot.legend.antigen_tests'),
-            t('plots.tests_positivity_plot.legend.positive_antigen_tests')
-        ],
-        secondary_var='antigen_positive_percentage',
-        secondary_legend=t('plots.tests_positivity_plot.legend.positive_tests_percentage'),
-        title=t('plots.tests_positivity_plot.title.antigen')
-    )
-    plot.export_plot(weekly_antigen_tests_positivity_plot, '%s/WeeklyAntigenTestsPositivity' % locale)
+    return plot.parse_export_format(value)
 
-    # Rolling biweekly places cases plot
-    rolling_biweekly_places_cases_plot = plot.generate_rolling_biweekly_places_cases_facet_plot(
-        rolling_biweekly_places_cases_df
-    )
-    plot.export_plot(rolling_biweekly_places_cases_plot, ('%s/RollingBiWeeklyPlacesCases' % locale), False)
 
-    # Date cases age plot
-    date_cases_age_plot = plot.generate_cases_age_plot(date_cases_age_df)
-    plot.export_plot(date_cases_age_plot, '%s/DateCasesAge' % locale)
+def generate_plots(locale, datasets, names=None):
+    from covidstats import manifest, render
 
-    # Week cases age plot
-    date_week_cases_age_plot = plot.generate_week_cases_age_plot(date_diff_cases_age_df)
-    plot.export_plot(date_week_cases_age_plot, '%s/WeekCasesAge' % locale)
+    return render.render_plots([locale], manifest.select(manifest.PLOTS, names, manifest.OPTIONAL_PLOTS), datasets)
 
-    # Vaccination timeline by day
-    date_vaccination_timeline_plot = plot.generate_vaccination_timeline_plot(df=date_cases_df,
-                                                                             diff_df=date_diff_cases_df,
-                                                                             plot_type='daily')
-    plot.export_plot(date_vaccination_timeline_plot, '%s/DateVaccinationTimeline' % locale)
 
-    # Vaccination timeline by week
-    weekly_vaccination_timeline_plot = plot.generate_vaccination_timeline_plot(df=date_cases_df,
-                                                                               diff_df=week_cases_df,
-                                                                               plot_type='weekly')
-    plot.export_plot(weekly_vaccination_timeline_plot, '%s/WeeklyVaccinationTimeline' % locale)
+def build_external(fetch_workers=8, processes=1, names=None, incremental=False, formats=None):
+    from covidstats import data, manifest, plot, render
 
+    datasets = data.load_datasets(['infected_by_age_group', 'fatal_by_age_group', 'infected_vaccinated',
+                                   'hospitalized_vaccinated', 'intensive_care_vaccinated', 'fatal_vaccinated',
+                                   'date_diff_cases'], fetch_workers)
 
-def build_external():
-    infected_by_age_group_df = data.get_infected_by_age_group_df()
-    fatal_by_age_group_df = data.get_fatal_by_age_group_df()
-    infected_vaccinated_df = data.get_infected_vaccinated_df()
-    hospitalized_vaccinated_df = data.get_hospitalized_vaccinated_df()
-    intensive_care_vaccinated_df = data.get_intensive_care_vaccinated_df()
-    fatal_vaccinated_df = data.get_fatal_vaccinated_df()
+    infected_by_age_group_df = datasets['infected_by_age_group']
+    fatal_by_age_group_df = datasets['fatal_by_age_group']
+    infected_vaccinated_df = datasets['infected_vaccinated']
+    hospitalized_vaccinated_df = datasets['hospitalized_vaccinated']
+    intensive_care_vaccinated_df = datasets['intensive_care_vaccinated']
+    fatal_vaccinated_df = datasets['fatal_vaccinated']
 
     total_infected_by_age_group_df = data.build_total_infected_by_age_group_df(infected_by_age_group_df)
     total_fatal_by_age_group_df = data.build_grouped_by_age_df(fatal_by_age_group_df, filter_column='age')
@@ -213,7 +164,7 @@ def build_external():
     vaccinated_by_age_fatal_percentage_df = data.build_grouped_by_age_fatal_percentage_df(
         infected_vaccinated_by_age_df, fatal_vaccinated_by_age_df)
 
-    date_diff_cases_df = data.get_date_diff_cases_df()
+    date_diff_cases_df = datasets['date_diff_cases']
     date_vaccinated_fatal_df = data.build_date_vaccinated_fatal_df(fatal_vaccinated_df)
     vaccinated_fatal_percentage_df = data.build_vaccinated_fatal_percentage_df(date_vaccinated_fatal_df,
                                                                                date_diff_cases_df)
@@ -225,104 +176,24 @@ def build_external():
     unvaccinated_by_age_fatal_percentage_df = data.build_grouped_by_age_fatal_percentage_df(
         infected_unvaccinated_by_age_df, fatal_unvaccinated_by_age_df)
 
+    external_datasets = {
+        'total_infected_by_age_group': total_infected_by_age_group_df,
+        'total_fatal_by_age_group': total_fatal_by_age_group_df,
+        'grouped_by_age_fatal_percentage': grouped_by_age_fatal_percentage_df,
+        'infected_vaccinated_by_age': infected_vaccinated_by_age_df,
+        'hospitalized_vaccinated_by_age': hospitalized_vaccinated_by_age_df,
+        'intensive_care_vaccinated_by_age': intensive_care_vaccinated_by_age_df,
+        'fatal_vaccinated_by_age': fatal_vaccinated_by_age_df,
+        'vaccinated_by_age_fatal_percentage': vaccinated_by_age_fatal_percentage_df,
+        'vaccinated_fatal_percentage': vaccinated_fatal_percentage_df,
+        'unvaccinated_by_age_fatal_percentage': unvaccinated_by_age_fatal_percentage_df
+    }
 
-    generate_external_plots('bg', total_infected_by_age_group_df, total_fatal_by_age_group_df,
-                            grouped_by_age_fatal_percentage_df, infected_vaccinated_by_age_df,
-                            hospitalized_vaccinated_by_age_df, intensive_care_vaccinated_by_age_df,
-                            fatal_vaccinated_by_age_df, vaccinated_by_age_fatal_percentage_df,
-                            vaccinated_fatal_percentage_df, unvaccinated_by_age_fatal_percentage_df)
-
-    generate_external_plots('en', total_infected_by_age_group_df, total_fatal_by_age_group_df,
-                            grouped_by_age_fatal_percentage_df, infected_vaccinated_by_age_df,
-                            hospitalized_vaccinated_by_age_df, intensive_care_vaccinated_by_age_df,
-                            fatal_vaccinated_by_age_df, vaccinated_by_age_fatal_percentage_df,
-                            vaccinated_fatal_percentage_df, unvaccinated_by_age_fatal_percentage_df)
-
-
-def generate_external_plots(locale, total_infected_by_age_group_df, total_fatal_by_age_group_df,
-                            grouped_by_age_fatal_percentage_df, infected_vaccinated_by_age_df,
-                            hospitalized_vaccinated_by_age_df, intensive_care_vaccinated_by_age_df,
-                            fatal_vaccinated_by_age_df, vaccinated_by_age_fatal_percentage_df,
-                            vaccinated_fatal_percentage_df, unvaccinated_by_age_fatal_percentage_df):
-    locales.set_locale(locale)
-
-    # Infected by age group
-    total_infected_by_age_group_plot = plot.generate_grouped_by_age_bar_plot(
-        total_infected_by_age_group_df,
-        y='infected',
-        color='orange',
-        plot_type='total.infected'
-    )
-    plot.export_plot(total_infected_by_age_group_plot, '%s/InfectedByAgeGroup' % locale)
-
-    # Fatal by age group
-    total_fatal_by_age_group_plot = plot.generate_grouped_by_age_bar_plot(
-        total_fatal_by_age_group_df,
-        y='fatal',
-        color='red',
-        plot_type='total.fatal'
-    )
-    plot.export_plot(total_fatal_by_age_group_plot, '%s/FatalByAgeGroup' % locale)
-
-    # Fatal percentage by age group
-    grouped_by_age_group_fatal_percentage_plot = plot.generate_grouped_by_age_bar_plot(
-        grouped_by_age_fatal_percentage_df,
-        y='fatal_percentage',
-        color='red',
-        plot_type='total.fatal_percentage'
-    )
-    plot.export_plot(grouped_by_age_group_fatal_percentage_plot, '%s/FatalPercentageByAgeGroup' % locale)
-
-    # Unvaccinated fatal percentage by age group
-    unvaccinated_by_age_group_fatal_percentage_plot = plot.generate_grouped_by_age_bar_plot(
-        unvaccinated_by_age_fatal_percentage_df,
-        y='fatal_percentage',
-        color='red',
-        plot_type='unvaccinated.fatal_percentage'
-    )
-    plot.export_plot(unvaccinated_by_age_group_fatal_percentage_plot,
-                     '%s/UnvaccinatedFatalPercentageByAgeGroup' % locale)
-
-    # Vaccinated Infected By Age
-    infected_vaccinated_by_age_plot = plot.generate_grouped_by_age_bar_plot(
-        infected_vaccinated_by_age_df,
-        y='infected',
-        color='orange',
-        plot_type='vaccinated.infected')
-    plot.export_plot(infected_vaccinated_by_age_plot, '%s/VaccinatedByAgeInfected' % locale)
-
-    # Vaccinated Hospitalized By Age
-    hospitalized_vaccinated_by_age_plot = plot.generate_grouped_by_age_bar_plot(
-        hospitalized_vaccinated_by_age_df,
-        y='hospitalized',
-        color='pink',
-        plot_type='vaccinated.hospitalized')
-    plot.export_plot(hospitalized_vaccinated_by_age_plot, '%s/VaccinatedByAgeHospitalized' % locale)
-
-    # Vaccinated Intensive Care By Age
-    intensive_care_vaccinated_by_age_plot = plot.generate_grouped_by_age_bar_plot(
-        intensive_care_vaccinated_by_age_df,
-        y='intensive_care',
-        color='purple',
-        plot_type='vaccinated.intensive_care')
-    plot.export_plot(intensive_care_vaccinated_by_age_plot, '%s/VaccinatedByAgeIntensiveCare' % locale)
-
-    # Vaccinated Fatal By Age
-    fatal_vaccinated_by_age_plot = plot.generate_grouped_by_age_bar_plot(
-        fatal_vaccinated_by_age_df,
-        y='fatal',
-        color='red',
-        plot_type='vaccinated.fatal')
-    plot.export_plot(fatal_vaccinated_by_age_plot, '%s/VaccinatedByAgeFatal' % locale)
-
-    # Vaccinated Fatal Percentage By Age
-    vaccinated_by_age_fatal_percentage_plot = plot.generate_grouped_by_age_bar_plot(
-        vaccinated_by_age_fatal_percentage_df,
-        y='fatal_percentage',
-        color='red',
-        plot_type='vaccinated.fatal_percentage')
-    plot.export_plot(vaccinated_by_age_fatal_percentage_plot, '%s/VaccinatedByAgeFatalPercentage' % locale)
-
-    # Monthly Vaccinated Fatal Percentage Plot
-    vaccinated_fatal_percentage_plot = plot.generate_vaccinated_fatal_percentage_plot(vaccinated_fatal_percentage_df)
-    plot.export_plot(vaccinated_fatal_percentage_plot, '%s/VaccinatedFatalPercentage' % locale)
+    return render.render_plots(LOCALES, manifest.select(manifest.EXTERNAL_PLOTS, names), external_datasets, processes,
+                               incremental, formats or plot.DEFAULT_FORMATS)
+
+
+def generate_external_plots(locale, external_datasets, names=None):
+    from covidstats import manifest, render
+
+    return render.render_plots([locale], manifest.select(manifest.EXTERNAL_PLOTS, names), external_datasets)
@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from covidstats import profiler
+
+settings = {
+    'directory': os.environ.get('COVIDSTATS_CACHE_DIR'),
+    'ttl': 0,
+    'max_size': 256 * 1024 * 1024,
+    'timeout': 30,
+    'retries': 2
+}
+
+# Serializes the writes of cache entries with the eviction of others, as datasets are fetched by a pool of threads.
+_lock = threading.Lock()
+
+
+def setup_cache(directory=None, ttl=0, max_size=256 * 1024 * 1024, timeout=30, retries=2):
+    settings['directory'] = directory
+    settings['ttl'] = ttl
+    settings['max_size'] = max_size
+    settings['timeout'] = timeout
+    settings['retries'] = retries
+
+
+def fetch(url, headers=None):
+    if settings['directory'] is None:
+        return request(url, headers)[0]
+
+    directory = pathlib.Path(settings['directory'])
+    directory.mkdir(parents=True, exist_ok=True)
+
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    data_path = directory.joinpath(key + '.data')
+    meta_path = directory.joinpath(key + '.json')
+    meta = read_meta(meta_path) if data_path.exists() else None
+
+    if meta is not None and time.time() - meta['checked_at'] < settings['ttl']:
+        payload = touch_entry(data_path, meta_path, meta)
+        if payload is not None:
+            return payload
+
+    request_headers = dict(headers or {})
+    if meta is not None:
+        if meta.get('etag'):
+            request_headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            request_headers['If-Modified-Since'] = meta['last_modified']
+
+    payload, response_headers = request(url, request_headers)
+
+    if payload is None and meta is not None:
+        meta['checked_at'] = time.time()
+        payload = touch_entry(data_path, meta_path, meta)
+        if payload is not None:
+            return payload
+
+    if payload is None:
+        # Not modified, but with no entry to reuse, e.g. one evicted meanwhile, so the payload is fetched again.
+        payload, response_headers = request(url, headers)
+        if payload is None:
+            raise OSError('%s is not modified, but is not cached either' % url)
+
+    with _lock:
+        write_atomic(data_path, payload)
+        write_atomic(meta_path, json.dumps({
+            'url': url,
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'checked_at': time.time(),
+            'used_at': time.time(),
+            'size': len(payload)
+        }).encode('utf-8'))
+
+        evict(directory, keep=key)
+
+    return payload
+
+
+def request(url, headers=None):
+    # Returns the payload and the response headers, or no payload when the server answers 304 Not Modified.
+    # Every source gets its own timeout and is retried with a backoff on connection errors and server errors.
+    http_request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip', **(headers or {})})
+
+    for attempt in range(settings['retries'] + 1):
+        try:
+            with urllib.request.urlopen(http_request, timeout=settings['timeout']) as response:
+                payload = response.read()
+                if response.headers.get('Content-Encoding') == 'gzip':
+                    payload = gzip.decompress(payload)
+
+                return payload, response.headers
+        except urllib.error.HTTPError as error:
+            if error.code == 304:
+                return None, error.headers
+            if error.code < 500 or attempt == settings['retries']:
+                raise
+        except (urllib.error.URLError, socket.timeout):
+            if attempt == settings['retries']:
+                raise
+
+        time.sleep(0.5 * 2 ** attempt)
+
+
+def read_meta(meta_path):
+    try:
+        meta = json.loads(meta_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+    return meta if isinstance(meta, dict) and {'checked_at', 'used_at', 'size'} <= meta.keys() else None
+
+
+def touch_entry(data_path, meta_path, meta):
+    # Returns the cached payload, or nothing when the entry has been evicted since its metadata was read.
+    with _lock:
+        try:
+            payload = data_path.read_bytes()
+        except OSError:
+            return None
+
+        meta['used_at'] = time.time()
+        write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+    return payload
+
+
+def touch(path):
+    # Marks a file kept in the cache directory by another module, e.g. an Rt estimate, as used for the eviction.
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def write_atomic(path, content):
+    temporary_path = path.with_name('%s.%d.%d.tmp' % (path.name, os.getpid(), threading.get_ident()))
+    temporary_path.write_bytes(content)
+    os.replace(temporary_path, path)
+    profiler.add_bytes_written(len(content))
+
+
+def evict(directory, keep=None):
+    # Everything in the cache directory counts towards its maximum size. Downloaded datasets are ordered by their last
+    # use and the other files, the Rt estimates and the dataset store, by their modification time, which touch renews.
+    entries = []
+    for path in directory.rglob('*'):
+        try:
+            if path.suffix == '.json' and path.parent == directory:
+                meta = read_meta(path)
+                if meta is not None:
+                    entries.append((meta['used_at'], meta['size'], path.stem, [path.with_suffix('.data'), path]))
+            elif path.suffix not in ('.data', '.tmp') and path.is_file():
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, None, [path]))
+        except OSError:
+            continue
+
+    total_size = sum(size for _, size, _, _ in entries)
+
+    for _, size, key, paths in sorted(entries, key=lambda entry: entry[0]):
+        if total_size <= settings['max_size']:
+            break
+        if key == keep:
+            continue
+
+        for path in paths:
+            path.unlink(missing_ok=True)
+        total_size -= size
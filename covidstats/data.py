@@ -1,57 +1,160 @@
 import pandas as pd
+import numpy as np
 import datetime as dt
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from covidstats import helpers
+from covidstats import cache, fingerprints, helpers, profiler, snapshot, store
 
+COVID_DATABASE_URL = 'https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/Bulgaria/'
+DATA_EGOV_BG_URL = 'https://data.egov.bg/resource/download/'
+DATA_EGOV_BG_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.'
+                  '36 (KHTML, like Gecko) Chrome/95.0.4638.69 Safari/537.36'
+}
 
-def get_week_cases_df():
-    week_cases_df = pd.read_csv(
-        'https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/Bulgaria/WeekCasesDataset.csv')
-    week_cases_df['date'] = week_cases_df.apply(
-        lambda row: pd.to_datetime(dt.date.fromisocalendar(row.year, row.week, 7)), axis=1)
+
+DATE_CASES_COLUMNS = ['infected', 'cured', 'fatal', 'hospitalized', 'intensive_care', 'medical_staff', 'pcr_tests',
+                      'positive_pcr_tests', 'antigen_tests', 'positive_antigen_tests', 'vaccinated']
+
+# Raw source of every dataset that is downloaded rather than derived.
+DATASET_SOURCES = {
+    'week_cases': COVID_DATABASE_URL + 'WeekCasesDataset.csv',
+    'week_places_cases': COVID_DATABASE_URL + 'WeekPlacesCasesDataset.csv',
+    'active_cases': COVID_DATABASE_URL + 'DateActiveCasesDataset.json',
+    'date_cases': COVID_DATABASE_URL + 'DateCasesDataset.json',
+    'date_cases_age': COVID_DATABASE_URL + 'CasesAgeDataset.csv',
+    'date_diff_cases': COVID_DATABASE_URL + 'DateDiffCasesDataset.json',
+    'date_positive_tests': COVID_DATABASE_URL + 'DatePositiveTestsDataset.csv',
+    'rolling_biweekly_places_cases': COVID_DATABASE_URL + 'RollingBiWeeklyPlacesCasesDataset.csv',
+    'infected_by_age_group': DATA_EGOV_BG_URL + '8f62cfcf-a979-46d4-8317-4e1ab9cbd6a8/csv',
+    'fatal_by_age_group': DATA_EGOV_BG_URL + '18851aca-4c9d-410d-8211-0b725a70bcfd/csv',
+    'infected_vaccinated': DATA_EGOV_BG_URL + 'e9f795a8-0146-4cf0-9bd1-c0ba3d9aa124/csv',
+    'hospitalized_vaccinated': DATA_EGOV_BG_URL + '6fb4bfb1-f586-45af-8dd2-3385499c3664/csv',
+    'intensive_care_vaccinated': DATA_EGOV_BG_URL + '218d49de-88a8-472a-9bb2-b2a373bd7ab4/csv',
+    'fatal_vaccinated': DATA_EGOV_BG_URL + 'e6a72183-28e0-486a-b4e4-b5db8b60a900/csv'
+}
+
+# Number of simulated paths behind the forecast medians and their 90% bands.
+FORECAST_PATHS = 2000
+
+settings = {
+    'processes': None
+}
+
+# Forecast cases of every scenario and the Rt it is simulated with.
+FORECAST_SCENARIOS = [('predicted_cases', 'predicted_rt'), ('increase_cases', 'increase_rt'),
+                      ('decline_cases', 'decline_rt')]
+
+
+def setup_data(processes=None):
+    # Number of processes estimating Rt for all places, one per CPU when not given.
+    settings['processes'] = processes
+
+
+def get_source_file_name(name):
+    # Sources from the covid-database keep their file names, so a checkout of it can be used as a snapshot.
+    url = DATASET_SOURCES[name]
+
+    return url[len(COVID_DATABASE_URL):] if url.startswith(COVID_DATABASE_URL) else name + '.csv'
+
+
+@profiler.profiled
+def fetch_dataset_source(name):
+    if snapshot.settings['path'] is not None:
+        return io.BytesIO(snapshot.read(get_source_file_name(name)))
+
+    url = DATASET_SOURCES[name]
+    headers = DATA_EGOV_BG_HEADERS if url.startswith(DATA_EGOV_BG_URL) else None
+
+    return io.BytesIO(cache.fetch(url, headers=headers))
+
+
+def read_dataset_source(name, source=None):
+    # Loaders parse the source they are given, e.g. one already fetched to be hashed, and fetch it otherwise.
+    return fetch_dataset_source(name) if source is None else source
+
+
+def capture_snapshot(path, max_workers=8):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(fetch_dataset_source, name) for name in DATASET_SOURCES}
+
+        snapshot.write(path, {get_source_file_name(name): (DATASET_SOURCES[name], future.result().getvalue())
+                              for name, future in futures.items()})
+
+
+def unpack_json_column(column):
+    # Numeric cells are already typed by read_json. Cells wrapping a single value in a list or an object are
+    # unpacked in one pass instead of building a Series per row.
+    if column.dtype != object:
+        return column
+
+    values = [next(iter(cell.values()), None) if isinstance(cell, dict)
+              else (cell[0] if cell else None) if isinstance(cell, list)
+              else cell for cell in column]
+
+    return pd.Series(values, index=column.index, name=column.name)
+
+
+def build_iso_week_end_dates(years, weeks):
+    # Sunday of each ISO week, computed column-wise. The 4th of January always falls in the first ISO week.
+    january_4th = pd.to_datetime(pd.DataFrame({'year': years, 'month': 1, 'day': 4}))
+    first_week_monday = january_4th - pd.to_timedelta(january_4th.dt.weekday, unit='D')
+
+    return first_week_monday + pd.to_timedelta((weeks - 1) * 7 + 6, unit='D')
+
+
+@profiler.profiled
+def get_week_cases_df(source=None):
+    week_cases_df = pd.read_csv(read_dataset_source('week_cases', source))
+    week_cases_df['date'] = build_iso_week_end_dates(week_cases_df['year'], week_cases_df['week'])
 
     return week_cases_df
 
 
-def get_week_places_cases_df():
-    week_places_cases_df = pd.read_csv(
-        'https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/Bulgaria/WeekPlacesCasesDataset.csv')
-    week_places_cases_df['date'] = week_places_cases_df.apply(
-        lambda row: dt.date.fromisocalendar(row.year, row.week, 7), axis=1)
+@profiler.profiled
+def get_week_places_cases_df(source=None):
+    week_places_cases_df = pd.read_csv(read_dataset_source('week_places_cases', source))
+    week_places_cases_df['date'] = build_iso_week_end_dates(week_places_cases_df['year'],
+                                                            week_places_cases_df['week']).dt.date
 
     return week_places_cases_df
 
 
-def get_active_cases_df():
-    active_cases_dataset = pd.read_json(
-        'https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/Bulgaria/DateActiveCasesDataset.json'
-    )
-    active_cases_dataset['active'] = active_cases_dataset['active'].apply(pd.Series)
+@profiler.profiled
+def get_active_cases_df(source=None):
+    active_cases_dataset = pd.read_json(read_dataset_source('active_cases', source))
+    active_cases_dataset['active'] = unpack_json_column(active_cases_dataset['active'])
 
     return active_cases_dataset
 
 
-def get_date_cases_df():
-    date_cases_dataset = pd.read_json(
-        'https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/Bulgaria/DateCasesDataset.json')
+@profiler.profiled
+def get_date_cases_df(source=None):
+    date_cases_dataset = pd.read_json(read_dataset_source('date_cases', source))
 
-    for column in ['infected', 'cured', 'fatal', 'hospitalized', 'intensive_care', 'medical_staff', 'pcr_tests',
-                   'positive_pcr_tests', 'antigen_tests', 'positive_antigen_tests', 'vaccinated']:
-        date_cases_dataset[column] = date_cases_dataset[column].apply(pd.Series)
+    for column in DATE_CASES_COLUMNS:
+        date_cases_dataset[column] = unpack_json_column(date_cases_dataset[column])
 
     date_cases_dataset['date'] = date_cases_dataset.index
 
     return date_cases_dataset
 
 
-def get_date_cases_age_df():
-    date_cases_age_df = pd.read_csv('https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/'
-                                    'Bulgaria/CasesAgeDataset.csv', parse_dates=['date'])
+@profiler.profiled
+def get_date_cases_age_df(source=None):
+    date_cases_age_df = pd.read_csv(read_dataset_source('date_cases_age', source), parse_dates=['date'])
 
     return date_cases_age_df
 
 
-def build_date_diff_cases_age_df(df=get_date_cases_age_df()):
+@profiler.profiled
+def build_date_diff_cases_age_df(df=None):
+    if df is None:
+        df = get_dataset('date_cases_age')
+
     date_diff_cases_age_df = pd.DataFrame({'date': df['date']})
     for column in ['group_0_19', 'group_20_29', 'group_30_39', 'group_40_49', 'group_50_59', 'group_60_69',
                    'group_70_79', 'group_80_89', 'group_90']:
@@ -60,55 +163,51 @@ def build_date_diff_cases_age_df(df=get_date_cases_age_df()):
     return date_diff_cases_age_df.dropna()
 
 
-def get_date_diff_cases_df():
-    date_diff_cases_dataset = pd.read_json(
-        'https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/Bulgaria/DateDiffCasesDataset.json')
+@profiler.profiled
+def get_date_diff_cases_df(source=None):
+    date_diff_cases_dataset = pd.read_json(read_dataset_source('date_diff_cases', source))
 
-    for column in ['infected', 'cured', 'fatal', 'hospitalized', 'intensive_care', 'medical_staff', 'pcr_tests',
-                   'positive_pcr_tests', 'antigen_tests', 'positive_antigen_tests', 'vaccinated']:
-        date_diff_cases_dataset[column] = date_diff_cases_dataset[column].apply(pd.Series)
+    for column in DATE_CASES_COLUMNS:
+        date_diff_cases_dataset[column] = unpack_json_column(date_diff_cases_dataset[column])
 
     date_diff_cases_dataset['date'] = date_diff_cases_dataset.index
 
     return date_diff_cases_dataset
 
 
-def get_date_positive_tests_df():
-    date_positive_tests_df = pd.read_csv('https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/master/'
-                                         'Bulgaria/DatePositiveTestsDataset.csv', parse_dates=['date'])
+@profiler.profiled
+def get_date_positive_tests_df(source=None):
+    date_positive_tests_df = pd.read_csv(read_dataset_source('date_positive_tests', source),
+                                         parse_dates=['date'])
 
     return date_positive_tests_df
 
 
-def get_rolling_biweekly_places_cases_df():
-    rolling_biweekly_places_cases_df = pd.read_csv('https://raw.githubusercontent.com/COVID-19-Bulgaria/covid-database/'
-                                                   'master/Bulgaria/RollingBiWeeklyPlacesCasesDataset.csv',
-                                                   parse_dates=['date'])
+@profiler.profiled
+def get_rolling_biweekly_places_cases_df(source=None):
+    rolling_biweekly_places_cases_df = pd.read_csv(
+        read_dataset_source('rolling_biweekly_places_cases', source), parse_dates=['date'])
 
     return rolling_biweekly_places_cases_df
 
 
-def get_data_egov_bg_df(resource):
-    df = pd.read_csv(resource,
-                     storage_options={
-                         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.'
-                                       '36 (KHTML, like Gecko) Chrome/95.0.4638.69 Safari/537.36'},
-                     parse_dates=['Дата'], cache_dates=True, encoding='utf-8')
+def get_data_egov_bg_df(name, source=None):
+    df = pd.read_csv(read_dataset_source(name, source), parse_dates=['Дата'], cache_dates=True, encoding='utf-8')
 
     return df
 
 
-def get_infected_by_age_group_df():
-    infected_by_age_group_df = get_data_egov_bg_df('https://data.egov.bg/resource/download/'
-                                                   '8f62cfcf-a979-46d4-8317-4e1ab9cbd6a8/csv')
+@profiler.profiled
+def get_infected_by_age_group_df(source=None):
+    infected_by_age_group_df = get_data_egov_bg_df('infected_by_age_group', source)
     infected_by_age_group_df.rename(columns={'Дата': 'date'}, inplace=True)
 
     return infected_by_age_group_df
 
 
-def get_fatal_by_age_group_df():
-    fatal_by_age_group_df = get_data_egov_bg_df('https://data.egov.bg/resource/download/'
-                                                '18851aca-4c9d-410d-8211-0b725a70bcfd/csv')
+@profiler.profiled
+def get_fatal_by_age_group_df(source=None):
+    fatal_by_age_group_df = get_data_egov_bg_df('fatal_by_age_group', source)
     rename_age_df_columns(fatal_by_age_group_df, 'Брой починали', 'fatal')
 
     return fatal_by_age_group_df
@@ -123,6 +222,7 @@ def rename_age_df_columns(df, column_bg, column_en):
     }, inplace=True)
 
 
+@profiler.profiled
 def build_total_infected_by_age_group_df(df):
     total_infected_by_age_group_df = df[df['date'] == df['date'].max()].drop(['date', '0 - 19'], axis=1)
     total_infected_by_age_group_df = total_infected_by_age_group_df.melt(var_name='age', value_name='infected')
@@ -155,38 +255,39 @@ def rename_vaccinated_df_columns(df, column_bg, column_en):
     }, inplace=True)
 
 
-def get_infected_vaccinated_df():
-    infected_vaccinated_df = get_data_egov_bg_df('https://data.egov.bg/resource/download/'
-                                                 'e9f795a8-0146-4cf0-9bd1-c0ba3d9aa124/csv')
+@profiler.profiled
+def get_infected_vaccinated_df(source=None):
+    infected_vaccinated_df = get_data_egov_bg_df('infected_vaccinated', source)
     rename_vaccinated_df_columns(infected_vaccinated_df, 'Брой заразени', 'infected')
 
     return infected_vaccinated_df
 
 
-def get_hospitalized_vaccinated_df():
-    hospitalized_vaccinated_df = get_data_egov_bg_df('https://data.egov.bg/resource/download/'
-                                                     '6fb4bfb1-f586-45af-8dd2-3385499c3664/csv')
+@profiler.profiled
+def get_hospitalized_vaccinated_df(source=None):
+    hospitalized_vaccinated_df = get_data_egov_bg_df('hospitalized_vaccinated', source)
     rename_vaccinated_df_columns(hospitalized_vaccinated_df, 'Брой хоспитализирани', 'hospitalized')
 
     return hospitalized_vaccinated_df
 
 
-def get_intensive_care_vaccinated_df():
-    intensive_care_vaccinated_df = get_data_egov_bg_df('https://data.egov.bg/resource/download/'
-                                                       '218d49de-88a8-472a-9bb2-b2a373bd7ab4/csv')
+@profiler.profiled
+def get_intensive_care_vaccinated_df(source=None):
+    intensive_care_vaccinated_df = get_data_egov_bg_df('intensive_care_vaccinated', source)
     rename_vaccinated_df_columns(intensive_care_vaccinated_df, 'Брой в интензивно отделение', 'intensive_care')
 
     return intensive_care_vaccinated_df
 
 
-def get_fatal_vaccinated_df():
-    fatal_vaccinated_df = get_data_egov_bg_df('https://data.egov.bg/resource/download/'
-                                              'e6a72183-28e0-486a-b4e4-b5db8b60a900/csv')
+@profiler.profiled
+def get_fatal_vaccinated_df(source=None):
+    fatal_vaccinated_df = get_data_egov_bg_df('fatal_vaccinated', source)
     rename_vaccinated_df_columns(fatal_vaccinated_df, 'Брой починали', 'fatal')
 
     return fatal_vaccinated_df
 
 
+@profiler.profiled
 def build_grouped_by_age_df(df, filter_column):
     grouped_by_age_df = df[df[filter_column] != '-'].groupby('age').sum()
     grouped_by_age_df.reset_index(inplace=True)
@@ -194,6 +295,7 @@ def build_grouped_by_age_df(df, filter_column):
     return grouped_by_age_df
 
 
+@profiler.profiled
 def build_grouped_by_age_fatal_percentage_df(infected_by_age_df, fatal_by_age_df):
     grouped_by_age_fatal_percentage_df = pd.merge(infected_by_age_df, fatal_by_age_df, on='age', how='outer')
     grouped_by_age_fatal_percentage_df['fatal'] = grouped_by_age_fatal_percentage_df['fatal'].fillna(0)
@@ -204,6 +306,7 @@ def build_grouped_by_age_fatal_percentage_df(infected_by_age_df, fatal_by_age_df
     return grouped_by_age_fatal_percentage_df
 
 
+@profiler.profiled
 def build_date_vaccinated_fatal_df(fatal_vaccinated_df):
     date_vaccinated_fatal_df = fatal_vaccinated_df[fatal_vaccinated_df.vaccine != '-'].groupby(
         pd.Grouper(key='date', freq='D')).sum()
@@ -214,6 +317,7 @@ def build_date_vaccinated_fatal_df(fatal_vaccinated_df):
     return date_vaccinated_fatal_df
 
 
+@profiler.profiled
 def build_vaccinated_fatal_percentage_df(date_vaccinated_fatal_df, date_diff_cases_df):
     vaccinated_fatal_percentage_df = pd.merge(date_vaccinated_fatal_df, date_diff_cases_df[['fatal', 'date']],
                                               on='date',
@@ -230,6 +334,7 @@ def build_vaccinated_fatal_percentage_df(date_vaccinated_fatal_df, date_diff_cas
     return vaccinated_fatal_percentage_df
 
 
+@profiler.profiled
 def build_rts_df(predicted_rts, start_date):
     df_index = pd.date_range(start_date, periods=len(predicted_rts), freq='D')
 
@@ -245,23 +350,63 @@ def build_rts_df(predicted_rts, start_date):
     return df
 
 
-def build_predicted_cases_df(reported_cases, rts_df, start_date):
+@profiler.profiled
+def build_predicted_cases_df(reported_cases, rts_df, start_date, paths=None, quantiles=(0.05, 0.95), seed=None):
     df_index = pd.date_range(start_date, periods=len(rts_df), freq='D')
 
-    df = pd.DataFrame({
-        'predicted_cases': helpers.predict_cases(reported_cases, rts_df['predicted_rt']),
-        'increase_cases': helpers.predict_cases(reported_cases, rts_df['increase_rt']),
-        'decline_cases': helpers.predict_cases(reported_cases, rts_df['decline_rt'])
-    }, index=df_index)
+    if paths is None:
+        df = pd.DataFrame({
+            'predicted_cases': helpers.predict_cases(reported_cases, rts_df['predicted_rt']),
+            'increase_cases': helpers.predict_cases(reported_cases, rts_df['increase_rt']),
+            'decline_cases': helpers.predict_cases(reported_cases, rts_df['decline_rt'])
+        }, index=df_index)
+
+        return df
+
+    return summarize_simulated_cases(simulate_predicted_cases(reported_cases, rts_df, start_date, paths, seed),
+                                     quantiles)
+
+
+@profiler.profiled
+def simulate_predicted_cases(reported_cases, rts_df, start_date, paths, seed=None):
+    # Daily cases of every scenario's simulated paths, one column per path.
+    rng = np.random.default_rng(seed)
+    df_index = pd.date_range(start_date, periods=len(rts_df), freq='D')
+
+    return {cases_column: pd.DataFrame(helpers.simulate_cases(reported_cases, rts_df[rt_column], paths, rng=rng).T,
+                                       index=df_index)
+            for cases_column, rt_column in FORECAST_SCENARIOS}
+
+
+def summarize_simulated_cases(simulated_cases, quantiles=(0.05, 0.95)):
+    # Ensemble mode: every scenario is the median of the simulated paths, with its quantile bands alongside.
+    df = pd.DataFrame(index=next(iter(simulated_cases.values())).index)
+
+    for cases_column, paths_df in simulated_cases.items():
+        df[cases_column] = np.median(paths_df.values, axis=1)
+        for quantile in quantiles:
+            df['%s_Q%s' % (cases_column, quantile)] = np.quantile(paths_df.values, quantile, axis=1)
 
     return df
 
 
-def build_weekly_predicted_cases_df(week_cases_df, predicted_cases_df, start_date):
-    df = predicted_cases_df.groupby(pd.Grouper(freq='W')).mean()
-    df['predicted_cases'] = df['predicted_cases'].multiply(7)
-    df['increase_cases'] = df['increase_cases'].multiply(7)
-    df['decline_cases'] = df['decline_cases'].multiply(7)
+def get_weekly_cases(df):
+    # Partial weeks at either end of the forecast are scaled to full ones.
+    return df.groupby(pd.Grouper(freq='W')).mean().multiply(7)
+
+
+@profiler.profiled
+def build_weekly_predicted_cases_df(week_cases_df, predicted_cases, start_date, quantiles=(0.05, 0.95)):
+    # Takes the daily forecast, or the simulated paths of an ensemble forecast. The weekly bands of an ensemble are
+    # quantiles of the paths' weekly totals, which the daily quantiles summed up would understate.
+    if isinstance(predicted_cases, dict):
+        df = summarize_simulated_cases({cases_column: get_weekly_cases(paths_df)
+                                        for cases_column, paths_df in predicted_cases.items()}, quantiles)
+    else:
+        df = get_weekly_cases(predicted_cases)
+
+    # The observed week the forecast starts from only connects the scenario lines, it has no bands.
+    scenario_columns = [cases_column for cases_column, _ in FORECAST_SCENARIOS if cases_column in df]
 
     start_date_weekday = start_date.weekday()
     start_of_week_date = start_date - dt.timedelta(days=start_date_weekday)
@@ -271,7 +416,7 @@ def build_weekly_predicted_cases_df(week_cases_df, predicted_cases_df, start_dat
         if week_cases_df.loc[week_cases_df['date'] == end_of_week_date].empty:
             current_cases = week_cases_df[week_cases_df['date'] <= end_of_week_date].iloc[-1]['infected']
             previous_week_date = end_of_week_date - dt.timedelta(weeks=1)
-            df.loc[previous_week_date] = [current_cases, current_cases, current_cases]
+            df.loc[previous_week_date, scenario_columns] = current_cases
             df.sort_index(inplace=True)
         else:
             current_cases = week_cases_df[week_cases_df['date'] == end_of_week_date].iloc[-1]['infected']
@@ -279,14 +424,68 @@ def build_weekly_predicted_cases_df(week_cases_df, predicted_cases_df, start_dat
 
             week_cases_df.loc[week_cases_df['date'] == end_of_week_date, ['infected']] = average_week_cases
 
-            df.loc[df.index == end_of_week_date, ['predicted_cases']] = average_week_cases
-            df.loc[df.index == end_of_week_date, ['increase_cases']] = average_week_cases
-            df.loc[df.index == end_of_week_date, ['decline_cases']] = average_week_cases
+            df.loc[df.index == end_of_week_date] = np.nan
+            df.loc[df.index == end_of_week_date, scenario_columns] = average_week_cases
 
     return df
 
 
-def build_weekly_positive_tests_df(date_positive_tests_df=get_date_positive_tests_df()):
+@profiler.profiled
+def build_forecast(week_cases_df=None, date_diff_cases_df=None, start_date=None, paths=FORECAST_PATHS):
+    # The forecast is computed once and drawn for every locale. Its Rt estimate and simulation are seeded from the
+    # reported cases, so the same data gives the same forecast.
+    if week_cases_df is None:
+        week_cases_df = get_dataset('week_cases')
+    if date_diff_cases_df is None:
+        date_diff_cases_df = get_dataset('date_diff_cases')
+    if start_date is None:
+        start_date = date_diff_cases_df.index.max() + dt.timedelta(days=1)
+
+    # The current week's cases are adjusted to a full week, so the forecast works on a copy.
+    week_cases_df = week_cases_df.copy()
+    rt_df = helpers.estimate_rt(date_diff_cases_df['infected'])
+
+    previous_day = pd.to_datetime(start_date - dt.timedelta(days=1))
+    start_datetime = pd.to_datetime(start_date)
+
+    reported_cases = rt_df[rt_df.index < start_datetime]['cases']
+    predicted_rts = helpers.predict_rt(rt_df, rt_df.index.get_loc(previous_day), 14)
+    predicted_rts_df = build_rts_df(predicted_rts, start_datetime)
+    if paths is None:
+        predicted_cases = build_predicted_cases_df(reported_cases, predicted_rts_df, start_datetime)
+    else:
+        predicted_cases = simulate_predicted_cases(reported_cases, predicted_rts_df, start_datetime, paths,
+                                                   seed=pd.util.hash_pandas_object(reported_cases).values)
+    weekly_predicted_cases_df = build_weekly_predicted_cases_df(week_cases_df, predicted_cases, start_datetime)
+
+    return {
+        'week_cases': week_cases_df,
+        'weekly_predicted_cases': weekly_predicted_cases_df,
+        'rt': rt_df,
+        'predicted_rt': predicted_rts_df
+    }
+
+
+@profiler.profiled
+def build_daily_places_cases_df(week_places_cases_df=None):
+    # Places only have weekly cases, so each week is spread evenly over its seven days.
+    if week_places_cases_df is None:
+        week_places_cases_df = get_dataset('week_places_cases')
+
+    daily_places_cases_df = week_places_cases_df.loc[week_places_cases_df.index.repeat(7),
+                                                     ['place', 'date', 'infected']].reset_index(drop=True)
+    daily_places_cases_df['date'] = pd.to_datetime(daily_places_cases_df['date']) - pd.to_timedelta(
+        np.tile(np.arange(6, -1, -1), len(week_places_cases_df)), unit='D')
+    daily_places_cases_df['infected'] = daily_places_cases_df['infected'] / 7
+
+    return daily_places_cases_df.sort_values(['place', 'date'], ignore_index=True)
+
+
+@profiler.profiled
+def build_weekly_positive_tests_df(date_positive_tests_df=None):
+    if date_positive_tests_df is None:
+        date_positive_tests_df = get_dataset('date_positive_tests')
+
     weekly_positive_tests_df = date_positive_tests_df.groupby(pd.Grouper(key='date', freq='W')).agg({
         'pcr_tests': 'sum',
         'antigen_tests': 'sum',
@@ -304,3 +503,94 @@ def build_weekly_positive_tests_df(date_positive_tests_df=get_date_positive_test
                                                        + weekly_positive_tests_df['positive_antigen_tests']
 
     return weekly_positive_tests_df
+
+
+@profiler.profiled
+def build_weekly_antigen_positive_tests_df(weekly_positive_tests_df):
+    return weekly_positive_tests_df[weekly_positive_tests_df.antigen_positive_percentage.notnull()]
+
+
+DATASETS = {
+    'week_cases': get_week_cases_df,
+    'week_places_cases': get_week_places_cases_df,
+    'active_cases': get_active_cases_df,
+    'date_cases': get_date_cases_df,
+    'date_diff_cases': get_date_diff_cases_df,
+    'date_cases_age': get_date_cases_age_df,
+    'date_diff_cases_age': lambda: build_date_diff_cases_age_df(get_dataset('date_cases_age')),
+    'date_positive_tests': get_date_positive_tests_df,
+    'weekly_positive_tests': lambda: build_weekly_positive_tests_df(get_dataset('date_positive_tests')),
+    'weekly_antigen_positive_tests': lambda: build_weekly_antigen_positive_tests_df(
+        get_dataset('weekly_positive_tests')),
+    'rolling_biweekly_places_cases': get_rolling_biweekly_places_cases_df,
+    'forecast': build_forecast,
+    'places_rt': lambda: helpers.estimate_places_rt(build_daily_places_cases_df(get_dataset('week_places_cases')),
+                                                    settings['processes']),
+    'infected_by_age_group': get_infected_by_age_group_df,
+    'fatal_by_age_group': get_fatal_by_age_group_df,
+    'infected_vaccinated': get_infected_vaccinated_df,
+    'hospitalized_vaccinated': get_hospitalized_vaccinated_df,
+    'intensive_care_vaccinated': get_intensive_care_vaccinated_df,
+    'fatal_vaccinated': get_fatal_vaccinated_df
+}
+
+# The datasets each derived dataset is built from. Derived datasets are fingerprinted by them, so an incremental run
+# computes the forecast or the places Rt only when a plot drawing it is rendered.
+DERIVED_DATASETS = {
+    'date_diff_cases_age': ['date_cases_age'],
+    'weekly_positive_tests': ['date_positive_tests'],
+    'weekly_antigen_positive_tests': ['weekly_positive_tests'],
+    'forecast': ['week_cases', 'date_diff_cases'],
+    'places_rt': ['week_places_cases']
+}
+
+_loaded_datasets = {}
+_dataset_locks = {}
+_dataset_locks_lock = threading.Lock()
+
+
+def get_dataset(name):
+    # Datasets are loaded on first access and shared by every caller afterwards.
+    with _dataset_locks_lock:
+        lock = _dataset_locks.setdefault(name, threading.Lock())
+
+    with lock:
+        if name not in _loaded_datasets:
+            _loaded_datasets[name] = load_dataset(name)
+
+    return _loaded_datasets[name]
+
+
+def load_dataset(name):
+    # Downloaded datasets are kept in the columnar store, keyed by the hash of the payload they were parsed from.
+    if name not in DATASET_SOURCES or not store.is_available():
+        return DATASETS[name]()
+
+    # The source is fetched once, to be hashed and, when the store has no frame parsed from it, to be parsed.
+    source = fetch_dataset_source(name)
+    payload_hash = hashlib.sha256(source.getbuffer()).hexdigest()
+
+    return store.load(name, payload_hash, lambda: DATASETS[name](source))
+
+
+def load_datasets(names, max_workers=8):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(get_dataset, name) for name in names}
+
+    return {name: future.result() for name, future in futures.items()}
+
+
+def get_source_datasets(names):
+    return sorted({source for name in names
+                   for source in (get_source_datasets(DERIVED_DATASETS[name]) if name in DERIVED_DATASETS else [name])})
+
+
+def get_dataset_hash(name):
+    if name in DERIVED_DATASETS:
+        return fingerprints.hash_dataset([name, [get_dataset_hash(source) for source in DERIVED_DATASETS[name]]])
+
+    return fingerprints.hash_dataset(get_dataset(name))
+
+
+def clear_datasets():
+    _loaded_datasets.clear()
@@ -0,0 +1,65 @@
+import datetime as dt
+import hashlib
+import json
+import pathlib
+
+import pandas as pd
+
+MANIFEST_FILE_NAME = '.fingerprints.json'
+
+
+def hash_dataset(dataset):
+    digest = hashlib.sha256()
+
+    if isinstance(dataset, pd.DataFrame):
+        digest.update(repr([(str(column), str(dtype)) for column, dtype in dataset.dtypes.items()]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(dataset, index=True).values.tobytes())
+    elif isinstance(dataset, dict):
+        digest.update(repr([(key, hash_dataset(value)) for key, value in sorted(dataset.items())]).encode('utf-8'))
+    else:
+        digest.update(repr(dataset).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def hash_plot(locale, spec, dataset_hashes, generation_date=None, formats=()):
+    # The generation date stands in for the subtitle, which is the date formatted for the locale.
+    generator = spec.generator
+    key = [
+        locale,
+        spec.name,
+        '%s.%s' % (generator.__module__, generator.__qualname__),
+        repr(spec.kwargs),
+        spec.override_figure_size,
+        spec.rasterize,
+        spec.fixed_layout,
+        [list(export_format) for export_format in formats],
+        sorted((argument, dataset_hashes[dataset]) for argument, dataset in spec.inputs.items()),
+        (generation_date or dt.date.today()).isoformat()
+    ]
+
+    return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+def get_manifest_path(locale):
+    return pathlib.Path(locale, MANIFEST_FILE_NAME)
+
+
+def read_manifest(locale):
+    try:
+        return json.loads(get_manifest_path(locale).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def update_manifest(locale, plot_hashes):
+    manifest = read_manifest(locale)
+    manifest.update(plot_hashes)
+
+    get_manifest_path(locale).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def is_unchanged(locale, name, plot_hash, manifest, file_names):
+    # The formats are part of the hash, so all the files exported for them have to be there as well.
+    return manifest.get(name) == plot_hash and all(pathlib.Path(locale, file_name).exists()
+                                                   for file_name in file_names)
@@ -1,18 +1,146 @@
-import epyestim.covid19 as covid19
-import pydlm
 import numpy as np
+import pandas as pd
 import datetime as dt
-
+import functools
+import hashlib
+import multiprocessing
+import pathlib
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from covidstats import cache, profiler
 from covidstats.locales import t
 
+RT_PARAMETERS = {'smoothing_window': 21, 'r_window_size': 7, 'quantiles': (0.05, 0.5, 0.95), 'auto_cutoff': False}
+
+_rt_random_state_lock = threading.Lock()
+
+
+# epyestim and pydlm take most of the startup time and are only imported by the Rt estimation and forecast, which
+# plots like the external ones never reach.
+@functools.lru_cache(maxsize=None)
+def get_si_distribution():
+    import epyestim.covid19 as covid19
+
+    return covid19.generate_standard_si_distribution()
+
+
+@functools.lru_cache(maxsize=None)
+def get_rt_revised_days():
+    # Days at the end of an estimate that appended cases can still revise, as the reporting delay deconvolution, the
+    # smoothing window, the Rt window and the serial interval all reach back from every new day.
+    import epyestim.covid19 as covid19
+
+    return (len(covid19.generate_standard_infection_to_reporting_distribution()) +
+            RT_PARAMETERS['smoothing_window'] + RT_PARAMETERS['r_window_size'] + len(get_si_distribution()))
+
+
+@profiler.profiled
+def estimate_rt(df, incremental=True):
+    # With a cache directory the estimate is kept on disk next to the cached datasets. An unchanged series reuses it
+    # and a series with appended days only recomputes the days those can revise.
+    if cache.settings['directory'] is None:
+        return compute_rt(df)
+
+    series_hash = get_series_hash(df)
+    entry_path = get_rt_entry_path(df)
+    entry = read_rt_entry(entry_path)
+
+    if entry is not None and entry['hash'] == series_hash:
+        cache.touch(entry_path)
+        return entry['rt']
+
+    if incremental and entry is not None and is_rt_extension(entry['cases'], df):
+        rt_df = update_rt(entry['cases'], entry['rt'], df)
+    else:
+        rt_df = compute_rt(df)
+
+    entry_path.parent.mkdir(parents=True, exist_ok=True)
+    cache.write_atomic(entry_path, pickle.dumps({'hash': series_hash, 'cases': df, 'rt': rt_df}))
+
+    return rt_df
+
+
+@profiler.profiled
+def estimate_places_rt(df, processes=None):
+    # Takes daily cases in long format (place, date, infected) and estimates every place in a process of its own.
+    # Returns one row per place and date. The workers are spawned rather than forked, as the datasets are loaded by a
+    # pool of threads, and a fork would copy the locks another thread holds, e.g. the one around compute_rt, as held.
+    places_cases = [place_df.set_index('date')['infected'].rename(place) for place, place_df in df.groupby('place')]
+
+    if processes is not None and processes <= 1:
+        rt_dfs = [estimate_rt(place_cases) for place_cases in places_cases]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=cache.setup_cache, initargs=tuple(cache.settings.values())) as executor:
+            rt_dfs = list(executor.map(estimate_rt, places_cases))
+
+    places_rt_df = pd.concat([rt_df.assign(place=place_cases.name)
+                              for place_cases, rt_df in zip(places_cases, rt_dfs)])
+
+    return places_rt_df.rename_axis('date').reset_index()
+
+
+def compute_rt(df):
+    import epyestim.covid19 as covid19
+
+    # epyestim bootstraps the cases with numpy's global random state. It is seeded from the series, so that the same
+    # cases give the same estimate with or without a cache, and restored afterwards.
+    with _rt_random_state_lock:
+        random_state = np.random.get_state()
+        np.random.seed(int(get_series_hash(df)[:8], 16))
 
-def estimate_rt(df):
-    rt_df = covid19.r_covid(df, smoothing_window=21, r_window_size=7, quantiles=(0.05, 0.5, 0.95), auto_cutoff=False)
+        try:
+            rt_df = covid19.r_covid(df, **RT_PARAMETERS)
+        finally:
+            np.random.set_state(random_state)
 
     return rt_df.dropna()
 
 
+def get_series_hash(df):
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+
+
+def update_rt(previous_df, previous_rt_df, df):
+    # The recomputed tail starts as many days before the first revised day, so the kept part is clear of its edge.
+    revised_days = get_rt_revised_days()
+    revised_from = previous_df.index[-revised_days]
+    tail_rt_df = compute_rt(df[df.index >= revised_from - dt.timedelta(days=revised_days)])
+
+    return pd.concat([previous_rt_df[previous_rt_df.index < revised_from],
+                      tail_rt_df[tail_rt_df.index >= revised_from]])
+
+
+def is_rt_extension(previous_df, df):
+    # Days within the revised part of the previous estimate may have been corrected since, as they are recomputed.
+    if len(previous_df) < 3 * get_rt_revised_days() or len(df) <= len(previous_df):
+        return False
+
+    kept_length = len(previous_df) - get_rt_revised_days()
+
+    return df.index[:len(previous_df)].equals(previous_df.index) and \
+        np.array_equal(df.values[:kept_length], previous_df.values[:kept_length])
+
+
+def get_rt_entry_path(df):
+    key = repr([sorted(RT_PARAMETERS.items()), df.name, str(df.index[0])])
+
+    return pathlib.Path(cache.settings['directory'], 'rt-%s.pkl' % hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+
+def read_rt_entry(entry_path):
+    try:
+        return pickle.loads(entry_path.read_bytes())
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+@profiler.profiled
 def predict_rt(df, start_point, number_of_predictions):
+    import pydlm
+
     linear_trend = pydlm.trend(degree=1, discount=0.7, name='linear_trend')
     simple_dlm = pydlm.dlm(df['Q0.5']) + linear_trend
     simple_dlm.fit()
@@ -20,7 +148,10 @@ def predict_rt(df, start_point, number_of_predictions):
     return simple_dlm.predictN(date=start_point, N=number_of_predictions)[0]
 
 
-def draw_from_si(days_ago, si=covid19.generate_standard_si_distribution()):
+def draw_from_si(days_ago, si=None):
+    if si is None:
+        si = get_si_distribution()
+
     days_ago = np.array(days_ago)
     var_length = len(si)
 
@@ -32,19 +163,51 @@ def draw_from_si(days_ago, si=covid19.generate_standard_si_distribution()):
     return draws
 
 
-def predict_cases(reported_cases, predicted_rts):
-    predicted_cases = np.array([])
-    rng = np.random.default_rng()
+@profiler.profiled
+def predict_cases(reported_cases, predicted_rts, si=None, rng=None):
+    # Renewal equation over a preallocated buffer. The cases k days before the predicted day are weighted by
+    # si[k - 2], so only the last len(si) + 1 days contribute and the cost per day does not grow with the history.
+    if si is None:
+        si = get_si_distribution()
+    if rng is None:
+        rng = np.random.default_rng()
+
+    reported_cases = np.asarray(reported_cases, dtype=float)
+    history_length = len(reported_cases)
+    kernel = np.append(np.asarray(si)[::-1], 0)
+
+    cases = np.empty(history_length + len(predicted_rts))
+    cases[:history_length] = reported_cases
+
+    for i, predicted_rt in enumerate(predicted_rts):
+        end = history_length + i
+        start = max(end - len(kernel), 0)
+        cases[end] = rng.poisson(predicted_rt * np.dot(cases[start:end], kernel[len(kernel) - (end - start):]))
+
+    return cases[history_length:]
+
+
+@profiler.profiled
+def simulate_cases(reported_cases, predicted_rts, paths=1000, si=None, rng=None):
+    # Simulates all paths at once as a paths x days array, with the same renewal equation as predict_cases.
+    if si is None:
+        si = get_si_distribution()
+    if rng is None:
+        rng = np.random.default_rng()
+
+    kernel = np.append(np.asarray(si)[::-1], 0)
+    reported_cases = np.asarray(reported_cases, dtype=float)[-len(kernel):]
+    history_length = len(reported_cases)
 
-    for i in range(len(predicted_rts)):
-        previous_cases = np.append(reported_cases, predicted_cases)[::-1]
-        distribution = draw_from_si([*range(len(previous_cases))])
+    cases = np.empty((paths, history_length + len(predicted_rts)))
+    cases[:, :history_length] = reported_cases
 
-        predicted_cases = np.append(predicted_cases,
-                                    rng.poisson(predicted_rts[i] * np.sum(np.multiply(previous_cases, distribution)),
-                                                1)[0])
+    for i, predicted_rt in enumerate(predicted_rts):
+        end = history_length + i
+        start = max(end - len(kernel), 0)
+        cases[:, end] = rng.poisson(predicted_rt * (cases[:, start:end] @ kernel[len(kernel) - (end - start):]))
 
-    return predicted_cases
+    return cases[:, history_length:]
 
 
 def get_generation_date_text():
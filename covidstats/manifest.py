@@ -0,0 +1,155 @@
+import collections
+
+from covidstats import plot
+from covidstats.locales import t
+
+# A plot is rendered by calling its generator with the named input datasets and the static keyword arguments. Dense
+# plots can be exported with rasterized lines, and plots laid out by their generator skip the tight bounding box.
+PlotSpec = collections.namedtuple('PlotSpec', ['name', 'generator', 'inputs', 'kwargs', 'override_figure_size',
+                                               'rasterize', 'fixed_layout'],
+                                  defaults=[{}, True, False, False])
+
+# Translation key resolved when the plot is rendered, in the locale it is rendered for.
+Text = collections.namedtuple('Text', ['key'])
+
+
+def translate(value):
+    if isinstance(value, Text):
+        return t(value.key)
+    if isinstance(value, list):
+        return [translate(item) for item in value]
+    if isinstance(value, dict):
+        return {key: translate(item) for key, item in value.items()}
+
+    return value
+
+
+def select(specs, names=None, optional_specs=()):
+    # Optional plots are only rendered when they are selected by name.
+    if not names:
+        return list(specs)
+
+    specs = [*specs, *optional_specs]
+
+    unknown_names = set(names) - {spec.name for spec in specs}
+    if unknown_names:
+        raise ValueError('Unknown plots: %s' % ', '.join(sorted(unknown_names)))
+
+    return [spec for spec in specs if spec.name in names]
+
+
+def get_required_datasets(specs):
+    return sorted({dataset for spec in specs for dataset in spec.inputs.values()})
+
+
+PLOTS = [
+    PlotSpec('WeeklyInfectedCured', plot.generate_week_cases_plot, {'df': 'week_cases'}, {
+        'value_vars': ['infected', 'cured'],
+        'hue_order': ['infected', 'cured'],
+        'palette': ['orange', 'green'],
+        'legend': [Text('plots.week_cases_plot.legend.infected'), Text('plots.week_cases_plot.legend.cured')]
+    }),
+    PlotSpec('WeeklyHospitalizedIntensiveCareFatal', plot.generate_week_cases_plot, {'df': 'week_cases'}, {
+        'value_vars': ['hospitalized', 'intensive_care', 'fatal'],
+        'hue_order': ['hospitalized', 'intensive_care', 'fatal'],
+        'palette': ['pink', 'purple', 'red'],
+        'legend': [
+            Text('plots.week_cases_plot.legend.hospitalized'),
+            Text('plots.week_cases_plot.legend.intensive_care'),
+            Text('plots.week_cases_plot.legend.fatal')
+        ]
+    }),
+    PlotSpec('WeeklyPlacesCases', plot.generate_week_places_cases_plot, {'df': 'week_places_cases'}),
+    PlotSpec('Weekly14DaysForecast', plot.generate_weekly_14_days_prediction_plot, {'forecast': 'forecast'}),
+    PlotSpec('ActiveCases', plot.generate_active_cases_plot, {'df': 'active_cases'}),
+    PlotSpec('HistoricalCases', plot.generate_combined_date_cases_plot, {'df': 'date_cases'}),
+    PlotSpec('HistoricalHospitalizedIntensiveCareCases', plot.generate_date_cases_plot, {'df': 'date_cases'}, {
+        'value_vars': ['hospitalized', 'intensive_care'],
+        'hue_order': ['hospitalized', 'intensive_care'],
+        'palette': ['pink', 'purple'],
+        'legend': [
+            Text('plots.date_cases_plot.legend.hospitalized'),
+            Text('plots.date_cases_plot.legend.intensive_care')
+        ]
+    }),
+    PlotSpec('DateTestsPositivity', plot.generate_date_positive_cases_percentage_plot, {'df': 'date_positive_tests'}),
+    PlotSpec('WeeklyTestsPositivity', plot.generate_tests_positivity_plot, {'df': 'weekly_positive_tests'}, {
+        'value_vars': ['total_tests', 'total_positive_tests'],
+        'hue_order': ['total_tests', 'total_positive_tests'],
+        'main_palette': ['orange', 'red'],
+        'main_legend': [
+            Text('plots.tests_positivity_plot.legend.tests'),
+            Text('plots.tests_positivity_plot.legend.positive_tests')
+        ],
+        'secondary_var': 'positive_percentage',
+        'secondary_legend': Text('plots.tests_positivity_plot.legend.positive_tests_percentage'),
+        'title': Text('plots.tests_positivity_plot.title.pcr_antigen')
+    }),
+    PlotSpec('WeeklyPCRTestsPositivity', plot.generate_tests_positivity_plot, {'df': 'weekly_positive_tests'}, {
+        'value_vars': ['pcr_tests', 'positive_pcr_tests'],
+        'hue_order': ['pcr_tests', 'positive_pcr_tests'],
+        'main_palette': ['orange', 'red'],
+        'main_legend': [
+            Text('plots.tests_positivity_plot.legend.pcr_tests'),
+            Text('plots.tests_positivity_plot.legend.positive_pcr_tests')
+        ],
+        'secondary_var': 'pcr_positive_percentage',
+        'secondary_legend': Text('plots.tests_positivity_plot.legend.positive_tests_percentage'),
+        'title': Text('plots.tests_positivity_plot.title.pcr')
+    }),
+    PlotSpec('WeeklyAntigenTestsPositivity', plot.generate_tests_positivity_plot,
+             {'df': 'weekly_antigen_positive_tests'}, {
+                 'value_vars': ['antigen_tests', 'positive_antigen_tests'],
+                 'hue_order': ['antigen_tests', 'positive_antigen_tests'],
+                 'main_palette': ['orange', 'red'],
+                 'main_legend': [
+                     Text('plots.tests_positivity_plot.legend.antigen_tests'),
+                     Text('plots.tests_positivity_plot.legend.positive_antigen_tests')
+                 ],
+                 'secondary_var': 'antigen_positive_percentage',
+                 'secondary_legend': Text('plots.tests_positivity_plot.legend.positive_tests_percentage'),
+                 'title': Text('plots.tests_positivity_plot.title.antigen')
+             }),
+    PlotSpec('RollingBiWeeklyPlacesCases', plot.generate_rolling_biweekly_places_cases_facet_plot,
+             {'df': 'rolling_biweekly_places_cases'}, override_figure_size=False, fixed_layout=True),
+    PlotSpec('DateCasesAge', plot.generate_cases_age_plot, {'df': 'date_cases_age'}),
+    PlotSpec('WeekCasesAge', plot.generate_week_cases_age_plot, {'df': 'date_diff_cases_age'}),
+    PlotSpec('DateVaccinationTimeline', plot.generate_vaccination_timeline_plot,
+             {'df': 'date_cases', 'diff_df': 'date_diff_cases'}, {'plot_type': 'daily'}),
+    PlotSpec('WeeklyVaccinationTimeline', plot.generate_vaccination_timeline_plot,
+             {'df': 'date_cases', 'diff_df': 'week_cases'}, {'plot_type': 'weekly'})
+]
+
+# Plots left out of the default run, as their inputs take long to compute, e.g. an Rt estimate for every place.
+OPTIONAL_PLOTS = [
+    PlotSpec('PlacesRt', plot.generate_places_rt_facet_plot, {'df': 'places_rt'}, override_figure_size=False,
+             fixed_layout=True)
+]
+
+EXTERNAL_PLOTS = [
+    PlotSpec('InfectedByAgeGroup', plot.generate_grouped_by_age_bar_plot, {'df': 'total_infected_by_age_group'},
+             {'y': 'infected', 'color': 'orange', 'plot_type': 'total.infected'}),
+    PlotSpec('FatalByAgeGroup', plot.generate_grouped_by_age_bar_plot, {'df': 'total_fatal_by_age_group'},
+             {'y': 'fatal', 'color': 'red', 'plot_type': 'total.fatal'}),
+    PlotSpec('FatalPercentageByAgeGroup', plot.generate_grouped_by_age_bar_plot,
+             {'df': 'grouped_by_age_fatal_percentage'},
+             {'y': 'fatal_percentage', 'color': 'red', 'plot_type': 'total.fatal_percentage'}),
+    PlotSpec('UnvaccinatedFatalPercentageByAgeGroup', plot.generate_grouped_by_age_bar_plot,
+             {'df': 'unvaccinated_by_age_fatal_percentage'},
+             {'y': 'fatal_percentage', 'color': 'red', 'plot_type': 'unvaccinated.fatal_percentage'}),
+    PlotSpec('VaccinatedByAgeInfected', plot.generate_grouped_by_age_bar_plot, {'df': 'infected_vaccinated_by_age'},
+             {'y': 'infected', 'color': 'orange', 'plot_type': 'vaccinated.infected'}),
+    PlotSpec('VaccinatedByAgeHospitalized', plot.generate_grouped_by_age_bar_plot,
+             {'df': 'hospitalized_vaccinated_by_age'},
+             {'y': 'hospitalized', 'color': 'pink', 'plot_type': 'vaccinated.hospitalized'}),
+    PlotSpec('VaccinatedByAgeIntensiveCare', plot.generate_grouped_by_age_bar_plot,
+             {'df': 'intensive_care_vaccinated_by_age'},
+             {'y': 'intensive_care', 'color': 'purple', 'plot_type': 'vaccinated.intensive_care'}),
+    PlotSpec('VaccinatedByAgeFatal', plot.generate_grouped_by_age_bar_plot, {'df': 'fatal_vaccinated_by_age'},
+             {'y': 'fatal', 'color': 'red', 'plot_type': 'vaccinated.fatal'}),
+    PlotSpec('VaccinatedByAgeFatalPercentage', plot.generate_grouped_by_age_bar_plot,
+             {'df': 'vaccinated_by_age_fatal_percentage'},
+             {'y': 'fatal_percentage', 'color': 'red', 'plot_type': 'vaccinated.fatal_percentage'}),
+    PlotSpec('VaccinatedFatalPercentage', plot.generate_vaccinated_fatal_percentage_plot,
+             {'df': 'vaccinated_fatal_percentage'})
+]
@@ -1,16 +1,60 @@
+import collections
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+
+# Plots are only ever saved to files, so pyplot, which seaborn loads as well, gets the non-interactive backend instead
+# of probing for a GUI toolkit. A backend chosen with MPLBACKEND or an already loaded pyplot is left alone.
+if 'matplotlib.pyplot' not in sys.modules and 'MPLBACKEND' not in os.environ:
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.layout_engine import TightLayoutEngine
 from matplotlib.lines import Line2D
 import matplotlib.dates as mdates
 import matplotlib.ticker as ticker
 import seaborn as sns
 import pandas as pd
 import numpy as np
-import datetime as dt
 import random
+import threading
+import weakref
+from PIL import Image
 
-from covidstats import data, helpers
+from covidstats import data, helpers, profiler
 from covidstats.locales import t
 
+FIGURE_POOL_SIZE = 4
+
+# A file a plot is exported to. Raster images are scaled to the width in pixels, if one is given.
+ExportFormat = collections.namedtuple('ExportFormat', ['extension', 'width'], defaults=[None])
+
+DEFAULT_FORMATS = [ExportFormat('svg')]
+VECTOR_FORMATS = ['svg', 'pdf']
+RASTER_FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+
+# Threads encoding the raster images of a plot while its vector formats are drawn.
+ENCODE_WORKERS = 2
+
+# Resolution of the images that rasterized lines and areas are embedded as.
+RASTER_DPI = 150
+
+# Most major date ticks of the plots that draw the full daily history.
+MAX_DATE_TICKS = 60
+
+# Space above the facets for the title and the generation date.
+FACET_HEADER_INCHES = 0.8
+
+_figure_pool = []
+_figure_pool_lock = threading.Lock()
+_pooled_figures = weakref.WeakSet()
+
 
 def setup_sns():
     custom_styles = {
@@ -26,70 +70,256 @@ def setup_sns():
     sns.set_theme(style='whitegrid', palette=color_palette, color_codes=True, rc=custom_styles)
 
 
+def get_figure():
+    # Figures are created through the object-oriented API and are never registered with pyplot, so the pool and the
+    # plot being drawn are the only references to them.
+    with _figure_pool_lock:
+        if _figure_pool:
+            return _figure_pool.pop()
+
+    figure = Figure(figsize=plt.rcParams['figure.figsize'])
+    FigureCanvasAgg(figure)
+    _pooled_figures.add(figure)
+
+    return figure
+
+
+def get_axes(ax=None):
+    return get_figure().add_subplot() if ax is None else ax
+
+
+def release_figure(figure):
+    # Figures created by pyplot, e.g. by a generator outside of this module, are closed instead of reused.
+    if figure not in _pooled_figures:
+        plt.close(figure)
+        return
+
+    figure.clear()
+    figure.set_size_inches(plt.rcParams['figure.figsize'])
+    figure.subplotpars.update(**{name: plt.rcParams['figure.subplot.' + name]
+                                 for name in ['left', 'right', 'bottom', 'top', 'wspace', 'hspace']})
+
+    with _figure_pool_lock:
+        if len(_figure_pool) < FIGURE_POOL_SIZE:
+            _figure_pool.append(figure)
+
+
+def get_facet_axes(figure, names, col_wrap=6, height=2, aspect=1.5, footer_inches=0):
+    # Lays the facets out the way seaborn's relplot does: shared axes, tick labels only on the outer facets. The
+    # figure is sized for the facets, the header and a footer for a figure legend, so it can be saved as it is.
+    rows = -(-len(names) // col_wrap)
+    figure.set_size_inches(col_wrap * height * aspect, rows * height + FACET_HEADER_INCHES + footer_inches)
+
+    axes = []
+    for index in range(len(names)):
+        axes.append(figure.add_subplot(rows, col_wrap, index + 1, sharex=axes[0] if axes else None,
+                                       sharey=axes[0] if axes else None))
+        axes[-1].set_title(names[index], fontweight='bold', pad=3)
+        axes[-1].tick_params(axis='x', labelrotation=90, labelbottom=index + col_wrap >= len(names))
+        axes[-1].tick_params(axis='y', labelleft=index % col_wrap == 0)
+
+    sns.despine(fig=figure)
+
+    return dict(zip(names, axes))
+
+
+def set_facet_axis_labels(facet_axes, x_label, y_label, col_wrap=6):
+    for index, ax in enumerate(facet_axes.values()):
+        ax.set_xlabel(x_label if index + col_wrap >= len(facet_axes) else '')
+        ax.set_ylabel(y_label if index % col_wrap == 0 else '')
+
+
+def set_facet_plot_title(figure, title):
+    height = figure.get_size_inches()[1]
+
+    figure.suptitle(title, y=1 - 0.15 / height, fontweight='bold')
+    figure.text(0.5, 1 - 0.45 / height, helpers.get_generation_date_text(), ha='center', va='top', fontsize='small')
+
+
+def layout_facets(figure, footer_inches=0):
+    height = figure.get_size_inches()[1]
+    TightLayoutEngine(rect=(0, footer_inches / height, 1, 1 - FACET_HEADER_INCHES / height)).execute(figure)
+
+
+def get_margin_limits(low, high, margin):
+    return low - (high - low) * margin, high + (high - low) * margin
+
+
+def set_facet_limits(facet_axes, df):
+    # Fixes the shared limits of the facets to the extent of a frame indexed by date, with the usual margins, and the
+    # date ticks to the ones located for them. Otherwise every line drawn autoscales all the facets sharing its axes,
+    # and every facet locates its date ticks again when it is laid out.
+    ax = next(iter(facet_axes.values()))
+    values = df.to_numpy(dtype=float, na_value=np.nan)
+
+    ax.set_xlim(get_margin_limits(df.index.min(), df.index.max(), plt.rcParams['axes.xmargin']))
+    ax.set_ylim(get_margin_limits(np.nanmin(values), np.nanmax(values), plt.rcParams['axes.ymargin']))
+    ax.set_xticks(ax.xaxis.get_major_locator()())
+
+
+def draw_facet_background(facet_axes, df, **kwargs):
+    # Draws every column of a frame indexed by date as the same background lines behind all facets. The lines are
+    # drawn once into an image at the size of a facet, which every facet then shows, so the cost grows with the number
+    # of lines and not with lines times facets. The facets have to be laid out and to have fixed shared limits.
+    ax = next(iter(facet_axes.values()))
+    x_lim, y_lim = ax.get_xlim(), ax.get_ylim()
+
+    x = mdates.date2num(df.index)
+    segments = []
+    for column in df.columns:
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        present = ~np.isnan(values)
+        segments.append(np.column_stack([x[present], values[present]]))
+
+    width, height = ax.get_position().size * ax.figure.get_size_inches()
+    background_figure = Figure(figsize=(width, height), dpi=RASTER_DPI)
+    FigureCanvasAgg(background_figure)
+    background_ax = background_figure.add_axes((0, 0, 1, 1))
+    background_ax.set_axis_off()
+    background_ax.add_collection(LineCollection(segments, **kwargs))
+    background_ax.set_xlim(x_lim)
+    background_ax.set_ylim(y_lim)
+    background_figure.canvas.draw()
+    image = np.asarray(background_figure.canvas.buffer_rgba())
+
+    # Below the facet's own lines and above the grid, where the background lines were drawn as lines.
+    for ax in facet_axes.values():
+        ax.imshow(image, extent=(*x_lim, *y_lim), aspect='auto', zorder=2)
+
+
+def rasterize_data_artists(figure):
+    # Lines and filled areas are embedded as images, while text, ticks, grid lines and legends stay vectors.
+    for ax in figure.axes:
+        for artist in [*ax.lines, *ax.collections]:
+            artist.set_rasterized(True)
+
+
+def get_decimation_buckets(ax):
+    # One bucket per pixel column of the axes, so the line drawn through the decimated points looks the same.
+    return max(int(ax.get_position().width * ax.figure.get_figwidth() * ax.figure.dpi), 1)
+
+
+def get_decimated_positions(values, buckets):
+    # Positions of the minimum and the maximum of every bucket of consecutive values, together with the first and the
+    # last position, in order. Missing values are kept only where a bucket has nothing else.
+    if len(values) <= 2 * buckets:
+        return np.arange(len(values))
+
+    bucket_size = -(-len(values) // buckets)
+    padded_values = np.full(bucket_size * buckets, np.nan)
+    padded_values[:len(values)] = values
+    padded_values = padded_values.reshape(buckets, bucket_size)
+
+    offsets = np.arange(buckets) * bucket_size
+    positions = np.concatenate([
+        [0, len(values) - 1],
+        offsets + np.argmin(np.where(np.isnan(padded_values), np.inf, padded_values), axis=1),
+        offsets + np.argmax(np.where(np.isnan(padded_values), -np.inf, padded_values), axis=1)
+    ])
+
+    return np.unique(positions[positions < len(values)])
+
+
+def decimate(df, y, buckets):
+    return df.iloc[get_decimated_positions(df[y].to_numpy(dtype=float), buckets)]
+
+
+def draw_lines(ax, x, df, columns, colors, labels=None, buckets=None, **kwargs):
+    # One line per column straight from the column arrays, leaving out missing values. The series already hold one
+    # value per date, so melting them for sns.lineplot and aggregating them per date again only costs time.
+    x = np.asarray(x)
+
+    for column, color, label in zip(columns, colors, labels or [None] * len(columns)):
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        positions = np.flatnonzero(~np.isnan(values))
+
+        if buckets is not None:
+            positions = positions[get_decimated_positions(values[positions], buckets)]
+
+        ax.plot(x[positions], values[positions], color=color, label=label, **kwargs)
+
+    return ax
+
+
+def set_date_ticks(ax, start, end, days=28):
+    # Weekly minor ticks and major ticks every given number of days. A longer history widens both by the same factor,
+    # so the number of ticks stays the same. The weekly rule steps by whole weeks, unlike WeekdayLocator's interval,
+    # which counts days.
+    scale = max(int(np.ceil((end - start) / np.timedelta64(days * MAX_DATE_TICKS, 'D'))), 1)
+
+    ax.xaxis.set_minor_locator(mdates.RRuleLocator(mdates.rrulewrapper(mdates.WEEKLY, byweekday=mdates.SU,
+                                                                       interval=scale)))
+    ax.set_xticks(np.arange(start, end, np.timedelta64(days * scale, 'D'), dtype='datetime64'))
+
+
 def set_plot_subtitle(ax, text):
     ax.annotate(text, xy=(0.5, 1.015), xytext=(0.5, 1.015), xycoords='axes fraction', annotation_clip=False,
                 ha='center', fontsize='small')
 
 
-def get_label_for_line(line):
-    legend = line.axes.get_legend()
-    index = line.axes.get_lines().index(line)
-    return legend.texts[index].get_text()
-
-
+@profiler.profiled
 def generate_week_cases_plot(
-        df=data.get_week_cases_df(),
+        df=None,
         value_vars=['infected', 'cured', 'fatal'],
         hue_order=['infected', 'cured', 'fatal'],
         palette=['orange', 'green', 'red'],
         legend=[
             t('plots.week_cases_plot.legend.infected'),
             t('plots.week_cases_plot.legend.cured'),
-            t('plots.week_cases_plot.legend.fatal')]
+            t('plots.week_cases_plot.legend.fatal')],
+        ax=None
 ):
-    plot_df = pd.melt(df, id_vars=['date'], value_vars=value_vars).dropna()
+    if df is None:
+        df = data.get_dataset('week_cases')
 
-    week_cases_plot = sns.lineplot(x='date', y='value', hue='variable', hue_order=hue_order, palette=palette,
-                                   data=plot_df)
+    ax = get_axes(ax)
+
+    week_cases_plot = draw_lines(ax, df['date'], df, [var for var in hue_order if var in value_vars], palette, legend)
     week_cases_plot.set_title(t('plots.week_cases_plot.title'), fontweight='bold')
     set_plot_subtitle(week_cases_plot, helpers.get_generation_date_text())
     week_cases_plot.set_xlabel(t('plots.week_cases_plot.x_label'))
     week_cases_plot.set_ylabel(t('plots.week_cases_plot.y_label'))
-    week_cases_plot.legend(labels=legend)
-    plt.gcf().autofmt_xdate(rotation=45)
+    week_cases_plot.legend()
+    ax.figure.autofmt_xdate(rotation=45)
 
     week_cases_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m (%V)'))
 
-    week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-    week_cases_plot.xaxis.set_minor_locator(week_locator)
-
-    ticks = np.arange(plot_df['date'].min(), plot_df['date'].max(), np.timedelta64(28, 'D'), dtype='datetime64')
-    week_cases_plot.set_xticks(ticks)
+    dates = df.loc[df[value_vars].notna().any(axis=1), 'date']
+    set_date_ticks(week_cases_plot, dates.min(), dates.max())
 
     return week_cases_plot
 
 
-def generate_active_cases_plot(df=data.get_active_cases_df()):
-    active_cases_plot = sns.lineplot(data=df, x=df.index, y='active', color='orange', legend=False)
+@profiler.profiled
+def generate_active_cases_plot(df=None, ax=None):
+    if df is None:
+        df = data.get_dataset('active_cases')
+
+    ax = get_axes(ax)
+    df = decimate(df, 'active', get_decimation_buckets(ax))
+
+    active_cases_plot = draw_lines(ax, df.index, df, ['active'], ['orange'])
     active_cases_plot.set_title(t('plots.active_cases_plot.title'), fontweight='bold')
     set_plot_subtitle(active_cases_plot, helpers.get_generation_date_text())
     active_cases_plot.set_xlabel(t('plots.active_cases_plot.x_label'))
     active_cases_plot.set_ylabel(t('plots.active_cases_plot.y_label'))
     active_cases_plot.fill_between(df.index, df['active'], alpha=0.2, color='orange')
-    plt.gcf().autofmt_xdate(rotation=45)
+    ax.figure.autofmt_xdate(rotation=45)
 
     active_cases_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
 
-    week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-    active_cases_plot.xaxis.set_minor_locator(week_locator)
-
-    ticks = np.arange(df.index.min(), df.index.max(), np.timedelta64(28, 'D'), dtype='datetime64')
-    active_cases_plot.set_xticks(ticks)
+    set_date_ticks(active_cases_plot, df.index.min(), df.index.max())
 
     return active_cases_plot
 
 
-def generate_week_places_cases_plot(df=data.get_week_places_cases_df()):
+@profiler.profiled
+def generate_week_places_cases_plot(df=None, ax=None):
+    if df is None:
+        df = data.get_dataset('week_places_cases')
+
+    ax = get_axes(ax)
+
     draw_order = df.sort_values('date').groupby('place').tail(1).sort_values('infected_avg', ascending=True).place
     legend_order = draw_order.iloc[::-1]
 
@@ -98,21 +328,19 @@ def generate_week_places_cases_plot(df=data.get_week_places_cases_df()):
 
     legend_colors_order = draw_colors_order[::-1]
 
-    week_places_cases_plot = sns.lineplot(data=df, x='date', y='infected_avg', hue='place', hue_order=draw_order,
-                                          palette=draw_colors_order)
+    places_df = df.pivot(index='date', columns='place', values='infected_avg')
+
+    week_places_cases_plot = draw_lines(ax, places_df.index, places_df, draw_order, draw_colors_order)
     week_places_cases_plot.set_title(t('plots.week_places_cases_plot.title'), fontweight='bold')
     set_plot_subtitle(week_places_cases_plot, helpers.get_generation_date_text())
     week_places_cases_plot.set_xlabel(t('plots.week_places_cases_plot.x_label'))
     week_places_cases_plot.set_ylabel(t('plots.week_places_cases_plot.y_label'))
-    plt.gcf().autofmt_xdate(rotation=45)
+    ax.figure.autofmt_xdate(rotation=45)
 
     week_places_cases_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m (%V)'))
 
-    week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-    week_places_cases_plot.xaxis.set_minor_locator(week_locator)
-
-    ticks = np.arange(df['date'].min(), df['date'].max(), np.timedelta64(28, 'D'), dtype='datetime64')
-    week_places_cases_plot.set_xticks(ticks)
+    dates = pd.to_datetime(places_df.index)
+    set_date_ticks(week_places_cases_plot, dates.min(), dates.max())
 
     handles = list(map(lambda color: Line2D([0], [0], color=color), legend_colors_order))
     labels = list(legend_order)
@@ -122,23 +350,31 @@ def generate_week_places_cases_plot(df=data.get_week_places_cases_df()):
     return week_places_cases_plot
 
 
+@profiler.profiled
 def generate_14_days_prediction_plot(
         cases_df,
         predicted_cases_df,
         rt_df,
-        predicted_rt_df):
+        predicted_rt_df,
+        ax=None):
+    ax = get_axes(ax)
+
     cases_plot = sns.lineplot(data=cases_df,
                               x=cases_df.date.append(predicted_cases_df.index.to_series(), ignore_index=True),
-                              y='infected', color='orange', label=t('plots.14_days_forecast_plot.legend.cases'))
+                              y='infected', color='orange', label=t('plots.14_days_forecast_plot.legend.cases'),
+                              ax=ax)
     predicted_cases_r_increase_plot = sns.lineplot(data=predicted_cases_df, x=predicted_cases_df.index,
                                                    y='increase_cases', color='red',
-                                                   label=t('plots.14_days_forecast_plot.legend.cases_r_increase'))
+                                                   label=t('plots.14_days_forecast_plot.legend.cases_r_increase'),
+                                                   ax=ax)
     predicted_cases_r_retention_plot = sns.lineplot(data=predicted_cases_df, x=predicted_cases_df.index,
                                                     y='predicted_cases', color='purple',
-                                                    label=t('plots.14_days_forecast_plot.legend.cases_r_retention'))
+                                                    label=t('plots.14_days_forecast_plot.legend.cases_r_retention'),
+                                                    ax=ax)
     predicted_cases_r_decline_plot = sns.lineplot(data=predicted_cases_df, x=predicted_cases_df.index,
                                                   y='decline_cases', color='olive',
-                                                  label=t('plots.14_days_forecast_plot.legend.cases_r_decline'))
+                                                  label=t('plots.14_days_forecast_plot.legend.cases_r_decline'),
+                                                  ax=ax)
 
     cases_plot.fill_between(predicted_cases_df.index,
                             predicted_cases_df['increase_cases'],
@@ -150,74 +386,85 @@ def generate_14_days_prediction_plot(
                             predicted_cases_df['decline_cases'],
                             color='olive', alpha=0.2)
 
+    if 'predicted_cases_Q0.05' in predicted_cases_df and 'predicted_cases_Q0.95' in predicted_cases_df:
+        cases_plot.fill_between(predicted_cases_df.index,
+                                predicted_cases_df['predicted_cases_Q0.05'],
+                                predicted_cases_df['predicted_cases_Q0.95'],
+                                color='purple', alpha=0.15)
+
     cases_plot.set_title(t('plots.14_days_forecast_plot.title'), fontweight='bold')
     set_plot_subtitle(cases_plot, helpers.get_generation_date_text())
     cases_plot.set_xlabel(t('plots.14_days_forecast_plot.x_label'))
     cases_plot.set_ylabel(t('plots.14_days_forecast_plot.y_label'))
-    plt.gcf().autofmt_xdate(rotation=45)
+    ax.figure.autofmt_xdate(rotation=45)
 
     cases_plot.yaxis.set_major_locator(ticker.MaxNLocator(4))
 
     lines, labels = cases_plot.get_legend_handles_labels()
     cases_plot.get_legend().remove()
 
-    with sns.axes_style({'axes.grid': False}):
-        common_ax = cases_plot.twinx()
-        rt_plot = sns.lineplot(data=rt_df, x=rt_df.index, y='Q0.5', ax=common_ax, color='lightblue',
-                               label=t('plots.14_days_forecast_plot.legend.rt'))
-        rt_plot.set_ylabel(t('plots.14_days_forecast_plot.y_right_label'), rotation=-90, labelpad=20)
-        rt_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m (%V)'))
+    common_ax = cases_plot.twinx()
+    common_ax.grid(False)
+    rt_plot = sns.lineplot(data=rt_df, x=rt_df.index, y='Q0.5', ax=common_ax, color='lightblue',
+                           label=t('plots.14_days_forecast_plot.legend.rt'))
+    rt_plot.set_ylabel(t('plots.14_days_forecast_plot.y_right_label'), rotation=-90, labelpad=20)
+    rt_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m (%V)'))
 
-        rt_plot.fill_between(rt_df.index,
-                             rt_df['Q0.05'],
-                             rt_df['Q0.95'],
-                             color='lightblue', alpha=0.2)
+    rt_plot.fill_between(rt_df.index,
+                         rt_df['Q0.05'],
+                         rt_df['Q0.95'],
+                         color='lightblue', alpha=0.2)
 
-        rt_plot.set_yticks(range(4))
+    rt_plot.set_yticks(range(4))
 
-        rt_plot.axhline(1, ls='--', color='green')
-        rt_plot.set_ylim(0, 3)
+    rt_plot.axhline(1, ls='--', color='green')
+    rt_plot.set_ylim(0, 3)
 
-        rt_prediction_retention_plot = sns.lineplot(data=predicted_rt_df, x=predicted_rt_df.index, y='predicted_rt',
-                                                    ax=common_ax, color='darkblue',
-                                                    label=t('plots.14_days_forecast_plot.legend.rt_forecast'))
-        rt_prediction_retention_plot.fill_between(predicted_rt_df.index,
-                                                  predicted_rt_df['decline_rt'],
-                                                  predicted_rt_df['increase_rt'],
-                                                  color='darkblue', alpha=0.2)
+    rt_prediction_retention_plot = sns.lineplot(data=predicted_rt_df, x=predicted_rt_df.index, y='predicted_rt',
+                                                ax=common_ax, color='darkblue',
+                                                label=t('plots.14_days_forecast_plot.legend.rt_forecast'))
+    rt_prediction_retention_plot.fill_between(predicted_rt_df.index,
+                                              predicted_rt_df['decline_rt'],
+                                              predicted_rt_df['increase_rt'],
+                                              color='darkblue', alpha=0.2)
 
-        lines2, labels2 = common_ax.get_legend_handles_labels()
-        plt.legend(lines + lines2, labels + labels2, loc='lower center', bbox_to_anchor=(0.5, -0.35), ncol=2,
-                   frameon=False)
+    lines2, labels2 = common_ax.get_legend_handles_labels()
+    common_ax.legend(lines + lines2, labels + labels2, loc='lower center', bbox_to_anchor=(0.5, -0.35), ncol=2,
+                     frameon=False)
 
     return cases_plot
 
 
-def generate_weekly_14_days_prediction_plot_for_date(start_date, week_cases_df=data.get_week_cases_df(),
-                                                     date_diff_cases_df=data.get_date_diff_cases_df()):
-    rt_df = helpers.estimate_rt(date_diff_cases_df['infected'])
+@profiler.profiled
+def generate_weekly_14_days_prediction_plot_for_date(start_date, week_cases_df=None, date_diff_cases_df=None, ax=None):
+    return generate_weekly_14_days_prediction_plot(data.build_forecast(week_cases_df, date_diff_cases_df, start_date),
+                                                   ax=ax)
+
+
+@profiler.profiled
+def generate_weekly_14_days_prediction_plot(forecast=None, ax=None):
+    if forecast is None:
+        forecast = data.get_dataset('forecast')
 
-    previous_day = pd.to_datetime(start_date - dt.timedelta(days=1))
-    start_datetime = pd.to_datetime(start_date)
+    return generate_14_days_prediction_plot(forecast['week_cases'], forecast['weekly_predicted_cases'], forecast['rt'],
+                                            forecast['predicted_rt'], ax=ax)
 
-    predicted_rts = helpers.predict_rt(rt_df, rt_df.index.get_loc(previous_day), 14)
-    predicted_rts_df = data.build_rts_df(predicted_rts, start_datetime)
-    predicted_cases_df = data.build_predicted_cases_df(rt_df[rt_df.index < start_datetime]['cases'], predicted_rts_df,
-                                                       start_datetime)
-    weekly_predicted_cases_df = data.build_weekly_predicted_cases_df(week_cases_df, predicted_cases_df, start_datetime)
 
-    return generate_14_days_prediction_plot(week_cases_df, weekly_predicted_cases_df, rt_df, predicted_rts_df)
+@profiler.profiled
+def generate_date_positive_cases_percentage_plot(df=None, ax=None):
+    if df is None:
+        df = data.get_dataset('date_positive_tests')
 
+    ax = get_axes(ax)
 
-def generate_date_positive_cases_percentage_plot(df=data.get_date_positive_tests_df()):
     df['formatted_date'] = list(map(lambda date: date.strftime('%d.%m.%Y'), df['date']))
     date_positive_cases_percentage_plot = sns.barplot(data=df, x='formatted_date', y='positive_percentage', lw=0.,
-                                                      color='#4e73df', ci=None)
+                                                      color='#4e73df', ci=None, ax=ax)
     date_positive_cases_percentage_plot.set_title(t('plots.positive_cases_percentage_plot.title'), fontweight='bold')
     set_plot_subtitle(date_positive_cases_percentage_plot, helpers.get_generation_date_text())
     date_positive_cases_percentage_plot.set_xlabel(t('plots.positive_cases_percentage_plot.x_label'))
     date_positive_cases_percentage_plot.set_ylabel(t('plots.positive_cases_percentage_plot.y_label'))
-    plt.gcf().autofmt_xdate(rotation=45)
+    ax.figure.autofmt_xdate(rotation=45)
 
     minor_week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
     date_positive_cases_percentage_plot.xaxis.set_minor_locator(minor_week_locator)
@@ -228,8 +475,9 @@ def generate_date_positive_cases_percentage_plot(df=data.get_date_positive_tests
     return date_positive_cases_percentage_plot
 
 
+@profiler.profiled
 def generate_tests_positivity_plot(
-        df=data.get_date_positive_tests_df(),
+        df=None,
         value_vars=['pcr_tests', 'positive_pcr_tests'],
         hue_order=['pcr_tests', 'positive_pcr_tests'],
         main_palette=['orange', 'red'],
@@ -239,47 +487,47 @@ def generate_tests_positivity_plot(
         ],
         secondary_var='pcr_positive_percentage',
         secondary_legend=t('plots.tests_positivity_plot.legend.positive_tests_percentage'),
-        title=t('plots.tests_positivity_plot.title.pcr')
+        title=t('plots.tests_positivity_plot.title.pcr'),
+        ax=None
 ):
-    plot_df = pd.melt(df, id_vars=['date'], value_vars=value_vars).dropna()
+    if df is None:
+        df = data.get_dataset('date_positive_tests')
 
-    date_tests_plot = sns.lineplot(x='date', y='value', hue='variable', hue_order=hue_order, palette=main_palette,
-                                   data=plot_df)
+    ax = get_axes(ax)
+
+    date_tests_plot = draw_lines(ax, df['date'], df, [var for var in hue_order if var in value_vars], main_palette,
+                                 main_legend)
     date_tests_plot.set_title(title, fontweight='bold')
     date_tests_plot.set_xlabel(t('plots.tests_positivity_plot.x_label'))
     date_tests_plot.set_ylabel(t('plots.tests_positivity_plot.y_label'))
-    date_tests_plot.legend(labels=main_legend)
-    plt.gcf().autofmt_xdate(rotation=45)
+    date_tests_plot.legend()
+    ax.figure.autofmt_xdate(rotation=45)
 
     set_plot_subtitle(date_tests_plot, helpers.get_generation_date_text())
 
     lines, labels = date_tests_plot.get_legend_handles_labels()
     date_tests_plot.get_legend().remove()
 
-    with sns.axes_style({'axes.grid': False}):
-        common_ax = date_tests_plot.twinx()
-
-        positivity_plot = sns.lineplot(data=df, x=df.index, y=secondary_var, ax=common_ax, color='blue',
-                                       linestyle='dotted',
-                                       label=secondary_legend)
-        positivity_plot.set_ylabel(t('plots.tests_positivity_plot.y_right_label'), rotation=-90, labelpad=20)
+    common_ax = date_tests_plot.twinx()
+    common_ax.grid(False)
 
-        positivity_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m (%V)'))
+    positivity_plot = draw_lines(common_ax, df.index, df, [secondary_var], ['blue'], [secondary_legend],
+                                 linestyle='dotted')
+    positivity_plot.set_ylabel(t('plots.tests_positivity_plot.y_right_label'), rotation=-90, labelpad=20)
 
-        week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-        positivity_plot.xaxis.set_minor_locator(week_locator)
+    positivity_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m (%V)'))
 
-        ticks = np.arange(df['date'].min(), df['date'].max(), np.timedelta64(28, 'D'), dtype='datetime64')
-        positivity_plot.set_xticks(ticks)
+    set_date_ticks(positivity_plot, df['date'].min(), df['date'].max())
 
-        lines2, labels2 = common_ax.get_legend_handles_labels()
-        positivity_plot.legend(lines + lines2, main_legend + [secondary_legend])
+    lines2, labels2 = common_ax.get_legend_handles_labels()
+    positivity_plot.legend(lines + lines2, main_legend + [secondary_legend])
 
     return date_tests_plot
 
 
+@profiler.profiled
 def generate_date_cases_plot(
-        df=data.get_date_cases_df(),
+        df=None,
         value_vars=['infected', 'cured', 'fatal'],
         hue_order=['infected', 'cured', 'fatal'],
         palette=['orange', 'green', 'red'],
@@ -287,62 +535,63 @@ def generate_date_cases_plot(
             t('plots.date_cases_plot.legend.infected'),
             t('plots.date_cases_plot.legend.cured'),
             t('plots.date_cases_plot.legend.fatal')
-        ]
+        ],
+        ax=None
 ):
-    plot_df = pd.melt(df, id_vars=['date'], value_vars=value_vars).dropna()
+    if df is None:
+        df = data.get_dataset('date_cases')
+
+    ax = get_axes(ax)
 
-    date_cases_plot = sns.lineplot(x='date', y='value', hue='variable', hue_order=hue_order, palette=palette,
-                                   data=plot_df)
+    date_cases_plot = draw_lines(ax, df['date'], df, [var for var in hue_order if var in value_vars], palette, legend,
+                                 get_decimation_buckets(ax))
     date_cases_plot.set_title(t('plots.date_cases_plot.title'), fontweight='bold')
     set_plot_subtitle(date_cases_plot, helpers.get_generation_date_text())
     date_cases_plot.set_xlabel(t('plots.date_cases_plot.x_label'))
     date_cases_plot.set_ylabel(t('plots.date_cases_plot.y_label'))
-    date_cases_plot.legend(labels=legend)
-    plt.gcf().autofmt_xdate(rotation=45)
+    date_cases_plot.legend()
+    ax.figure.autofmt_xdate(rotation=45)
 
     date_cases_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
 
-    week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-    date_cases_plot.xaxis.set_minor_locator(week_locator)
-
-    ticks = np.arange(plot_df['date'].min(), plot_df['date'].max(), np.timedelta64(28, 'D'), dtype='datetime64')
-    date_cases_plot.set_xticks(ticks)
+    dates = df.loc[df[value_vars].notna().any(axis=1), 'date']
+    set_date_ticks(date_cases_plot, dates.min(), dates.max())
 
     return date_cases_plot
 
 
-def generate_combined_date_cases_plot(df=data.get_date_cases_df()):
+@profiler.profiled
+def generate_combined_date_cases_plot(df=None, ax=None):
+    if df is None:
+        df = data.get_dataset('date_cases')
+
     date_cases_plot = generate_date_cases_plot(df=df, value_vars=['infected', 'cured'], hue_order=['infected', 'cured'],
                                                palette=['orange', 'green'],
                                                legend=[
                                                    t('plots.date_cases_plot.legend.infected'),
                                                    t('plots.date_cases_plot.legend.cured'),
-                                               ])
+                                               ], ax=ax)
 
     lines, labels = date_cases_plot.get_legend_handles_labels()
     date_cases_plot.get_legend().remove()
 
-    with sns.axes_style({'axes.grid': False}):
-        common_ax = date_cases_plot.twinx()
+    common_ax = date_cases_plot.twinx()
+    common_ax.grid(False)
 
-        fatal_plot = sns.lineplot(data=df, x=df.index, y='fatal', ax=common_ax, color='red',
-                                  label=t('plots.date_cases_plot.legend.fatal'))
-        fatal_plot.set_ylabel(t('plots.date_cases_plot.y_fatal_label'), rotation=-90, labelpad=20)
+    fatal_plot = draw_lines(common_ax, df.index, df, ['fatal'], ['red'], [t('plots.date_cases_plot.legend.fatal')],
+                            get_decimation_buckets(common_ax))
+    fatal_plot.set_ylabel(t('plots.date_cases_plot.y_fatal_label'), rotation=-90, labelpad=20)
 
-        fatal_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
+    fatal_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
 
-        week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-        fatal_plot.xaxis.set_minor_locator(week_locator)
+    set_date_ticks(fatal_plot, df['date'].min(), df['date'].max())
 
-        ticks = np.arange(df['date'].min(), df['date'].max(), np.timedelta64(28, 'D'), dtype='datetime64')
-        fatal_plot.set_xticks(ticks)
-
-        lines2, labels2 = common_ax.get_legend_handles_labels()
-        fatal_plot.legend(lines + lines2, [
-            t('plots.date_cases_plot.legend.infected'),
-            t('plots.date_cases_plot.legend.cured'),
-            t('plots.date_cases_plot.legend.fatal')
-        ])
+    lines2, labels2 = common_ax.get_legend_handles_labels()
+    fatal_plot.legend(lines + lines2, [
+        t('plots.date_cases_plot.legend.infected'),
+        t('plots.date_cases_plot.legend.cured'),
+        t('plots.date_cases_plot.legend.fatal')
+    ])
 
     return date_cases_plot
 
@@ -360,37 +609,32 @@ def map_cases_to_color(cases):
         return 'purple'
 
 
-def generate_rolling_biweekly_places_cases_facet_plot(df=data.get_rolling_biweekly_places_cases_df()):
+@profiler.profiled
+def generate_rolling_biweekly_places_cases_facet_plot(df=None, figure=None):
+    if df is None:
+        df = data.get_dataset('rolling_biweekly_places_cases')
+
     df_tail_sorted_by_14day_100k = df.sort_values('date').groupby('place').tail(1).sort_values('infected_avg_100k',
                                                                                                ascending=False)
     draw_order = df_tail_sorted_by_14day_100k.place
     palette = list(map(map_cases_to_color, df_tail_sorted_by_14day_100k.infected_avg_100k))
 
-    week_places_cases_facets_plot = sns.relplot(
-        data=df,
-        x='date', y='infected_avg_100k', col='place', col_order=draw_order, hue='place', hue_order=draw_order,
-        kind='line', palette=palette, linewidth=4, zorder=5,
-        col_wrap=6, height=2, aspect=1.5, legend=False,
-    )
+    week_places_cases_facets_plot = figure if figure is not None else get_figure()
+    facet_axes = get_facet_axes(week_places_cases_facets_plot, list(draw_order), footer_inches=0.8)
 
-    plt.subplots_adjust(top=0.9)
-    plt.suptitle(t('plots.rolling_biweekly_places_cases_facet_plot.title'), fontweight='bold')
-    plt.annotate(helpers.get_generation_date_text(), xy=(0.5, 0.965), xytext=(0.5, 0.965),
-                 xycoords='subfigure fraction', annotation_clip=False,
-                 ha='center', fontsize='small')
+    set_facet_plot_title(week_places_cases_facets_plot, t('plots.rolling_biweekly_places_cases_facet_plot.title'))
 
-    week_places_cases_facets_plot.set_titles('{col_name}', fontweight='bold', pad=3)
-    week_places_cases_facets_plot.set_xticklabels(rotation=90)
+    places_df = df.pivot(index='date', columns='place', values='infected_avg_100k')
+    set_facet_limits(facet_axes, places_df)
 
-    for place, ax in week_places_cases_facets_plot.axes_dict.items():
-        sns.lineplot(
-            data=df, x='date', y='infected_avg_100k', units='place',
-            estimator=None, color=".7", linewidth=1, ax=ax,
-        )
+    for (place, ax), color in zip(facet_axes.items(), palette):
+        draw_lines(ax, places_df.index, places_df, [place], [color], buckets=get_decimation_buckets(ax), linewidth=4,
+                   zorder=5)
 
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
 
-    week_places_cases_facets_plot.set_axis_labels(
+    set_facet_axis_labels(
+        facet_axes,
         t('plots.rolling_biweekly_places_cases_facet_plot.x_label'),
         t('plots.rolling_biweekly_places_cases_facet_plot.y_label')
     )
@@ -411,47 +655,87 @@ def generate_rolling_biweekly_places_cases_facet_plot(df=data.get_rolling_biweek
         t('plots.rolling_biweekly_places_cases_facet_plot.legend.level_5')
     ]
 
-    week_places_cases_facets_plot.figure.legend(legend_lines, legend_labels, loc='lower center', ncol=2,
-                                                bbox_to_anchor=(0.5, -0.15), frameon=False)
+    week_places_cases_facets_plot.legend(legend_lines, legend_labels, loc='lower center', ncol=2,
+                                         bbox_to_anchor=(0.5, 0), frameon=False)
+
+    layout_facets(week_places_cases_facets_plot, footer_inches=0.8)
+
+    draw_facet_background(facet_axes, places_df, color='.7', linewidth=1)
 
     return week_places_cases_facets_plot
 
 
+@profiler.profiled
+def generate_places_rt_facet_plot(df=None, figure=None):
+    if df is None:
+        df = data.get_dataset('places_rt')
+
+    draw_order = df.sort_values('date').groupby('place').tail(1).sort_values('Q0.5', ascending=False).place
+
+    places_rt_facets_plot = figure if figure is not None else get_figure()
+    facet_axes = get_facet_axes(places_rt_facets_plot, list(draw_order))
+
+    set_facet_plot_title(places_rt_facets_plot, t('plots.places_rt_facet_plot.title'))
+
+    places_rt_df = df.pivot(index='date', columns='place', values='Q0.5')
+    places_low_rt_df = df.pivot(index='date', columns='place', values='Q0.05')
+    places_high_rt_df = df.pivot(index='date', columns='place', values='Q0.95')
+    set_facet_limits(facet_axes, pd.concat([places_low_rt_df, places_high_rt_df], axis=1))
+
+    for place, ax in facet_axes.items():
+        draw_lines(ax, places_rt_df.index, places_rt_df, [place], ['#4e73df'], buckets=get_decimation_buckets(ax),
+                   linewidth=2, zorder=5)
+        ax.fill_between(places_rt_df.index, places_low_rt_df[place], places_high_rt_df[place], color='#4e73df',
+                        alpha=0.2, zorder=4)
+        ax.axhline(1, color='red', linewidth=1, linestyle='--', zorder=4)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
+
+    set_facet_axis_labels(
+        facet_axes,
+        t('plots.places_rt_facet_plot.x_label'),
+        t('plots.places_rt_facet_plot.y_label')
+    )
+
+    layout_facets(places_rt_facets_plot)
+
+    draw_facet_background(facet_axes, places_rt_df, color='.7', linewidth=1)
+
+    return places_rt_facets_plot
+
+
+@profiler.profiled
 def generate_cases_age_plot(
-        df=data.get_date_cases_age_df(),
+        df=None,
         value_vars=['group_0_19', 'group_20_29', 'group_30_39', 'group_40_49', 'group_50_59', 'group_60_69',
                     'group_70_79', 'group_80_89', 'group_90'],
         legend=['0-19', '20-29', '30-39', '40-49', '50-59', '60-69', '70-79', '80-89', '90+'],
-        translation_key='cases_age_plot'
+        translation_key='cases_age_plot',
+        ax=None
 ):
-    plot_df = pd.melt(df, id_vars=['date'], value_vars=value_vars)
+    if df is None:
+        df = data.get_dataset('date_cases_age')
 
-    cases_age_plot = sns.lineplot(
-        data=plot_df,
-        x='date', hue='variable', y='value',
-        palette=sns.color_palette('Paired', n_colors=len(value_vars))
-    )
+    ax = get_axes(ax)
+
+    cases_age_plot = draw_lines(ax, df['date'], df, value_vars, sns.color_palette('Paired', n_colors=len(value_vars)),
+                                legend)
 
     cases_age_plot.set_title(t('plots.%s.title' % translation_key), fontweight='bold')
     set_plot_subtitle(cases_age_plot, helpers.get_generation_date_text())
     cases_age_plot.set_xlabel(t('plots.%s.x_label' % translation_key))
     cases_age_plot.set_ylabel(t('plots.%s.y_label' % translation_key))
-    cases_age_plot.legend(labels=legend)
-    plt.gcf().autofmt_xdate(rotation=45)
+    cases_age_plot.legend()
+    ax.figure.autofmt_xdate(rotation=45)
 
     cases_age_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
 
-    week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-    cases_age_plot.xaxis.set_minor_locator(week_locator)
-
-    ticks = np.arange(plot_df['date'].min(), plot_df['date'].max(), np.timedelta64(28, 'D'), dtype='datetime64')
-    cases_age_plot.set_xticks(ticks)
+    set_date_ticks(cases_age_plot, df['date'].min(), df['date'].max())
 
     for line in cases_age_plot.lines:
         x = line.get_xdata()
         y = line.get_ydata()
         if len(y) > 0:
-            cases_age_plot.annotate(text='%s (%d)' % (get_label_for_line(line), round(y[-1])), xy=(x[-1], y[-1]),
+            cases_age_plot.annotate(text='%s (%d)' % (line.get_label(), round(y[-1])), xy=(x[-1], y[-1]),
                                          xytext=(35, 0), xycoords='data', textcoords='offset points',
                                          ha='left', va='center', color=line.get_color(),
                                          arrowprops={'arrowstyle': '->', 'color': line.get_color()})
@@ -459,26 +743,34 @@ def generate_cases_age_plot(
     return cases_age_plot
 
 
-def generate_week_cases_age_plot(df=data.build_date_diff_cases_age_df()):
+@profiler.profiled
+def generate_week_cases_age_plot(df=None, ax=None):
+    if df is None:
+        df = data.get_dataset('date_diff_cases_age')
+
     plot_df = df.groupby(pd.Grouper(key='date', freq='W')).mean()
     plot_df['date'] = plot_df.index
 
-    week_cases_age_plot = generate_cases_age_plot(df=plot_df, translation_key='week_cases_age_plot')
+    week_cases_age_plot = generate_cases_age_plot(df=plot_df, translation_key='week_cases_age_plot', ax=ax)
     week_cases_age_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m (%V)'))
 
     return week_cases_age_plot
 
 
-def generate_vaccination_timeline_plot(df=data.get_date_cases_df(),
-                                       diff_df=data.get_date_diff_cases_df(),
-                                       plot_type='daily'):
+@profiler.profiled
+def generate_vaccination_timeline_plot(df=None, diff_df=None, plot_type='daily', ax=None):
+    if df is None:
+        df = data.get_dataset('date_cases')
+    if diff_df is None:
+        diff_df = data.get_dataset('date_diff_cases')
+
     date_cumulative_vaccinations_plot = generate_date_cases_plot(df=df, value_vars=['vaccinated'],
                                                                  hue_order=['vaccinated'],
                                                                  palette=['blue'],
                                                                  legend=[
                                                                      t('plots.vaccination_timeline_plot.legend.'
                                                                        'vaccinated'),
-                                                                 ])
+                                                                 ], ax=ax)
 
     date_cumulative_vaccinations_plot.set_title(t(('plots.vaccination_timeline_plot.title.%s' % plot_type)), fontweight='bold')
     set_plot_subtitle(date_cumulative_vaccinations_plot, helpers.get_generation_date_text())
@@ -490,37 +782,32 @@ def generate_vaccination_timeline_plot(df=data.get_date_cases_df(),
     lines, labels = date_cumulative_vaccinations_plot.get_legend_handles_labels()
     date_cumulative_vaccinations_plot.get_legend().remove()
 
-    with sns.axes_style({'axes.grid': False}):
-        common_ax = date_cumulative_vaccinations_plot.twinx()
-
-        new_vaccinations_plot_df = pd.melt(diff_df, id_vars=['date'], value_vars=['vaccinated']).dropna()
-
-        new_vaccinations_plot = sns.lineplot(data=new_vaccinations_plot_df, x='date', y='value', ax=common_ax,
-                                             color='red', label=t('plots.vaccination_timeline_plot.legend.'
-                                                                  'newly_vaccinated'))
-        new_vaccinations_plot.set_ylabel(t('plots.vaccination_timeline_plot.y_newly_vaccinated_label'), rotation=-90,
-                                         labelpad=20)
+    common_ax = date_cumulative_vaccinations_plot.twinx()
+    common_ax.grid(False)
 
-        new_vaccinations_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
+    new_vaccinations_plot = draw_lines(common_ax, diff_df['date'], diff_df, ['vaccinated'], ['red'],
+                                       [t('plots.vaccination_timeline_plot.legend.newly_vaccinated')],
+                                       get_decimation_buckets(common_ax))
+    new_vaccinations_plot.set_ylabel(t('plots.vaccination_timeline_plot.y_newly_vaccinated_label'), rotation=-90,
+                                     labelpad=20)
 
-        week_locator = mdates.WeekdayLocator(byweekday=mdates.SU)
-        new_vaccinations_plot.xaxis.set_minor_locator(week_locator)
+    new_vaccinations_plot.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%Y'))
 
-        ticks = np.arange(new_vaccinations_plot_df['date'].min(), new_vaccinations_plot_df['date'].max(),
-                          np.timedelta64(14, 'D'), dtype='datetime64')
-        new_vaccinations_plot.set_xticks(ticks)
+    dates = diff_df.loc[diff_df['vaccinated'].notna(), 'date']
+    set_date_ticks(new_vaccinations_plot, dates.min(), dates.max(), days=14)
 
-        lines2, labels2 = common_ax.get_legend_handles_labels()
-        new_vaccinations_plot.legend(lines + lines2, [
-            t('plots.vaccination_timeline_plot.legend.vaccinated'),
-            t('plots.vaccination_timeline_plot.legend.newly_vaccinated')
-        ])
+    lines2, labels2 = common_ax.get_legend_handles_labels()
+    new_vaccinations_plot.legend(lines + lines2, [
+        t('plots.vaccination_timeline_plot.legend.vaccinated'),
+        t('plots.vaccination_timeline_plot.legend.newly_vaccinated')
+    ])
 
     return new_vaccinations_plot
 
 
-def generate_grouped_by_age_bar_plot(df, y, color, plot_type):
-    grouped_by_age_bar_plot = sns.barplot(data=df, x='age', y=y, color=color, alpha=.6)
+@profiler.profiled
+def generate_grouped_by_age_bar_plot(df, y, color, plot_type, ax=None):
+    grouped_by_age_bar_plot = sns.barplot(data=df, x='age', y=y, color=color, alpha=.6, ax=get_axes(ax))
     grouped_by_age_bar_plot.bar_label(grouped_by_age_bar_plot.containers[0])
 
     grouped_by_age_bar_plot.set_title(t(('plots.grouped_by_age_bar_plot.title.%s' % plot_type)),
@@ -532,26 +819,112 @@ def generate_grouped_by_age_bar_plot(df, y, color, plot_type):
     return grouped_by_age_bar_plot
 
 
-def generate_vaccinated_fatal_percentage_plot(df):
-    vaccinated_fatal_percentage_plot = sns.lineplot(data=df, x='date', y='fatal_vaccinated_percentage', linewidth=3)
+@profiler.profiled
+def generate_vaccinated_fatal_percentage_plot(df, ax=None):
+    ax = get_axes(ax)
+
+    vaccinated_fatal_percentage_plot = draw_lines(ax, df.index, df, ['fatal_vaccinated_percentage'], [None],
+                                                  linewidth=3)
 
     vaccinated_fatal_percentage_plot.set_title(t('plots.vaccinated_fatal_percentage_plot.title'), fontweight='bold')
     set_plot_subtitle(vaccinated_fatal_percentage_plot, helpers.get_generation_date_text())
     vaccinated_fatal_percentage_plot.set_xlabel(t('plots.vaccinated_fatal_percentage_plot.x_label'))
     vaccinated_fatal_percentage_plot.set_ylabel(t('plots.vaccinated_fatal_percentage_plot.y_label'))
 
-    plt.gcf().autofmt_xdate(rotation=45)
+    ax.figure.autofmt_xdate(rotation=45)
 
     vaccinated_fatal_percentage_plot.xaxis.set_major_formatter(mdates.DateFormatter('%m.%Y'))
 
     return vaccinated_fatal_percentage_plot
 
 
-def export_plot(ax, file_name, override_figure_size=True):
-    ax.figure.tight_layout()
+def parse_export_format(value):
+    # Export formats are given as an extension with an optional width, e.g. svg, png or webp:1200.
+    extension, _, width = value.lower().partition(':')
+
+    if extension not in VECTOR_FORMATS and extension not in RASTER_FORMATS:
+        raise ValueError('Unknown export format: %s' % value)
+    if width and extension in VECTOR_FORMATS:
+        raise ValueError('Vector formats have no width: %s' % value)
+
+    return ExportFormat(extension, int(width) if width else None)
+
+
+def get_export_file_name(file_name, export_format):
+    if export_format.width is None:
+        return '%s.%s' % (file_name, export_format.extension)
+
+    return '%s-%d.%s' % (file_name, export_format.width, export_format.extension)
+
+
+def get_tight_bbox(figure):
+    figure.draw_without_rendering()
+    return figure.get_tightbbox(figure.canvas.get_renderer())
+
+
+def draw_image(figure, bbox, width):
+    # Draws the figure with Agg into raw RGBA pixels, cropped to the bounding box and the given width.
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='rgba', dpi=(width + 0.5) / bbox.width, transparent=True, bbox_inches=bbox,
+                   pad_inches=0)
+
+    return Image.frombuffer('RGBA', (width, len(buffer.getbuffer()) // 4 // width), buffer.getvalue(), 'raw', 'RGBA',
+                            0, 1)
+
+
+def write_image(image, export_format, file_name):
+    if image.width != export_format.width and export_format.width is not None:
+        image = image.resize((export_format.width, round(image.height * export_format.width / image.width)),
+                             Image.LANCZOS)
+
+    image.save(file_name, RASTER_FORMATS[export_format.extension])
+
+    return os.path.getsize(file_name)
+
+
+@profiler.profiled
+def export_plot(ax, file_name, override_figure_size=True, rasterize=False, fixed_layout=False,
+                formats=DEFAULT_FORMATS):
+    # A figure with a fixed layout was laid out by its generator and is saved at its own size, which skips the layout
+    # pass and the extra draw that computing the tight bounding box takes. Unlike figure.tight_layout, executing the
+    # layout engine leaves none attached to the figure, which would make savefig draw it once more.
+    figure = ax.figure
+
+    if not fixed_layout:
+        TightLayoutEngine().execute(figure)
 
     if override_figure_size:
-        ax.figure.set_size_inches(12, 8)
+        figure.set_size_inches(12, 8)
+
+    if rasterize:
+        rasterize_data_artists(figure)
+
+    # The bounding box is computed once for all formats. Raster formats share one Agg draw at the largest width and
+    # are scaled and encoded by threads, while every vector format is drawn by its backend.
+    bbox = figure.bbox_inches if fixed_layout else get_tight_bbox(figure)
+    raster_formats = [export_format for export_format in formats if export_format.extension in RASTER_FORMATS]
+    sizes = []
+
+    with ThreadPoolExecutor(max_workers=ENCODE_WORKERS) as executor:
+        futures = []
+
+        if raster_formats:
+            image = draw_image(figure, bbox, max(export_format.width or round(bbox.width * figure.dpi)
+                                                 for export_format in raster_formats))
+            futures = [executor.submit(write_image, image, export_format,
+                                       get_export_file_name(file_name, export_format))
+                       for export_format in raster_formats]
+
+        for export_format in formats:
+            if export_format.extension in VECTOR_FORMATS:
+                export_file_name = get_export_file_name(file_name, export_format)
+                figure.savefig(export_file_name, format=export_format.extension, dpi=RASTER_DPI if rasterize else 300,
+                               transparent=True, bbox_inches=bbox, pad_inches=0)
+                sizes.append(os.path.getsize(export_file_name))
+
+        sizes.extend(future.result() for future in futures)
+
+    release_figure(figure)
+    profiler.add_bytes_written(sum(sizes))
 
-    ax.figure.savefig(file_name + '.svg', dpi=300, transparent=True, bbox_inches='tight', pad_inches=0)
-    ax.figure.clf()
+    return sum(sizes)
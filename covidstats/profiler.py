@@ -0,0 +1,154 @@
+import contextlib
+import cProfile
+import csv
+import functools
+import json
+import os
+import pathlib
+import re
+import threading
+import time
+
+REPORT_FIELDS = ['stage', 'depth', 'pid', 'wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out', 'bytes_written',
+                 'profiled']
+
+settings = {
+    'enabled': False,
+    'profile_directory': None
+}
+
+records = []
+_records_lock = threading.Lock()
+_stages = threading.local()
+# Held by the stage running under cProfile. Since Python 3.12 cProfile allows one active profiler per process.
+_profile_lock = threading.Lock()
+
+
+def setup_profiler(enabled=False, profile_directory=None):
+    settings['enabled'] = enabled or profile_directory is not None
+    settings['profile_directory'] = profile_directory
+
+
+def count_rows(value):
+    import pandas as pd
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(count_rows(item) for item in value.values())
+
+    return 0
+
+
+def get_stack():
+    if not hasattr(_stages, 'stack'):
+        _stages.stack = []
+
+    return _stages.stack
+
+
+@contextlib.contextmanager
+def stage(name, rows_in=0):
+    # Stages nest per thread. CPU time is the time of the current thread, so stages running concurrently in a
+    # thread pool are measured separately. With a profile directory an outermost stage is also run under cProfile,
+    # unless another stage or profiling tool is profiling already, which its record notes as not profiled.
+    if not settings['enabled']:
+        yield None
+        return
+
+    stack = get_stack()
+    record = dict.fromkeys(REPORT_FIELDS, 0)
+    record.update({'stage': name, 'depth': len(stack), 'pid': os.getpid(), 'rows_in': rows_in})
+
+    profile = None
+    if settings['profile_directory'] is not None and not stack and _profile_lock.acquire(blocking=False):
+        profile = cProfile.Profile()
+
+    stack.append(record)
+    start_wall = time.perf_counter()
+    start_cpu = time.thread_time()
+    if profile is not None:
+        try:
+            profile.enable()
+        except ValueError:
+            _profile_lock.release()
+            profile = None
+
+    record['profiled'] = profile is not None
+
+    try:
+        yield record
+    finally:
+        if profile is not None:
+            profile.disable()
+            _profile_lock.release()
+
+        record['wall_seconds'] = time.perf_counter() - start_wall
+        record['cpu_seconds'] = time.thread_time() - start_cpu
+        stack.pop()
+
+        if stack:
+            stack[-1]['bytes_written'] += record['bytes_written']
+
+        with _records_lock:
+            records.append(record)
+
+        if profile is not None:
+            dump_profile(profile, name)
+
+
+def profiled(function):
+    name = '%s.%s' % (function.__module__.rsplit('.', 1)[-1], function.__name__)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not settings['enabled']:
+            return function(*args, **kwargs)
+
+        with stage(name, sum(count_rows(value) for value in [*args, *kwargs.values()])) as record:
+            result = function(*args, **kwargs)
+            record['rows_out'] = count_rows(result)
+
+            return result
+
+    return wrapper
+
+
+def add_bytes_written(size):
+    if settings['enabled'] and get_stack():
+        get_stack()[-1]['bytes_written'] += size
+
+
+def dump_profile(profile, name):
+    directory = pathlib.Path(settings['profile_directory'])
+    directory.mkdir(parents=True, exist_ok=True)
+
+    file_name = '%s.%d.%d.prof' % (re.sub(r'[^\w.-]+', '_', name), os.getpid(), time.time_ns())
+    profile.dump_stats(str(directory.joinpath(file_name)))
+
+
+def drain():
+    # Hands the records of a worker process over to the process that started it.
+    with _records_lock:
+        drained_records = list(records)
+        records.clear()
+
+    return drained_records
+
+
+def merge(worker_records):
+    with _records_lock:
+        records.extend(worker_records)
+
+
+def write_report(path):
+    with _records_lock:
+        report_records = list(records)
+
+    if str(path).endswith('.csv'):
+        with open(path, 'w', newline='') as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(report_records)
+    else:
+        pathlib.Path(path).write_text(json.dumps(report_records, indent=2))
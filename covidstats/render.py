@@ -0,0 +1,99 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from covidstats import fingerprints, locales, manifest, plot, profiler
+
+_worker_datasets = {}
+
+
+def setup_worker(datasets, profiler_settings=None):
+    # Every worker process owns its i18n locale, seaborn theme and figure pool.
+    locales.setup_i18n()
+    plot.setup_sns()
+    profiler.settings.update(profiler_settings or {})
+    profiler.drain()
+    _worker_datasets.update(datasets)
+
+
+def render_plot(locale, spec, formats=plot.DEFAULT_FORMATS, directory='.'):
+    start = time.perf_counter()
+
+    with profiler.stage('render.%s/%s' % (locale, spec.name)):
+        locales.set_locale(locale)
+        kwargs = {argument: _worker_datasets[dataset] for argument, dataset in spec.inputs.items()}
+        kwargs.update(manifest.translate(spec.kwargs))
+
+        size = plot.export_plot(spec.generator(**kwargs), os.path.join(directory, locale, spec.name),
+                                spec.override_figure_size, spec.rasterize, spec.fixed_layout, formats)
+
+    return locale, spec.name, time.perf_counter() - start, size
+
+
+def render_plot_in_worker(locale, spec, formats, directory):
+    return render_plot(locale, spec, formats, directory), profiler.drain()
+
+
+def render_plots(render_locales, specs, datasets, processes=1, incremental=False, formats=plot.DEFAULT_FORMATS,
+                 dataset_hashes=None, load_datasets=None):
+    # Datasets given only by their hash in dataset_hashes are loaded with load_datasets once the unchanged plots are
+    # skipped, and only when a plot left to render draws them.
+    jobs = [(locale, spec) for locale in render_locales for spec in specs]
+
+    if incremental:
+        plot_hashes = get_plot_hashes(jobs, datasets, formats, dataset_hashes)
+        manifests = {locale: fingerprints.read_manifest(locale) for locale in render_locales}
+        jobs = [(locale, spec) for locale, spec in jobs
+                if not fingerprints.is_unchanged(locale, spec.name, plot_hashes[locale, spec.name], manifests[locale],
+                                                 [plot.get_export_file_name(spec.name, export_format)
+                                                  for export_format in formats])]
+
+    missing_names = sorted({dataset for _, spec in jobs for dataset in spec.inputs.values()} - datasets.keys())
+    if missing_names:
+        datasets = {**datasets, **load_datasets(missing_names)}
+
+    timings = run_jobs(jobs, datasets, processes, formats)
+
+    if incremental:
+        for locale in render_locales:
+            fingerprints.update_manifest(locale, {spec.name: plot_hashes[locale, spec.name]
+                                                  for job_locale, spec in jobs if job_locale == locale})
+
+    return timings
+
+
+def get_plot_hashes(jobs, datasets, formats=plot.DEFAULT_FORMATS, dataset_hashes=None):
+    dataset_names = {dataset for _, spec in jobs for dataset in spec.inputs.values()}
+    dataset_hashes = {name: dataset_hashes[name] if dataset_hashes and name in dataset_hashes
+                      else fingerprints.hash_dataset(datasets[name]) for name in dataset_names}
+
+    return {(locale, spec.name): fingerprints.hash_plot(locale, spec, dataset_hashes, formats=formats)
+            for locale, spec in jobs}
+
+
+def run_jobs(jobs, datasets, processes=1, formats=plot.DEFAULT_FORMATS, directory='.'):
+    if processes <= 1 or len(jobs) <= 1:
+        _worker_datasets.clear()
+        _worker_datasets.update(datasets)
+
+        return [render_plot(*job, formats, directory) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(jobs)), initializer=setup_worker,
+                             initargs=(datasets, dict(profiler.settings))) as executor:
+        futures = [executor.submit(render_plot_in_worker, *job, formats, directory) for job in jobs]
+        timings = []
+
+        for future in futures:
+            timing, worker_records = future.result()
+            timings.append(timing)
+            profiler.merge(worker_records)
+
+        return timings
+
+
+def print_timings(timings):
+    for locale, name, elapsed, size in sorted(timings, key=lambda timing: timing[2], reverse=True):
+        print('%8.2fs %10.1f KB  %s/%s' % (elapsed, size / 1024, locale, name))
+
+    print('%8.2fs %10.1f KB  total' % (sum(timing[2] for timing in timings),
+                                       sum(timing[3] for timing in timings) / 1024))
@@ -0,0 +1,124 @@
+import collections
+import datetime as dt
+import http.server
+import pathlib
+import re
+import tempfile
+import urllib.parse
+
+from covidstats import data, plot, render
+
+# Plots are requested by the name of the file they are exported to, e.g. /plot/en/ActiveCases.svg or
+# /plot/bg/ActiveCases-1200.png.
+PLOT_PATH = re.compile(r'/plot/(?P<locale>\w+)/(?P<name>\w+?)(?:-(?P<width>[1-9]\d*))?\.(?P<extension>\w+)')
+
+CONTENT_TYPES = {'svg': 'image/svg+xml', 'pdf': 'application/pdf', 'png': 'image/png', 'webp': 'image/webp'}
+
+settings = {
+    'locales': [],
+    'specs': {},
+    'load_datasets': None,
+    'cache_size': 64
+}
+
+_loaded = {'day': None, 'datasets': {}}
+_plots = collections.OrderedDict()
+
+
+def setup_server(render_locales, specs, load_datasets, cache_size=64):
+    settings['locales'] = list(render_locales)
+    settings['specs'] = {spec.name: spec for spec in specs}
+    settings['load_datasets'] = load_datasets
+    settings['cache_size'] = cache_size
+
+    _loaded.update({'day': None, 'datasets': {}})
+    _plots.clear()
+
+
+def load_datasets(names, fetch_workers=8):
+    # Loaded afresh, as the data module keeps the datasets it has loaded for the lifetime of the process.
+    data.clear_datasets()
+    return data.load_datasets(names, fetch_workers)
+
+
+def get_datasets(day):
+    # The plots are dated, so the datasets, with the Rt estimates and the forecast among them, are loaded again and
+    # the finished plots are dropped on the first request of a new day.
+    if _loaded['day'] != day:
+        _loaded.update({'day': day, 'datasets': settings['load_datasets']()})
+        _plots.clear()
+
+    return _loaded['datasets']
+
+
+def render_plot(locale, spec, export_format, datasets):
+    with tempfile.TemporaryDirectory() as directory:
+        pathlib.Path(directory, locale).mkdir()
+        render.run_jobs([(locale, spec)], datasets, formats=[export_format], directory=directory)
+
+        return pathlib.Path(directory, locale, plot.get_export_file_name(spec.name, export_format)).read_bytes()
+
+
+def get_plot(locale, name, export_format):
+    # Finished plots are kept in memory up to the cache size, dropping the least recently requested one first.
+    datasets = get_datasets(dt.date.today())
+    key = (locale, name, export_format)
+
+    if key in _plots:
+        _plots.move_to_end(key)
+        return _plots[key]
+
+    _plots[key] = render_plot(locale, settings['specs'][name], export_format, datasets)
+
+    while len(_plots) > settings['cache_size']:
+        _plots.popitem(last=False)
+
+    return _plots[key]
+
+
+class PlotRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        match = PLOT_PATH.fullmatch(urllib.parse.urlsplit(self.path).path)
+
+        if match is None or match['locale'] not in settings['locales'] or match['name'] not in settings['specs']:
+            self.send_error(404)
+            return
+
+        try:
+            export_format = plot.parse_export_format(
+                '%s:%s' % (match['extension'], match['width']) if match['width'] else match['extension'])
+        except ValueError as error:
+            self.send_error(400, str(error))
+            return
+
+        try:
+            content = get_plot(match['locale'], match['name'], export_format)
+        except Exception as error:
+            self.log_error('Rendering %s failed: %r', self.path, error)
+            self.send_error(500)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[export_format.extension])
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def create_server(host='127.0.0.1', port=8000):
+    # Requests are handled one at a time, as rendering sets the locale and draws into the figure pool of the process.
+    return http.server.HTTPServer((host, port), PlotRequestHandler)
+
+
+def serve(host='127.0.0.1', port=8000):
+    plot_server = create_server(host, port)
+    get_datasets(dt.date.today())
+
+    print('Serving plots on http://%s:%d/plot/{locale}/{name}.svg' % plot_server.server_address[:2])
+
+    try:
+        plot_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        plot_server.server_close()
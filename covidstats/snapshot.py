@@ -0,0 +1,53 @@
+import datetime as dt
+import hashlib
+import json
+import pathlib
+import zipfile
+
+MANIFEST_FILE_NAME = 'snapshot.json'
+
+settings = {
+    'path': None
+}
+
+
+def setup_snapshot(path=None):
+    settings['path'] = path
+
+
+def is_bundle(path):
+    return str(path).endswith('.zip')
+
+
+def read(file_name):
+    # Snapshots are either a directory of source files or a zip bundle of them.
+    path = pathlib.Path(settings['path'])
+
+    if is_bundle(path):
+        with zipfile.ZipFile(path) as bundle:
+            return bundle.read(file_name)
+
+    return path.joinpath(file_name).read_bytes()
+
+
+def write(path, sources):
+    # Takes the url and the payload of every file and records them in the snapshot manifest.
+    manifest = json.dumps({
+        'captured_at': dt.datetime.now(dt.timezone.utc).isoformat(timespec='seconds'),
+        'files': {file_name: {'url': url, 'sha256': hashlib.sha256(payload).hexdigest(), 'size': len(payload)}
+                  for file_name, (url, payload) in sorted(sources.items())}
+    }, indent=2)
+
+    path = pathlib.Path(path)
+
+    if is_bundle(path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+            for file_name, (_, payload) in sources.items():
+                bundle.writestr(file_name, payload)
+            bundle.writestr(MANIFEST_FILE_NAME, manifest)
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+        for file_name, (_, payload) in sources.items():
+            path.joinpath(file_name).write_bytes(payload)
+        path.joinpath(MANIFEST_FILE_NAME).write_text(manifest)
@@ -0,0 +1,61 @@
+import os
+import pathlib
+
+try:
+    import pyarrow
+    import pyarrow.feather as feather
+except ImportError:
+    pyarrow = None
+    feather = None
+
+from covidstats import cache, profiler
+
+PAYLOAD_HASH_KEY = b'covidstats.payload_hash'
+
+
+def get_store_directory():
+    return pathlib.Path(cache.settings['directory'], 'store')
+
+
+def is_available():
+    # The store lives in the cache directory and needs pyarrow, which is an optional dependency.
+    return feather is not None and cache.settings['directory'] is not None
+
+
+def load(name, payload_hash, loader):
+    # Returns the stored frame when it was parsed from the same payload, otherwise parses it with the loader and
+    # stores it. Feather files are uncompressed, so reads are memory mapped instead of decoded.
+    path = get_store_directory().joinpath(name + '.feather')
+    table = read_table(path)
+
+    if table is not None and (table.schema.metadata or {}).get(PAYLOAD_HASH_KEY) == payload_hash.encode('utf-8'):
+        cache.touch(path)
+        return table.to_pandas()
+
+    df = loader()
+    write_table(path, df, payload_hash)
+
+    return df
+
+
+def read_table(path):
+    try:
+        return feather.read_table(str(path), memory_map=True)
+    except (OSError, pyarrow.ArrowException):
+        return None
+
+
+def write_table(path, df, payload_hash):
+    try:
+        table = pyarrow.Table.from_pandas(df)
+    except pyarrow.ArrowException:
+        # Columns mixing types have no fixed schema and are parsed from the payload on every run instead.
+        return
+
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), PAYLOAD_HASH_KEY: payload_hash})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name('%s.%d.tmp' % (path.name, os.getpid()))
+    feather.write_feather(table, str(temporary_path), compression='uncompressed')
+    os.replace(temporary_path, path)
+    profiler.add_bytes_written(path.stat().st_size)
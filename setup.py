@@ -25,7 +25,7 @@ class PyTest(TestCommand):
         sys.exit(pytest.main(self.test_args))
 
 
-version = "1.14"
+version = "1.15"
 
 setup(name="covid-stats",
       version=version,
@@ -40,7 +40,7 @@ setup(name="covid-stats",
       author_email="me@vesko.dev",
       url="https://coronavirus-bulgaria.org",
       license="Attribution-NonCommercial-ShareAlike 4.0 International",
-      packages=find_packages(exclude=['examples', 'tests']),
+      packages=find_packages(exclude=['examples', 'tests', 'benchmarks']),
       package_data={'covidstats': ['config/**/*']},
       include_package_data=True,
       zip_safe=False,
@@ -57,6 +57,9 @@ setup(name="covid-stats",
           'epyestim',
           'python-i18n[YAML]'
       ],
+      extras_require={
+          'store': ['pyarrow']
+      },
       # TODO: List executable scripts, provided by the package (this is just an example)
       entry_points={
           'console_scripts':
@@ -0,0 +1,150 @@
+'''
+covid-stats: Dataset cache tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import http.server
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from covidstats import cache
+
+
+class DatasetHandler(http.server.BaseHTTPRequestHandler):
+    payloads = {}
+    requests = []
+
+    def do_GET(self):
+        payload, etag = self.payloads[self.path]
+        self.requests.append((self.path, self.headers.get('If-None-Match')))
+
+        if etag is None:
+            self.payloads[self.path] = (payload, '"retried"')
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    DatasetHandler.payloads = {}
+    DatasetHandler.requests = []
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), DatasetHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    yield 'http://127.0.0.1:%d' % httpd.server_port
+
+    httpd.shutdown()
+    httpd.server_close()
+    cache.setup_cache()
+
+
+def test_fetch_revalidates_with_etag(server, tmp_path):
+    cache.setup_cache(str(tmp_path))
+    DatasetHandler.payloads['/a.csv'] = (b'date,infected\n2021-01-01,1\n', '"v1"')
+
+    assert cache.fetch(server + '/a.csv') == b'date,infected\n2021-01-01,1\n'
+    assert cache.fetch(server + '/a.csv') == b'date,infected\n2021-01-01,1\n'
+    assert DatasetHandler.requests == [('/a.csv', None), ('/a.csv', '"v1"')]
+
+    DatasetHandler.payloads['/a.csv'] = (b'date,infected\n2021-01-02,2\n', '"v2"')
+
+    assert cache.fetch(server + '/a.csv') == b'date,infected\n2021-01-02,2\n'
+
+
+def test_fetch_skips_request_within_ttl(server, tmp_path):
+    cache.setup_cache(str(tmp_path), ttl=3600)
+    DatasetHandler.payloads['/a.csv'] = (b'payload', '"v1"')
+
+    cache.fetch(server + '/a.csv')
+    cache.fetch(server + '/a.csv')
+
+    assert len(DatasetHandler.requests) == 1
+
+
+def test_fetch_evicts_least_recently_used(server, tmp_path):
+    cache.setup_cache(str(tmp_path), max_size=15)
+    DatasetHandler.payloads['/a.csv'] = (b'a' * 10, '"a"')
+    DatasetHandler.payloads['/b.csv'] = (b'b' * 10, '"b"')
+
+    cache.fetch(server + '/a.csv')
+    cache.fetch(server + '/b.csv')
+
+    assert len(list(tmp_path.glob('*.data'))) == 1
+    assert cache.fetch(server + '/a.csv') == b'a' * 10
+    assert DatasetHandler.requests[-1] == ('/a.csv', None)
+
+
+def test_fetch_retries_server_errors(server):
+    cache.setup_cache(retries=1)
+    DatasetHandler.payloads['/a.csv'] = (b'payload', None)
+
+    assert cache.fetch(server + '/a.csv') == b'payload'
+    assert len(DatasetHandler.requests) == 2
+
+
+def test_fetch_refetches_not_modified_payload_without_entry(server, tmp_path, monkeypatch):
+    cache.setup_cache(str(tmp_path))
+    DatasetHandler.payloads['/a.csv'] = (b'payload', '"v1"')
+    url = server + '/a.csv'
+
+    cache.fetch(url)
+    next(tmp_path.glob('*.json')).write_bytes(b'{"etag": "\\"v1\\""}')
+
+    # A proxy answering 304 although the request carries no validators.
+    request = cache.request
+    responses = [(None, {})]
+    monkeypatch.setattr(cache, 'request', lambda *args: responses.pop() if responses else request(*args))
+
+    assert cache.fetch(url) == b'payload'
+    assert DatasetHandler.requests[-1] == ('/a.csv', None)
+    assert cache.read_meta(next(tmp_path.glob('*.json')))['etag'] == '"v1"'
+
+
+def test_eviction_counts_every_file_in_cache_directory(server, tmp_path):
+    cache.setup_cache(str(tmp_path), max_size=25)
+    DatasetHandler.payloads['/a.csv'] = (b'a' * 10, '"a"')
+    tmp_path.joinpath('rt-old.pkl').write_bytes(b'r' * 10)
+    tmp_path.joinpath('store').mkdir()
+    tmp_path.joinpath('store', 'week_cases.feather').write_bytes(b's' * 10)
+    os.utime(tmp_path.joinpath('rt-old.pkl'), (0, 0))
+    os.utime(tmp_path.joinpath('store', 'week_cases.feather'), (1, 1))
+
+    cache.touch(tmp_path.joinpath('store', 'week_cases.feather'))
+    cache.fetch(server + '/a.csv')
+
+    assert not tmp_path.joinpath('rt-old.pkl').exists()
+    assert tmp_path.joinpath('store', 'week_cases.feather').exists()
+    assert len(list(tmp_path.glob('*.data'))) == 1
+
+
+def test_concurrent_fetches_evict_safely(server, tmp_path):
+    cache.setup_cache(str(tmp_path), max_size=50)
+    for index in range(16):
+        DatasetHandler.payloads['/%d.csv' % index] = (b'%02d' % index * 5, '"%d"' % index)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        payloads = list(executor.map(cache.fetch, [server + '/%d.csv' % (index % 16) for index in range(128)]))
+
+    assert payloads == [b'%02d' % (index % 16) * 5 for index in range(128)]
+    assert sum(path.stat().st_size for path in tmp_path.glob('*.data')) <= 50
+    assert list(tmp_path.glob('*.tmp')) == []
@@ -0,0 +1,244 @@
+'''
+covid-stats: Data module tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import datetime as dt
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from covidstats import cache, data
+
+
+def test_importing_package_does_not_load_data():
+    script = ('import pandas as pd\n'
+              'def fail(*args, **kwargs): raise AssertionError("data loaded at import time")\n'
+              'pd.read_csv = pd.read_json = fail\n'
+              'import covidstats, covidstats.plot\n')
+
+    subprocess.run([sys.executable, '-c', script], check=True)
+
+
+def test_get_dataset_loads_once(monkeypatch):
+    calls = []
+    monkeypatch.setitem(data.DATASETS, 'test', lambda: calls.append(1) or 'loaded')
+    data.clear_datasets()
+
+    assert data.get_dataset('test') == 'loaded'
+    assert data.get_dataset('test') == 'loaded'
+    assert len(calls) == 1
+
+    data.clear_datasets()
+
+
+def test_load_datasets_fetches_concurrently(monkeypatch):
+    def slow_loader():
+        time.sleep(0.2)
+        return threading.get_ident()
+
+    for name in ['a', 'b', 'c', 'd']:
+        monkeypatch.setitem(data.DATASETS, name, slow_loader)
+    data.clear_datasets()
+
+    start = time.perf_counter()
+    datasets = data.load_datasets(['a', 'b', 'c', 'd'], max_workers=4)
+
+    assert time.perf_counter() - start < 0.6
+    assert len(set(datasets.values())) == 4
+
+    data.clear_datasets()
+
+
+def test_get_dataset_hash_does_not_build_derived_datasets(monkeypatch):
+    source_df = pd.DataFrame({'value': [1, 2, 3]})
+    monkeypatch.setitem(data.DATASETS, 'week_cases', lambda: source_df)
+    monkeypatch.setitem(data.DATASETS, 'date_diff_cases', lambda: source_df)
+    built_names = []
+    monkeypatch.setitem(data.DATASETS, 'forecast', lambda: built_names.append('forecast'))
+    monkeypatch.setattr(data.store, 'is_available', lambda: False)
+    data.clear_datasets()
+
+    assert data.get_source_datasets(['forecast', 'weekly_antigen_positive_tests', 'active_cases']) == [
+        'active_cases', 'date_diff_cases', 'date_positive_tests', 'week_cases']
+
+    forecast_hash = data.get_dataset_hash('forecast')
+    assert data.get_dataset_hash('forecast') == forecast_hash
+
+    data.clear_datasets()
+    monkeypatch.setitem(data.DATASETS, 'week_cases', lambda: source_df.assign(value=[1, 2, 4]))
+
+    assert data.get_dataset_hash('forecast') != forecast_hash
+    assert built_names == []
+
+    data.clear_datasets()
+
+
+def test_build_iso_week_end_dates_matches_fromisocalendar():
+    df = pd.DataFrame({'year': [2020, 2020, 2020, 2021, 2021, 2022, 2026],
+                       'week': [1, 10, 53, 1, 52, 17, 53]})
+
+    expected = df.apply(lambda row: pd.to_datetime(dt.date.fromisocalendar(row.year, row.week, 7)), axis=1)
+    dates = data.build_iso_week_end_dates(df['year'], df['week'])
+
+    pd.testing.assert_series_equal(dates, expected)
+    assert list(dates.dt.date) == [dt.date.fromisocalendar(year, week, 7) for year, week in zip(df.year, df.week)]
+
+
+def build_date_cases_json(wrap):
+    dates = pd.date_range('2020-03-08', periods=30).strftime('%Y-%m-%d')
+    dataset = {}
+    for offset, column in enumerate(data.DATE_CASES_COLUMNS):
+        values = [None if column == 'vaccinated' and day < 10 else day * 10 + offset for day in range(len(dates))]
+        dataset[column] = {date: wrap(value) for date, value in zip(dates, values)}
+
+    return json.dumps(dataset).encode('utf-8')
+
+
+def legacy_get_date_cases_df(payload):
+    date_cases_dataset = pd.read_json(io.BytesIO(payload))
+
+    for column in data.DATE_CASES_COLUMNS:
+        date_cases_dataset[column] = date_cases_dataset[column].apply(pd.Series)
+
+    date_cases_dataset['date'] = date_cases_dataset.index
+
+    return date_cases_dataset
+
+
+def test_date_cases_json_matches_series_unpacking(monkeypatch):
+    for wrap in [lambda value: value, lambda value: [value], lambda value: {'value': value}]:
+        payload = build_date_cases_json(wrap)
+        monkeypatch.setattr(data, 'fetch_dataset_source', lambda name: io.BytesIO(payload))
+
+        pd.testing.assert_frame_equal(data.get_date_cases_df(), legacy_get_date_cases_df(payload))
+        pd.testing.assert_frame_equal(data.get_date_diff_cases_df(), legacy_get_date_cases_df(payload))
+
+
+def test_build_weekly_predicted_cases_df_keeps_quantile_bands():
+    start_date = pd.Timestamp('2021-11-03')
+    week_cases_df = pd.DataFrame({'date': pd.to_datetime(['2021-10-31', '2021-11-07']), 'infected': [7000, 3000]})
+    simulated_cases = data.simulate_predicted_cases(
+        pd.Series(1000., index=range(60)),
+        pd.DataFrame({'predicted_rt': 1., 'increase_rt': 1.2, 'decline_rt': 0.8}, index=range(14)),
+        start_date, paths=200, seed=0)
+
+    df = data.build_weekly_predicted_cases_df(week_cases_df, simulated_cases, start_date)
+
+    assert list(df.columns) == list(data.summarize_simulated_cases(simulated_cases).columns)
+    # The observed week only connects the scenario lines.
+    assert list(df.loc['2021-11-07', ['predicted_cases', 'increase_cases', 'decline_cases']]) == [7000] * 3
+    assert df.loc['2021-11-07'].filter(like='_Q').isna().all()
+
+    weekly_totals = simulated_cases['predicted_cases'].loc['2021-11-08':'2021-11-14'].sum()
+    daily_quantiles = data.summarize_simulated_cases(simulated_cases).loc['2021-11-08':'2021-11-14'].sum()
+
+    assert df.loc['2021-11-14', 'predicted_cases_Q0.05'] == weekly_totals.quantile(0.05)
+    assert df.loc['2021-11-14', 'predicted_cases_Q0.95'] == weekly_totals.quantile(0.95)
+    assert df.loc['2021-11-14', 'predicted_cases'] == weekly_totals.median()
+    assert daily_quantiles['predicted_cases_Q0.05'] < weekly_totals.quantile(0.05)
+    assert (df['predicted_cases_Q0.05'].dropna() <= df['predicted_cases'].dropna().iloc[1:]).all()
+    assert (df['predicted_cases'].dropna().iloc[1:] <= df['predicted_cases_Q0.95'].dropna()).all()
+
+
+def test_build_weekly_predicted_cases_df_connects_previous_week():
+    start_date = pd.Timestamp('2021-11-01')
+    week_cases_df = pd.DataFrame({'date': pd.to_datetime(['2021-10-24', '2021-10-31']), 'infected': [6000, 7000]})
+    simulated_cases = data.simulate_predicted_cases(
+        pd.Series(1000., index=range(60)),
+        pd.DataFrame({'predicted_rt': 1., 'increase_rt': 1.2, 'decline_rt': 0.8}, index=range(14)),
+        start_date, paths=200, seed=0)
+
+    df = data.build_weekly_predicted_cases_df(week_cases_df, simulated_cases, start_date)
+
+    assert df.index[0] == pd.Timestamp('2021-10-31')
+    assert list(df.iloc[0][['predicted_cases', 'increase_cases', 'decline_cases']]) == [7000] * 3
+    assert df.iloc[0].filter(like='_Q').isna().all()
+    assert df.iloc[1:].notna().all().all()
+
+
+def test_build_forecast_is_reproducible(monkeypatch):
+    dates = pd.date_range('2021-01-01', '2021-12-31')
+    cases = pd.Series(1000. + 100 * (dates.dayofyear % 7), index=dates, name='infected')
+    rt_df = pd.DataFrame({'cases': cases, 'Q0.05': 0.9, 'Q0.5': 1. + (dates.dayofyear % 5) / 100, 'Q0.95': 1.1})
+    monkeypatch.setattr(data.helpers, 'estimate_rt', lambda df: rt_df)
+
+    week_cases_df = pd.DataFrame({'date': pd.date_range('2021-01-03', '2021-12-26', freq='W'), 'infected': 7000.})
+    date_diff_cases_df = pd.DataFrame({'infected': cases})
+
+    forecasts = [data.build_forecast(week_cases_df, date_diff_cases_df, dt.date(2021, 12, 16), paths=200)
+                 for _ in range(2)]
+
+    pd.testing.assert_frame_equal(forecasts[0]['weekly_predicted_cases'], forecasts[1]['weekly_predicted_cases'])
+    assert (week_cases_df['infected'] == 7000.).all()
+
+
+def test_build_forecast_is_deterministic_without_cache():
+    cache.setup_cache()
+    dates = pd.date_range('2021-01-01', '2021-12-31')
+    cases = pd.Series(np.random.default_rng(0).poisson(1000 * (1.2 + np.sin(np.arange(len(dates)) / 30))),
+                      index=dates, name='infected')
+    week_cases_df = pd.DataFrame({'date': pd.date_range('2021-01-03', '2021-12-26', freq='W'), 'infected': 7000.})
+    random_state = np.random.get_state()[1].copy()
+
+    forecasts = [data.build_forecast(week_cases_df, pd.DataFrame({'infected': cases}), dt.date(2021, 12, 16),
+                                     paths=200) for _ in range(2)]
+
+    pd.testing.assert_frame_equal(forecasts[0]['rt'], forecasts[1]['rt'])
+    pd.testing.assert_frame_equal(forecasts[0]['weekly_predicted_cases'], forecasts[1]['weekly_predicted_cases'])
+    np.testing.assert_array_equal(np.random.get_state()[1], random_state)
+
+
+FORECAST_AND_PLACES_RT_SCRIPT = """
+import threading
+
+import numpy as np
+import pandas as pd
+
+from covidstats import cache, data, helpers
+
+cache.setup_cache()
+dates = pd.date_range('2021-01-01', periods=200)
+cases = np.random.default_rng(0).poisson(100 * (1.5 + np.sin(np.arange(200) / 20))).astype(float)
+week_cases_df = pd.DataFrame({'date': pd.date_range('2021-01-03', periods=28, freq='W'), 'infected': 700.})
+week_places_cases_df = pd.DataFrame({'place': np.repeat(['Sofia', 'Varna'], 28), 'infected': 700.,
+                                     'date': np.tile(week_cases_df['date'].dt.date, 2)})
+
+data.DATASETS['week_cases'] = lambda: week_cases_df
+data.DATASETS['date_diff_cases'] = lambda: pd.DataFrame({'infected': cases}, index=dates)
+data.DATASETS['week_places_cases'] = lambda: week_places_cases_df
+data.setup_data(processes=2)
+
+# The forecast holds the lock around compute_rt while the places pool starts, as it would in the fetch thread pool.
+helpers._rt_random_state_lock.acquire()
+threading.Timer(3, helpers._rt_random_state_lock.release).start()
+
+datasets = data.load_datasets(['forecast', 'places_rt'])
+print(sorted(datasets['places_rt']['place'].unique()))
+"""
+
+
+def test_load_forecast_and_places_rt_together_without_cache():
+    result = subprocess.run([sys.executable, '-c', FORECAST_AND_PLACES_RT_SCRIPT], capture_output=True, text=True,
+                            timeout=180)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "['Sofia', 'Varna']"
+
+
+def test_build_daily_places_cases_df_spreads_weeks():
+    week_places_cases_df = pd.DataFrame({'place': ['Sofia', 'Varna', 'Sofia'], 'infected': [70, 7, 140],
+                                         'date': [dt.date(2021, 1, 10), dt.date(2021, 1, 10), dt.date(2021, 1, 17)]})
+
+    df = data.build_daily_places_cases_df(week_places_cases_df)
+
+    assert list(df['date'][df['place'] == 'Sofia']) == list(pd.date_range('2021-01-04', '2021-01-17'))
+    assert list(df['infected'][df['place'] == 'Sofia']) == [10.] * 7 + [20.] * 7
+    assert df.groupby('place')['infected'].sum().to_dict() == {'Sofia': 210., 'Varna': 7.}
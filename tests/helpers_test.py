@@ -0,0 +1,127 @@
+'''
+covid-stats: Helpers module tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import numpy as np
+import pandas as pd
+
+from covidstats import cache, helpers
+
+
+def legacy_predict_cases(reported_cases, predicted_rts, rng):
+    predicted_cases = np.array([])
+
+    for i in range(len(predicted_rts)):
+        previous_cases = np.append(reported_cases, predicted_cases)[::-1]
+        distribution = helpers.draw_from_si([*range(len(previous_cases))])
+
+        predicted_cases = np.append(predicted_cases,
+                                    rng.poisson(predicted_rts[i] * np.sum(np.multiply(previous_cases, distribution)),
+                                                1)[0])
+
+    return predicted_cases
+
+
+def test_predict_cases_matches_full_history_convolution():
+    reported_cases = np.random.default_rng(1).poisson(1000, 500).astype(float)
+    predicted_rts = np.linspace(0.8, 1.2, 14)
+
+    np.testing.assert_allclose(helpers.predict_cases(reported_cases, predicted_rts, rng=np.random.default_rng(7)),
+                               legacy_predict_cases(reported_cases, predicted_rts, np.random.default_rng(7)))
+
+
+def test_simulate_cases_single_path_matches_predict_cases():
+    reported_cases = np.random.default_rng(1).poisson(1000, 500).astype(float)
+    predicted_rts = np.linspace(0.8, 1.2, 14)
+
+    np.testing.assert_allclose(
+        helpers.simulate_cases(reported_cases, predicted_rts, 1, rng=np.random.default_rng(7))[0],
+        helpers.predict_cases(reported_cases, predicted_rts, rng=np.random.default_rng(7)))
+
+
+def test_simulate_cases_is_reproducible_with_seed():
+    reported_cases = np.random.default_rng(1).poisson(1000, 500).astype(float)
+    predicted_rts = np.full(14, 1.1)
+
+    simulated_cases = helpers.simulate_cases(reported_cases, predicted_rts, 500, rng=np.random.default_rng(3))
+
+    assert simulated_cases.shape == (500, 14)
+    np.testing.assert_array_equal(simulated_cases,
+                                  helpers.simulate_cases(reported_cases, predicted_rts, 500,
+                                                         rng=np.random.default_rng(3)))
+
+
+def fake_r_covid(calls):
+    def r_covid(confirmed_cases, **kwargs):
+        calls.append(len(confirmed_cases))
+        return pd.DataFrame({'Q0.5': confirmed_cases.rolling(7).mean()})
+
+    return r_covid
+
+
+def test_estimate_rt_reuses_cached_estimate(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr('epyestim.covid19.r_covid', fake_r_covid(calls))
+    cache.setup_cache(str(tmp_path))
+    cases = pd.Series(np.arange(1000.), index=pd.date_range('2020-03-08', periods=1000), name='infected')
+
+    try:
+        pd.testing.assert_frame_equal(helpers.estimate_rt(cases), helpers.estimate_rt(cases.copy()))
+    finally:
+        cache.setup_cache()
+
+    assert calls == [1000]
+
+
+def test_estimate_rt_recomputes_only_revised_days(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr('epyestim.covid19.r_covid', fake_r_covid(calls))
+    cache.setup_cache(str(tmp_path))
+    cases = pd.Series(np.random.default_rng(0).poisson(1000, 1000).astype(float),
+                      index=pd.date_range('2020-03-08', periods=1000), name='infected')
+
+    try:
+        helpers.estimate_rt(cases[:-3])
+        rt_df = helpers.estimate_rt(cases)
+    finally:
+        cache.setup_cache()
+
+    assert calls == [997, 3 + 2 * helpers.get_rt_revised_days()]
+    pd.testing.assert_frame_equal(rt_df, helpers.compute_rt(cases), check_freq=False)
+
+
+def test_estimate_places_rt_returns_tidy_frame(monkeypatch):
+    calls = []
+    monkeypatch.setattr('epyestim.covid19.r_covid', fake_r_covid(calls))
+    dates = pd.date_range('2021-01-01', periods=30)
+    df = pd.DataFrame({'place': np.repeat(['Sofia', 'Varna'], 30), 'date': np.tile(dates, 2),
+                       'infected': np.concatenate([np.full(30, 10.), np.full(30, 20.)])})
+
+    places_rt_df = helpers.estimate_places_rt(df, processes=1)
+
+    assert calls == [30, 30]
+    assert list(places_rt_df.columns) == ['date', 'Q0.5', 'place']
+    assert places_rt_df.groupby('place')['Q0.5'].first().to_dict() == {'Sofia': 10., 'Varna': 20.}
+    assert (places_rt_df.groupby('place')['date'].min() == dates[6]).all()
+
+
+def test_estimate_places_rt_in_process_pool(tmp_path):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2021-01-01', periods=200)
+    waves = 100 * (1.5 + np.sin(np.arange(200) / 20))
+    df = pd.DataFrame({'place': np.repeat(['Sofia', 'Varna'], 200), 'date': np.tile(dates, 2),
+                       'infected': np.concatenate([rng.poisson(waves), rng.poisson(waves / 2)]).astype(float)})
+    cache.setup_cache(str(tmp_path))
+
+    try:
+        places_rt_df = helpers.estimate_places_rt(df, processes=2)
+    finally:
+        cache.setup_cache()
+
+    # The workers estimate with the real estimator and keep the estimates in the cache directory they were set up with.
+    assert len(list(tmp_path.glob('rt-*.pkl'))) == 2
+    assert set(places_rt_df['place']) == {'Sofia', 'Varna'}
+    assert places_rt_df['Q0.5'].between(0, 5).all()
+    pd.testing.assert_frame_equal(places_rt_df, helpers.estimate_places_rt(df, processes=1))
@@ -0,0 +1,226 @@
+'''
+covid-stats: Plot tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import os
+import pathlib
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image
+
+from covidstats import locales, plot
+
+STATM_PATH = pathlib.Path('/proc/self/statm')
+
+
+def get_rss():
+    return int(STATM_PATH.read_text().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+@pytest.fixture
+def active_cases_df():
+    locales.setup_i18n()
+    locales.set_locale('en')
+    plot.setup_sns()
+
+    return pd.DataFrame({'active': range(60)}, index=pd.date_range('2021-01-01', periods=60))
+
+
+def test_release_figure_returns_cleared_figure_to_pool(active_cases_df):
+    ax = plot.generate_active_cases_plot(active_cases_df)
+    figure = ax.figure
+    figure.set_size_inches(3, 2)
+    figure.subplots_adjust(top=0.5)
+
+    plot.release_figure(figure)
+
+    assert plot.get_figure() is figure
+    assert figure.axes == []
+    assert list(figure.get_size_inches()) == list(plt.rcParams['figure.figsize'])
+    assert figure.subplotpars.top == plt.rcParams['figure.subplot.top']
+    assert plt.get_fignums() == []
+
+
+def test_generators_draw_into_given_axes(active_cases_df):
+    figure = plot.get_figure()
+    ax = figure.add_subplot()
+
+    assert plot.generate_active_cases_plot(active_cases_df, ax=ax) is ax
+    assert figure.axes == [ax]
+
+    plot.release_figure(figure)
+
+
+@pytest.mark.skipif(not STATM_PATH.exists(), reason='needs /proc/self/statm')
+def test_memory_stays_flat_across_renders(active_cases_df, tmp_path):
+    def render():
+        plot.export_plot(plot.generate_active_cases_plot(active_cases_df), str(tmp_path.joinpath('ActiveCases')))
+
+    # The first renders fill the font and text layout caches.
+    for _ in range(50):
+        render()
+
+    rss = get_rss()
+
+    for _ in range(450):
+        render()
+
+    assert get_rss() - rss < 20 * 1024 * 1024
+
+
+def test_export_rasterized_facet_plot_with_fixed_layout(active_cases_df, tmp_path):
+    df = pd.DataFrame({
+        'date': list(pd.date_range('2021-01-01', periods=30)) * 8,
+        'place': [place for place in 'ABCDEFGH' for _ in range(30)],
+        'infected_avg_100k': range(240)
+    })
+
+    vector_size = plot.export_plot(plot.generate_rolling_biweekly_places_cases_facet_plot(df),
+                                   str(tmp_path.joinpath('Vector')), False)
+    raster_size = plot.export_plot(plot.generate_rolling_biweekly_places_cases_facet_plot(df),
+                                   str(tmp_path.joinpath('Raster')), False, rasterize=True, fixed_layout=True)
+
+    raster_svg = tmp_path.joinpath('Raster.svg').read_text()
+
+    assert raster_size == tmp_path.joinpath('Raster.svg').stat().st_size
+    # The background lines are an image in both, the facets' own lines only in the rasterized one.
+    assert tmp_path.joinpath('Vector.svg').read_text().count('<image') == 8
+    assert raster_svg.count('<image') == 16
+    # The figure is saved at the size it was laid out at: six facets of 3 by 2 inches, two rows, header and footer.
+    assert 'width="1296pt" height="403.2pt"' in raster_svg
+
+
+def test_export_plot_to_several_formats(active_cases_df, tmp_path):
+    formats = [plot.parse_export_format(value) for value in ['svg', 'pdf', 'png:300', 'webp:200', 'png']]
+
+    size = plot.export_plot(plot.generate_active_cases_plot(active_cases_df), str(tmp_path.joinpath('ActiveCases')),
+                            formats=formats)
+
+    file_names = ['ActiveCases.svg', 'ActiveCases.pdf', 'ActiveCases-300.png', 'ActiveCases-200.webp',
+                  'ActiveCases.png']
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(file_names)
+    assert size == sum(tmp_path.joinpath(file_name).stat().st_size for file_name in file_names)
+
+    with Image.open(tmp_path.joinpath('ActiveCases-300.png')) as thumbnail, \
+            Image.open(tmp_path.joinpath('ActiveCases.png')) as image:
+        assert thumbnail.width == 300
+        assert image.width > 300
+        assert abs(thumbnail.height / thumbnail.width - image.height / image.width) < 0.01
+
+
+def test_parse_export_format():
+    assert plot.parse_export_format('svg') == plot.ExportFormat('svg')
+    assert plot.parse_export_format('WEBP:1200') == plot.ExportFormat('webp', 1200)
+
+    with pytest.raises(ValueError):
+        plot.parse_export_format('pdf:1200')
+    with pytest.raises(ValueError):
+        plot.parse_export_format('gif')
+
+
+def test_decimation_keeps_peaks_of_every_bucket():
+    values = np.random.default_rng(0).gamma(4, 100, 10000)
+    values[5000:5050] = np.nan
+
+    positions = plot.get_decimated_positions(values, 100)
+    decimated_values = values[positions]
+
+    assert len(positions) <= 2 * 100 + 2
+    assert positions[0] == 0 and positions[-1] == len(values) - 1
+    assert set(np.nanmax(values.reshape(100, -1), axis=1)) <= set(decimated_values)
+    assert set(np.nanmin(values.reshape(100, -1), axis=1)) <= set(decimated_values)
+    assert list(plot.get_decimated_positions(values[:150], 100)) == list(range(150))
+
+
+def test_long_history_is_drawn_with_bounded_vertices(active_cases_df):
+    df = pd.DataFrame({'active': np.random.default_rng(0).gamma(4, 100, 365 * 30)},
+                      index=pd.date_range('1990-01-01', periods=365 * 30))
+
+    ax = plot.generate_active_cases_plot(df)
+    line = ax.get_lines()[0]
+
+    assert len(line.get_ydata()) <= 2 * plot.get_decimation_buckets(ax) + 2
+    assert max(line.get_ydata()) == df['active'].max()
+    assert len(ax.get_xticks()) <= plot.MAX_DATE_TICKS
+
+    plot.release_figure(ax.figure)
+
+
+def test_draw_lines_labels_every_column_with_its_color(active_cases_df):
+    df = pd.DataFrame({'date': pd.date_range('2021-01-01', periods=60), 'infected': range(60), 'cured': range(60),
+                       'fatal': [None] * 5 + list(range(55))})
+
+    ax = plot.generate_date_cases_plot(df, legend=['Infected', 'Cured', 'Fatal'])
+    legend = ax.get_legend()
+
+    assert [(line.get_label(), line.get_color(), len(line.get_xdata())) for line in ax.get_lines()] == [
+        ('Infected', 'orange', 60), ('Cured', 'green', 60), ('Fatal', 'red', 55)]
+    assert [handle.get_color() for handle in legend.legend_handles] == ['orange', 'green', 'red']
+    assert [text.get_text() for text in legend.texts] == ['Infected', 'Cured', 'Fatal']
+
+    plot.release_figure(ax.figure)
+
+
+def test_facet_background_is_drawn_once_for_all_facets(active_cases_df):
+    df = pd.DataFrame({
+        'date': list(pd.date_range('2021-01-01', periods=30)) * 8,
+        'place': [place for place in 'ABCDEFGH' for _ in range(30)],
+        'infected_avg_100k': range(240)
+    })
+
+    figure = plot.generate_rolling_biweekly_places_cases_facet_plot(df)
+    images = [ax.get_images() for ax in figure.axes]
+
+    assert all(len(ax.get_lines()) == 1 and not ax.collections for ax in figure.axes)
+    assert all(len(ax_images) == 1 for ax_images in images)
+    assert all(np.array_equal(ax_images[0].get_array(), images[0][0].get_array()) for ax_images in images)
+    assert images[0][0].get_extent() == [*figure.axes[0].get_xlim(), *figure.axes[0].get_ylim()]
+    assert figure.axes[0].get_ylim()[1] > 239
+
+    plot.release_figure(figure)
+
+
+def test_places_rt_facets_share_background_and_limits(active_cases_df):
+    dates = pd.date_range('2021-01-01', periods=60)
+    df = pd.DataFrame({
+        'date': list(dates) * 8,
+        'place': [place for place in 'ABCDEFGH' for _ in range(60)],
+        'Q0.5': np.tile(np.linspace(0.8, 1.2, 60), 8) + np.repeat(np.arange(8) / 10, 60)
+    })
+    df['Q0.05'] = df['Q0.5'] - 0.1
+    df['Q0.95'] = df['Q0.5'] + 0.1
+
+    figure = plot.generate_places_rt_facet_plot(df)
+    images = [ax.get_images() for ax in figure.axes]
+
+    # The facets are ordered by the latest Rt and every one draws the median line of its place.
+    assert [ax.get_lines()[0].get_ydata()[-1] for ax in figure.axes] == sorted(
+        df.groupby('place')['Q0.5'].last(), reverse=True)
+    assert all(len(ax_images) == 1 for ax_images in images)
+    assert all(np.array_equal(ax_images[0].get_array(), images[0][0].get_array()) for ax_images in images)
+    assert figure.axes[0].get_ylim()[0] < 0.7 and figure.axes[0].get_ylim()[1] > 2.0
+
+    plot.release_figure(figure)
+
+
+def test_weekly_plots_widen_date_ticks_of_long_histories(active_cases_df):
+    weeks = pd.date_range('1995-01-01', periods=52 * 25, freq='W')
+    places_df = pd.DataFrame({'date': np.repeat(weeks.date, 2), 'place': np.tile(['Sofia', 'Varna'], len(weeks)),
+                              'infected_avg': np.arange(2 * len(weeks), dtype=float)})
+    tests_df = pd.DataFrame({'date': weeks, 'total_tests': 100., 'total_positive_tests': 10.,
+                             'positive_percentage': 10.}, index=weeks)
+
+    for ax in [plot.generate_week_places_cases_plot(places_df),
+               plot.generate_tests_positivity_plot(tests_df, value_vars=['total_tests', 'total_positive_tests'],
+                                                   hue_order=['total_tests', 'total_positive_tests'],
+                                                   secondary_var='positive_percentage')]:
+        assert 0 < len(ax.get_xticks()) <= plot.MAX_DATE_TICKS
+        # Four weekly minor ticks per major one, with the weeks widened by the same factor.
+        assert len(ax.xaxis.get_minorticklocs()) <= 4 * (plot.MAX_DATE_TICKS + 1)
+
+        plot.release_figure(ax.figure)
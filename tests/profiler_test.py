@@ -0,0 +1,99 @@
+'''
+covid-stats: Stage profiler tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import csv
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from covidstats import profiler
+
+
+@profiler.profiled
+def build_head_df(df, rows):
+    profiler.add_bytes_written(rows * 10)
+    return df.head(rows)
+
+
+@pytest.fixture
+def enabled_profiler():
+    profiler.setup_profiler(True)
+    profiler.drain()
+
+    yield
+
+    profiler.setup_profiler()
+    profiler.drain()
+
+
+def test_profiled_records_rows_and_bytes(enabled_profiler):
+    with profiler.stage('outer'):
+        build_head_df(pd.DataFrame({'value': range(10)}), rows=3)
+
+    inner, outer = profiler.records
+
+    assert (inner['stage'], inner['depth'], inner['rows_in'], inner['rows_out']) == ('profiler_test.build_head_df', 1,
+                                                                                      10, 3)
+    assert (outer['stage'], outer['depth'], outer['bytes_written']) == ('outer', 0, 30)
+    assert outer['wall_seconds'] >= inner['wall_seconds'] > 0
+
+
+def test_profiled_is_transparent_when_disabled():
+    profiler.setup_profiler()
+
+    assert len(build_head_df(pd.DataFrame({'value': range(10)}), 3)) == 3
+    assert profiler.records == []
+
+
+def test_write_report(enabled_profiler, tmp_path):
+    build_head_df(pd.DataFrame({'value': range(10)}), 3)
+
+    profiler.write_report(str(tmp_path.joinpath('report.json')))
+    profiler.write_report(str(tmp_path.joinpath('report.csv')))
+
+    assert json.loads(tmp_path.joinpath('report.json').read_text())[0]['rows_out'] == 3
+    with open(tmp_path.joinpath('report.csv'), newline='') as report_file:
+        assert next(csv.DictReader(report_file))['rows_out'] == '3'
+
+
+def test_profile_directory_dumps_top_level_stages(tmp_path):
+    profiler.setup_profiler(profile_directory=str(tmp_path))
+
+    try:
+        with profiler.stage('render.en/Plot'):
+            build_head_df(pd.DataFrame({'value': range(10)}), 3)
+    finally:
+        profiler.setup_profiler()
+        profiler.drain()
+
+    assert [path.name.split('.')[:2] for path in tmp_path.glob('*.prof')] == [['render', 'en_Plot']]
+
+
+def test_profile_directory_profiles_one_of_concurrent_stages(tmp_path):
+    barrier = threading.Barrier(4)
+
+    @profiler.profiled
+    def fetch(index):
+        barrier.wait(timeout=10)
+        return index
+
+    profiler.setup_profiler(profile_directory=str(tmp_path))
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(fetch, range(4))) == list(range(4))
+
+        records = profiler.drain()
+    finally:
+        profiler.setup_profiler()
+        profiler.drain()
+
+    assert len(records) == 4
+    assert [record['profiled'] for record in records].count(True) == 1
+    assert len(list(tmp_path.glob('*.prof'))) == 1
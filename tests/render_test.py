@@ -0,0 +1,158 @@
+'''
+covid-stats: Render scheduler tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import json
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import covidstats
+from covidstats import data, fingerprints, locales, manifest, plot, render, snapshot
+
+
+def generate_line_plot(values, title):
+    ax = plt.gca()
+    ax.plot(values)
+    ax.set_title(title)
+
+    return ax
+
+
+def test_render_plots_in_process_pool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    locales.setup_i18n()
+    for locale in ['bg', 'en']:
+        tmp_path.joinpath(locale).mkdir()
+
+    specs = [manifest.PlotSpec(name, generate_line_plot, {'values': 'values'},
+                               {'title': manifest.Text('plots.week_cases_plot.title')}) for name in ['First', 'Second']]
+
+    timings = render.render_plots(['bg', 'en'], specs, {'values': [1, 3, 2]}, processes=2)
+
+    assert [timing[:2] for timing in timings] == [('bg', 'First'), ('bg', 'Second'), ('en', 'First'), ('en', 'Second')]
+
+    assert sorted(path.name for path in tmp_path.joinpath('bg').iterdir()) == ['First.svg', 'Second.svg']
+    assert 'Disease timeline by week' in tmp_path.joinpath('en', 'First.svg').read_text()
+
+
+def test_select_plots():
+    assert [spec.name for spec in manifest.select(manifest.PLOTS, ['WeeklyInfectedCured'])] == ['WeeklyInfectedCured']
+    assert manifest.get_required_datasets(manifest.select(manifest.PLOTS, ['DateVaccinationTimeline'])) == [
+        'date_cases', 'date_diff_cases']
+    assert set(manifest.get_required_datasets(manifest.PLOTS + manifest.OPTIONAL_PLOTS)) <= set(data.DATASETS)
+
+    assert 'places_rt' not in manifest.get_required_datasets(manifest.select(manifest.PLOTS, None,
+                                                                             manifest.OPTIONAL_PLOTS))
+    assert [spec.name for spec in manifest.select(manifest.PLOTS, ['ActiveCases', 'PlacesRt'],
+                                                  manifest.OPTIONAL_PLOTS)] == ['ActiveCases', 'PlacesRt']
+
+
+def test_render_plots_skips_unchanged_inputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    locales.setup_i18n()
+    tmp_path.joinpath('en').mkdir()
+
+    specs = [manifest.PlotSpec('First', generate_line_plot, {'values': 'first'}, {'title': 'First'}),
+             manifest.PlotSpec('Second', generate_line_plot, {'values': 'second'}, {'title': 'Second'})]
+    datasets = {'first': pd.DataFrame({'value': [1, 3, 2]}), 'second': pd.DataFrame({'value': [4, 5, 6]})}
+
+    assert len(render.render_plots(['en'], specs, datasets, incremental=True)) == 2
+    assert render.render_plots(['en'], specs, datasets, incremental=True) == []
+
+    datasets['second'] = pd.DataFrame({'value': [4, 5, 7]})
+
+    assert [timing[1] for timing in render.render_plots(['en'], specs, datasets, incremental=True)] == ['Second']
+    assert set(fingerprints.read_manifest('en')) == {'First', 'Second'}
+
+
+def test_render_plots_loads_hashed_datasets_only_for_changed_plots(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    locales.setup_i18n()
+    tmp_path.joinpath('en').mkdir()
+
+    loaded_names = []
+
+    def load_datasets(names):
+        loaded_names.append(names)
+        return {name: pd.DataFrame({'value': [1, 3, 2]}) for name in names}
+
+    specs = [manifest.PlotSpec('Derived', generate_line_plot, {'values': 'derived'}, {'title': 'Derived'})]
+
+    assert len(render.render_plots(['en'], specs, {}, incremental=True, dataset_hashes={'derived': 'a'},
+                                   load_datasets=load_datasets)) == 1
+    assert render.render_plots(['en'], specs, {}, incremental=True, dataset_hashes={'derived': 'a'},
+                               load_datasets=load_datasets) == []
+    assert loaded_names == [['derived']]
+
+    assert len(render.render_plots(['en'], specs, {}, incremental=True, dataset_hashes={'derived': 'b'},
+                                   load_datasets=load_datasets)) == 1
+    assert loaded_names == [['derived'], ['derived']]
+
+
+def test_render_plots_renders_missing_formats_of_unchanged_inputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    locales.setup_i18n()
+    tmp_path.joinpath('en').mkdir()
+
+    specs = [manifest.PlotSpec('First', generate_line_plot, {'values': 'first'}, {'title': 'First'})]
+    datasets = {'first': pd.DataFrame({'value': [1, 3, 2]})}
+    formats = [plot.parse_export_format(value) for value in ['svg', 'png:300']]
+
+    assert len(render.render_plots(['en'], specs, datasets, incremental=True, formats=formats)) == 1
+    assert render.render_plots(['en'], specs, datasets, incremental=True, formats=formats) == []
+
+    tmp_path.joinpath('en', 'First-300.png').unlink()
+
+    assert len(render.render_plots(['en'], specs, datasets, incremental=True, formats=formats)) == 1
+    assert tmp_path.joinpath('en', 'First-300.png').exists()
+
+    formats = [plot.parse_export_format(value) for value in ['webp']]
+    assert len(render.render_plots(['en'], specs, datasets, incremental=True, formats=formats)) == 1
+    assert render.render_plots(['en'], specs, datasets, incremental=True, formats=formats) == []
+    assert tmp_path.joinpath('en', 'First.webp').exists()
+
+
+def write_external_snapshot(directory):
+    # A few months of every source the external plots are built from, in the formats the sources are published in.
+    dates = pd.date_range('2020-12-01', '2021-03-31').strftime('%Y-%m-%d')
+    age_groups = ['0 - 19', '20 - 29', '30 - 39', '40 - 49', '50 - 59', '60 - 69', '70 - 79', '80 - 89', '90+']
+
+    directory.joinpath(data.get_source_file_name('date_diff_cases')).write_text(json.dumps(
+        {column: {date: day % 7 + 1 for day, date in enumerate(dates)} for column in data.DATE_CASES_COLUMNS}))
+    pd.DataFrame({'Дата': dates, **{group: range(len(dates)) for group in age_groups}}).to_csv(
+        directory.joinpath(data.get_source_file_name('infected_by_age_group')), index=False)
+
+    rows = pd.MultiIndex.from_product([dates, ['-', 'Comirnaty'], ['male', 'female'], age_groups],
+                                      names=['Дата', 'Ваксина', 'Пол', 'Възрастова група']).to_frame(index=False)
+    rows.drop(columns='Ваксина').drop_duplicates().assign(**{'Брой починали': 2}).to_csv(
+        directory.joinpath(data.get_source_file_name('fatal_by_age_group')), index=False)
+    for name, column in [('infected_vaccinated', 'Брой заразени'), ('hospitalized_vaccinated', 'Брой хоспитализирани'),
+                         ('intensive_care_vaccinated', 'Брой в интензивно отделение'),
+                         ('fatal_vaccinated', 'Брой починали')]:
+        rows.assign(**{column: 1}).to_csv(directory.joinpath(data.get_source_file_name(name)), index=False)
+
+
+def test_build_external_renders_every_external_plot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    locales.setup_i18n()
+    plot.setup_sns()
+    for directory in ['snapshot', 'bg', 'en']:
+        tmp_path.joinpath(directory).mkdir()
+
+    write_external_snapshot(tmp_path.joinpath('snapshot'))
+    snapshot.setup_snapshot(str(tmp_path.joinpath('snapshot')))
+    data.clear_datasets()
+
+    try:
+        timings = covidstats.build_external()
+    finally:
+        snapshot.setup_snapshot()
+        data.clear_datasets()
+
+    assert sorted(timing[:2] for timing in timings) == sorted(
+        (locale, spec.name) for locale in covidstats.LOCALES for spec in manifest.EXTERNAL_PLOTS)
+    assert all(tmp_path.joinpath(locale, spec.name + '.svg').exists()
+               for locale in covidstats.LOCALES for spec in manifest.EXTERNAL_PLOTS)
@@ -0,0 +1,84 @@
+'''
+covid-stats: Plot server tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import io
+import threading
+import urllib.error
+import urllib.request
+
+import matplotlib.pyplot as plt
+import pytest
+from PIL import Image
+
+from covidstats import locales, manifest, plot, server
+
+rendered_titles = []
+
+
+def generate_line_plot(values, title):
+    rendered_titles.append(title)
+
+    ax = plt.gca()
+    ax.plot(values)
+    ax.set_title(title)
+
+    return ax
+
+
+@pytest.fixture
+def plot_server_url():
+    locales.setup_i18n()
+    plot.setup_sns()
+    rendered_titles.clear()
+
+    specs = [manifest.PlotSpec('Line', generate_line_plot, {'values': 'values'},
+                               {'title': manifest.Text('plots.week_cases_plot.title')})]
+    loads = []
+    server.setup_server(['bg', 'en'], specs, lambda: loads.append(len(loads)) or {'values': [1, 3, 2]}, cache_size=2)
+
+    plot_server = server.create_server('127.0.0.1', 0)
+    thread = threading.Thread(target=plot_server.serve_forever, daemon=True)
+    thread.start()
+
+    yield 'http://127.0.0.1:%d/plot' % plot_server.server_port
+
+    plot_server.shutdown()
+    plot_server.server_close()
+    thread.join()
+
+    assert len(loads) <= 1
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return response.headers['Content-Type'], response.read()
+
+
+def test_serve_plots_from_memory(plot_server_url):
+    content_type, svg = get(plot_server_url + '/en/Line.svg')
+
+    assert content_type == 'image/svg+xml'
+    assert b'Disease timeline by week' in svg
+    assert get(plot_server_url + '/en/Line.svg') == (content_type, svg)
+    assert len(rendered_titles) == 1
+
+    content_type, png = get(plot_server_url + '/bg/Line-300.png')
+    with Image.open(io.BytesIO(png)) as image:
+        assert content_type == 'image/png' and image.width == 300
+
+    # The cache keeps the two most recently requested plots, so the first one is rendered again.
+    get(plot_server_url + '/bg/Line.svg')
+    get(plot_server_url + '/en/Line.svg')
+    assert len(rendered_titles) == 4
+
+
+@pytest.mark.parametrize('path, status', [('/en/Unknown.svg', 404), ('/de/Line.svg', 404), ('/en/Line.gif', 400),
+                                          ('/en/Line-300.svg', 400)])
+def test_serve_plots_rejects_unknown_requests(plot_server_url, path, status):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(plot_server_url + path)
+
+    assert error.value.code == status
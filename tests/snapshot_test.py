@@ -0,0 +1,49 @@
+'''
+covid-stats: Snapshot tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import json
+import zipfile
+
+import pytest
+
+from covidstats import data, snapshot
+
+
+@pytest.fixture
+def snapshot_directory(tmp_path):
+    directory = tmp_path.joinpath('snapshot')
+    directory.mkdir()
+
+    for name in data.DATASET_SOURCES:
+        directory.joinpath(data.get_source_file_name(name)).write_bytes(('year,week,name\n2021,1,%s\n' % name).encode())
+
+    yield directory
+
+    snapshot.setup_snapshot()
+
+
+def test_loaders_read_snapshot_directory(snapshot_directory):
+    snapshot.setup_snapshot(str(snapshot_directory))
+
+    week_cases_df = data.get_week_cases_df()
+
+    assert list(week_cases_df['name']) == ['week_cases']
+    assert data.fetch_dataset_source('fatal_vaccinated').read() == b'year,week,name\n2021,1,fatal_vaccinated\n'
+
+
+def test_capture_snapshot_bundle(snapshot_directory, tmp_path):
+    snapshot.setup_snapshot(str(snapshot_directory))
+    data.capture_snapshot(str(tmp_path.joinpath('snapshot.zip')))
+
+    with zipfile.ZipFile(tmp_path.joinpath('snapshot.zip')) as bundle:
+        manifest = json.loads(bundle.read(snapshot.MANIFEST_FILE_NAME))
+
+    assert manifest['files']['WeekCasesDataset.csv']['url'] == data.DATASET_SOURCES['week_cases']
+    assert len(manifest['files']) == len(data.DATASET_SOURCES)
+
+    snapshot.setup_snapshot(str(tmp_path.joinpath('snapshot.zip')))
+
+    assert list(data.get_week_cases_df()['name']) == ['week_cases']
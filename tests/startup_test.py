@@ -0,0 +1,51 @@
+'''
+covid-stats: Startup time tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import os
+import subprocess
+import sys
+
+# Cumulative import time of the command line entry point in microseconds, as reported by -X importtime. The entry
+# point takes about a tenth of it, while pandas, matplotlib and epyestim alone would take several times as much.
+IMPORT_TIME_BUDGET = 500000
+
+HEAVY_MODULES = ['numpy', 'pandas', 'matplotlib', 'seaborn', 'scipy', 'epyestim', 'pydlm']
+
+
+def run_python(code, *options):
+    environment = {name: value for name, value in os.environ.items() if name != 'MPLBACKEND'}
+
+    return subprocess.run([sys.executable, *options, '-c', code], capture_output=True, text=True, check=True,
+                          env=environment)
+
+
+def get_loaded_modules(imports, modules):
+    code = 'import sys\n%s\nprint(" ".join(module for module in %r if module in sys.modules))' % (imports, modules)
+
+    return run_python(code).stdout.split()
+
+
+def get_import_time(module):
+    # Lines of -X importtime read "import time: <self> | <cumulative> | <indented module name>".
+    for line in run_python('import %s' % module, '-X', 'importtime').stderr.splitlines():
+        _, _, cumulative, name = line.replace('|', ':').split(':')
+
+        if name.strip() == module:
+            return int(cumulative)
+
+
+def test_entry_point_import_time_is_within_budget():
+    assert get_loaded_modules('import covidstats', HEAVY_MODULES) == []
+    assert min(get_import_time('covidstats') for _ in range(3)) < IMPORT_TIME_BUDGET
+
+
+def test_plotting_does_not_import_rt_estimation():
+    assert get_loaded_modules('import covidstats.data, covidstats.manifest, covidstats.plot, covidstats.render',
+                              ['epyestim', 'pydlm']) == []
+
+
+def test_plots_use_non_interactive_backend():
+    assert run_python('import matplotlib, covidstats.plot; print(matplotlib.get_backend())').stdout.strip() == 'agg'
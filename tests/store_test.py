@@ -0,0 +1,80 @@
+'''
+covid-stats: Columnar dataset store tests.
+
+Copyright 2021, Veselin Stoyanov
+Licensed under Attribution-NonCommercial-ShareAlike 4.0 International
+'''
+import datetime as dt
+import io
+
+import pandas as pd
+import pytest
+
+from covidstats import cache, data, store
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def store_directory(tmp_path):
+    cache.setup_cache(str(tmp_path))
+
+    yield tmp_path
+
+    cache.setup_cache()
+
+
+def build_df():
+    return pd.DataFrame({
+        'date': pd.date_range('2021-01-01', periods=3),
+        'week_date': [dt.date(2021, 1, 3), dt.date(2021, 1, 10), dt.date(2021, 1, 17)],
+        'place': ['Благоевград', 'Бургас', 'Варна'],
+        'infected': [1, 2, 3]
+    }, index=pd.date_range('2021-01-01', periods=3))
+
+
+def test_load_reads_frame_parsed_from_same_payload(store_directory):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return build_df()
+
+    store.load('week_places_cases', 'a', loader)
+    df = store.load('week_places_cases', 'a', loader)
+
+    assert calls == [1]
+    assert store_directory.joinpath('store', 'week_places_cases.feather').exists()
+    pd.testing.assert_frame_equal(df, build_df(), check_freq=False)
+
+
+def test_load_parses_changed_payload(store_directory):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return build_df()
+
+    store.load('week_places_cases', 'a', loader)
+    store.load('week_places_cases', 'b', loader)
+    store.load('week_places_cases', 'b', loader)
+
+    assert calls == [1, 1]
+
+
+def test_load_dataset_fetches_source_once(store_directory, monkeypatch):
+    fetches = []
+
+    def fetch_dataset_source(name):
+        fetches.append(name)
+        return io.BytesIO(b'year,week,infected\n2021,1,10\n2021,2,20\n')
+
+    monkeypatch.setattr(data, 'fetch_dataset_source', fetch_dataset_source)
+
+    df = data.load_dataset('week_cases')
+
+    assert fetches == ['week_cases']
+    assert list(df['infected']) == [10, 20]
+
+    pd.testing.assert_frame_equal(data.load_dataset('week_cases'), df)
+    assert fetches == ['week_cases', 'week_cases']